@@ -0,0 +1,156 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import time
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(asyncio.TimeoutError):
+    """
+    Raised instead of a request to an upstream that has been failing. It is a subclass of asyncio.TimeoutError, so
+    commands answer it the same way as a slow upstream, only without waiting for the timeout first.
+    """
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"{host} is failing, requests are retried in {retry_after:.0f} seconds")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one upstream host. After failure_threshold consecutive failures the circuit opens and requests
+    are rejected until reset_timeout has passed. Then one trial request is let through (half-open), which closes the
+    circuit if it succeeds and opens it again for twice as long if it fails.
+
+    The timeout of the requests adapts to the observed latency of the host: it is latency_multiplier times the 95th
+    percentile of the recent successful requests, but no less than min_timeout and no more than the timeout the
+    caller asked for.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 15, max_reset_timeout: float = 300,
+                 min_timeout: float = 1, latency_multiplier: float = 3, window: int = 100, min_samples: int = 20):
+        """
+        :param host: Host name used in errors and metrics
+        :param failure_threshold: Consecutive failures after which the circuit opens
+        :param reset_timeout: Seconds the circuit stays open before the first trial request
+        :param max_reset_timeout: Upper limit for the doubled reset timeout after failed trial requests
+        :param min_timeout: Lower limit for the adaptive timeout in seconds
+        :param latency_multiplier: Adaptive timeout as a multiple of the 95th percentile latency
+        :param window: Amount of recent successful request latencies the percentile is calculated from
+        :param min_samples: Latencies needed before the timeout adapts. Until then the caller's timeout is used.
+        """
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.min_timeout = min_timeout
+        self.latency_multiplier = latency_multiplier
+        self.min_samples = min_samples
+        self.state = CLOSED
+        self.failures = 0
+        self.counters = collections.Counter()
+        self._latencies = collections.deque(maxlen=window)
+        self._open_for = reset_timeout
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """
+        :return: Seconds until the next trial request is allowed, 0 if requests are allowed now
+        """
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._open_for - time.monotonic())
+
+    def before_request(self):
+        """
+        Check that a request may be sent to the host. Must be followed by record_success() or record_failure().
+
+        :raise CircuitOpenError: If the circuit is open or another trial request is already in flight
+        """
+        if self.state == OPEN:
+            retry_after = self.retry_after()
+            if retry_after > 0:
+                self.counters["rejected"] += 1
+                raise CircuitOpenError(self.host, retry_after)
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                self.counters["rejected"] += 1
+                raise CircuitOpenError(self.host, self.reset_timeout)
+            self._trial_in_flight = True
+
+    def record_success(self, latency: float):
+        self._latencies.append(latency)
+        self.failures = 0
+        if self.state != CLOSED:
+            self.counters["closed"] += 1
+        self.state = CLOSED
+        self._open_for = self.reset_timeout
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.counters["failures"] += 1
+        if self.state == HALF_OPEN:
+            self._open_for = min(self._open_for * 2, self.max_reset_timeout)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def record_cancelled(self):
+        # A cancelled request tells nothing about the host, but a cancelled trial must let the next one through
+        self._trial_in_flight = False
+
+    def _open(self):
+        self.state = OPEN
+        self.counters["opened"] += 1
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """
+        :return: Quantile of the recent successful request latencies in seconds, or None if there are none
+        """
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def get_timeout(self, timeout: float) -> float:
+        """
+        :param timeout: Timeout the caller asked for, which is also the upper limit
+        :return: Timeout in seconds to use for the next request
+        """
+        if len(self._latencies) < self.min_samples:
+            return timeout
+        adaptive = self.latency_multiplier * self.latency_quantile(0.95)
+        return min(timeout, max(self.min_timeout, adaptive))
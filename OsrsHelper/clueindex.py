@@ -0,0 +1,234 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import time
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+ClueMatch = collections.namedtuple("ClueMatch", ["kind", "score", "row"])
+
+# Match kinds in the order they are ranked
+EXACT = 0
+PREFIX = 1
+SUBSTRING = 2
+FUZZY = 3
+
+# Queries to load every clue table. The first column of each row is the searchable clue text.
+CLUE_TABLES = {"anagrams": "SELECT * FROM anagrams;",
+               "ciphers": "SELECT * FROM ciphers;",
+               "cryptics": "SELECT CRYPTIC, SOLUTION, IMAGE FROM cryptics;"}
+
+FUZZY_THRESHOLD = 0.45
+FUZZY_LIMIT = 5
+
+
+def normalize(text: str) -> str:
+    """
+    Normalize clue text for comparisons the same way the case insensitive database collation did.
+    """
+    return " ".join(str(text).lower().split())
+
+
+def trigrams(text: str, padded: bool = True) -> set:
+    """
+    :param text: Normalized text
+    :param padded: Pad the text so that its start and end (and texts shorter than three characters) also produce
+                   trigrams. Substring searches must not pad, because the query may start in the middle of a word.
+    :return: Set of all trigrams in the text
+    """
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        # Ids of all clues whose text goes through this node, in insertion order
+        self.ids = []
+
+
+class ClueIndex:
+    """
+    In-memory index of one clue table. Answers exact and prefix searches with a character trie and substring and
+    typo tolerant searches with a trigram index, so no database round-trips are needed for searching. The index is
+    immutable and is rebuilt as a whole when the table changes.
+    """
+
+    def __init__(self, rows: Iterable[Sequence] = ()):
+        self.rows = []
+        self.keys = []
+        self._exact = {}
+        self._root = _TrieNode()
+        postings = collections.defaultdict(list)
+        trigram_counts = []
+        for row in rows:
+            clue_id = len(self.rows)
+            key = normalize(row[0])
+            self.rows.append(tuple(row))
+            self.keys.append(key)
+            self._exact.setdefault(key, []).append(clue_id)
+            self._add_to_trie(key, clue_id)
+            key_trigrams = trigrams(key)
+            for trigram in key_trigrams:
+                postings[trigram].append(clue_id)
+            trigram_counts.append(len(key_trigrams))
+
+        # Every id is in a posting list at most once, so counting the ids of the query trigram postings gives the
+        # amount of trigrams each clue shares with the query
+        self._postings = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+        self._trigram_counts = np.array(trigram_counts, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _add_to_trie(self, key: str, clue_id: int):
+        node = self._root
+        node.ids.append(clue_id)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.append(clue_id)
+
+    def _count_shared(self, query_trigrams: set) -> np.ndarray:
+        postings = [self._postings[trigram] for trigram in query_trigrams if trigram in self._postings]
+        if not postings:
+            return np.zeros(len(self.rows), dtype=np.int64)
+        return np.bincount(np.concatenate(postings), minlength=len(self.rows))
+
+    def exact(self, query: str) -> List[int]:
+        return self._exact.get(normalize(query), [])
+
+    def prefix(self, query: str) -> List[int]:
+        node = self._root
+        for char in normalize(query):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+    def substring(self, query: str) -> List[int]:
+        query = normalize(query)
+        query_trigrams = trigrams(query, padded=False)
+        if query_trigrams:
+            # Only clues that have all trigrams of the query can contain it
+            candidates = np.flatnonzero(self._count_shared(query_trigrams) == len(query_trigrams)).tolist()
+        else:
+            candidates = range(len(self.keys))
+        return [clue_id for clue_id in candidates if query in self.keys[clue_id]]
+
+    def fuzzy(self, query: str, limit: int = FUZZY_LIMIT, threshold: float = FUZZY_THRESHOLD) -> List[tuple]:
+        """
+        Find clues with similar text using the Dice coefficient of their trigrams.
+
+        :return: List of (score, id) tuples ordered by descending score
+        """
+        if not self.rows:
+            return []
+        query_trigrams = trigrams(normalize(query))
+        scores = 2 * self._count_shared(query_trigrams) / (len(query_trigrams) + self._trigram_counts)
+        clue_ids = np.flatnonzero(scores >= threshold)
+        # Stable sort keeps the clues with equal scores in table order
+        clue_ids = clue_ids[np.argsort(-scores[clue_ids], kind="stable")][:limit]
+        return [(float(scores[clue_id]), int(clue_id)) for clue_id in clue_ids]
+
+    def search(self, query: str, fuzzy_limit: int = FUZZY_LIMIT) -> List[ClueMatch]:
+        """
+        Search clues the same way the database queries did and fall back to looser matching if nothing was found. An
+        exact match is returned alone. Otherwise all prefix matches are returned followed by the other clues that
+        contain the query. Fuzzy matches are searched only if nothing else matched.
+
+        :param query: Any size of word or partial word
+        :param fuzzy_limit: Maximum amount of fuzzy matches to return
+        :return: List of matches ranked from best to worst
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        exact_ids = self.exact(query)
+        if exact_ids:
+            return [ClueMatch(EXACT, 1.0, self.rows[clue_id]) for clue_id in exact_ids]
+
+        matches = []
+        prefix_ids = self.prefix(query)
+        for clue_id in prefix_ids:
+            matches.append(ClueMatch(PREFIX, len(query) / len(self.keys[clue_id]), self.rows[clue_id]))
+        prefix_ids = set(prefix_ids)
+        for clue_id in self.substring(query):
+            if clue_id not in prefix_ids:
+                matches.append(ClueMatch(SUBSTRING, len(query) / len(self.keys[clue_id]), self.rows[clue_id]))
+        if matches:
+            matches.sort(key=lambda match: (match.kind, -match.score))
+            return matches
+
+        return [ClueMatch(FUZZY, score, self.rows[clue_id]) for score, clue_id in self.fuzzy(query, fuzzy_limit)]
+
+
+class ClueSolver:
+    """
+    Indexes of all clue tables. The tables are loaded from the database on first use and can be reloaded with
+    refresh() after the tables have been changed.
+    """
+
+    def __init__(self):
+        self.indexes = {table: ClueIndex() for table in CLUE_TABLES}
+        self.loaded_at = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, db) -> Dict[str, int]:
+        """
+        Reload all clue tables from the database. The indexes are built in a thread, so that the event loop isn't
+        blocked, and the old indexes are used until the new ones are ready.
+
+        :param db: ConnectionPool
+        :return: Amount of clues loaded per table
+        """
+        tables = list(CLUE_TABLES)
+        results = await asyncio.gather(*[db.fetchall(CLUE_TABLES[table]) for table in tables])
+        loop = asyncio.get_event_loop()
+        indexes = await asyncio.gather(*[loop.run_in_executor(None, ClueIndex, rows) for rows in results])
+        self.indexes = dict(zip(tables, indexes))
+        self.loaded_at = time.time()
+        return {table: len(index) for table, index in self.indexes.items()}
+
+    async def ensure_loaded(self, db):
+        async with self._lock:
+            if self.loaded_at is None:
+                await self.refresh(db)
+
+    async def search(self, db, table: str, query: str) -> List[ClueMatch]:
+        """
+        :param db: ConnectionPool used if the tables are not loaded yet
+        :param table: One of CLUE_TABLES
+        :param query: Any size of word or partial word
+        :return: List of matches ranked from best to worst
+        """
+        if self.loaded_at is None:
+            await self.ensure_loaded(db)
+        return self.indexes[table].search(query)
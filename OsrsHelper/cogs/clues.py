@@ -23,7 +23,8 @@ SOFTWARE.
 """
 
 from discord.ext import commands
-import json
+
+from OsrsHelper import clueindex
 
 
 class ClueCog(commands.Cog):
@@ -33,6 +34,13 @@ class ClueCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.clue_solver = clueindex.ClueSolver()
+
+    async def warm_up(self):
+        """
+        Load the clue indexes from the database. Called in the background after login.
+        """
+        await self.clue_solver.ensure_loaded(self.bot.db)
 
     @staticmethod
     async def parse_cluedata(results: tuple) -> list:
@@ -58,27 +66,39 @@ class ClueCog(commands.Cog):
             result = matches
         return result
 
+    @staticmethod
+    def format_suggestions(clue_type: str, matches: list) -> str:
+        """
+        Make a message of fuzzy matches for a search that had no exact, partial or substring matches.
+
+        :param clue_type: Plural name of the clue type
+        :param matches: List of ClueMatch
+        :return: Message to send to discord
+        """
+        suggestions = "\n".join(match.row[0] for match in matches)
+        return f"Could not find any {clue_type} with your search. Did you mean:\n{suggestions}"
+
     @commands.command(name="anagram")
     async def get_anagram(self, ctx, *, search):
         """
-        Search for an anagram from database. Search term is compared to all anagrams in the database with similar
-        start. In case of only one match, a full solution will be sent to discord. If multiple anagrams are found, send
-        a list of matches into discord.
+        Search for an anagram from the clue index. Search term is compared to all anagrams with similar start or
+        containing it, and to similarly spelled anagrams if neither is found. In case of only one match, a full solution
+        will be sent to discord. If multiple anagrams are found, send a list of matches into discord.
 
         :param ctx:
         :param search: Any size of word or partial word to be used as a search term
         """
 
-        self.bot.cursor.execute("SELECT * FROM anagrams WHERE ANAGRAM = %s;", [search])
-        results = self.bot.cursor.fetchall()
-        if not results:
-            self.bot.cursor.execute("SELECT * FROM anagrams WHERE ANAGRAM LIKE %s;", [search + '%'])
-            results = self.bot.cursor.fetchall()
+        matches = await self.clue_solver.search(self.bot.db, "anagrams", search)
+        results = [match.row for match in matches]
         matchlist = await self.parse_cluedata(results)
 
-        if len(results) == 1:
-            await ctx.send(f"Solution: {matchlist[0]}\nLocation: {matchlist[1]}\nChallenge answer: {matchlist[2]}\n"
-                           f"{matchlist[3]}")
+        if len(matches) > 1 and matches[0].kind == clueindex.FUZZY:
+            await ctx.send(self.format_suggestions("anagrams", matches))
+        elif len(results) == 1:
+            closest = f"Closest match: {results[0][0]}\n" if matches[0].kind == clueindex.FUZZY else ""
+            await ctx.send(f"{closest}Solution: {matchlist[0]}\nLocation: {matchlist[1]}\n"
+                           f"Challenge answer: {matchlist[2]}\n{matchlist[3]}")
         elif not results:
             await ctx.send("Could not find any anagrams with your search.")
         elif len(matchlist) > 15:
@@ -91,24 +111,24 @@ class ClueCog(commands.Cog):
     @commands.command(name="cipher")
     async def get_cipher(self, ctx, *, search):
         """
-        Search for a cipher from database. Search term is compared to all ciphers in the database with similar
-        start. In case of only one match, a full solution will be sent to discord. If multiple ciphers are found, send
-        a list of matches into discord.
+        Search for a cipher from the clue index. Search term is compared to all ciphers with similar start or
+        containing it, and to similarly spelled ciphers if neither is found. In case of only one match, a full solution
+        will be sent to discord. If multiple ciphers are found, send a list of matches into discord.
 
         :param ctx:
         :param search: Any size of word or partial word to be used as a search term
         """
 
-        self.bot.cursor.execute("SELECT * FROM ciphers WHERE CIPHER = %s;", [search])
-        results = self.bot.cursor.fetchall()
-        if not results:
-            self.bot.cursor.execute("SELECT * FROM ciphers WHERE CIPHER LIKE %s;", [search + '%'])
-            results = self.bot.cursor.fetchall()
+        matches = await self.clue_solver.search(self.bot.db, "ciphers", search)
+        results = [match.row for match in matches]
         matchlist = await self.parse_cluedata(results)
 
-        if len(results) == 1:
-            await ctx.send(f"Solution: {matchlist[0]}\nLocation: {matchlist[1]}\nChallenge answer: {matchlist[2]}\n"
-                           f"{matchlist[3]}")
+        if len(matches) > 1 and matches[0].kind == clueindex.FUZZY:
+            await ctx.send(self.format_suggestions("ciphers", matches))
+        elif len(results) == 1:
+            closest = f"Closest match: {results[0][0]}\n" if matches[0].kind == clueindex.FUZZY else ""
+            await ctx.send(f"{closest}Solution: {matchlist[0]}\nLocation: {matchlist[1]}\n"
+                           f"Challenge answer: {matchlist[2]}\n{matchlist[3]}")
         elif not results:
             await ctx.send("Could not find any ciphers with your search.")
         elif len(matchlist) > 15:
@@ -121,23 +141,26 @@ class ClueCog(commands.Cog):
     @commands.command(name="cryptic")
     async def get_cryptic(self, ctx, *, search):
         """
-        Search for a cryptic clue from database. Search term is compared to all cryptics in the database with similar
-        start. In case of only one match, a full solution will be sent to discord.
+        Search for a cryptic clue from the clue index. Search term is compared to all cryptics with similar start or
+        containing it, and to similarly spelled cryptics if neither is found. In case of only one match, a full
+        solution will be sent to discord.
 
         :param ctx:
         :param search: Any size of word or partial word to be used as a search term
         """
 
-        self.bot.cursor.execute("SELECT SOLUTION, IMAGE FROM cryptics WHERE CRYPTIC LIKE %s;", [search + '%'])
-        results = self.bot.cursor.fetchall()
-        if not results:
+        matches = await self.clue_solver.search(self.bot.db, "cryptics", search)
+        if not matches:
             await ctx.send("Could not find any cryptic clues with your search.")
-        elif len(results) == 1:
-            solution = results[0][0]
-            image = results[0][1]
-            await ctx.send(f"{solution}\n{image}")
+        elif len(matches) == 1:
+            closest = f"Closest match: {matches[0].row[0]}\n" if matches[0].kind == clueindex.FUZZY else ""
+            solution = matches[0].row[1]
+            image = matches[0].row[2]
+            await ctx.send(f"{closest}{solution}\n{image}")
+        elif matches[0].kind == clueindex.FUZZY:
+            await ctx.send(self.format_suggestions("cryptic clues", matches))
         else:
-            await ctx.send(f"Found {len(results)} cryptic clues with your search. Try to give more accurate search "
+            await ctx.send(f"Found {len(matches)} cryptic clues with your search. Try to give more accurate search "
                            f"term.")
 
     @commands.command(name="puzzle")
@@ -158,15 +181,25 @@ class ClueCog(commands.Cog):
             puzzle_name = "gnome child"
 
         try:
-            with open("resources\\solved_puzzles.json") as puzzle_file:
-                puzzle_links = json.load(puzzle_file)
-            puzzle_link = puzzle_links[puzzle_name]
+            puzzle_link = self.bot.resources.solved_puzzles[puzzle_name]
             message = puzzle_link
         except KeyError:
             message = "Couldn't find any puzzles with your search."
 
         await ctx.send(message)
 
+    @commands.command(name="refreshclues")
+    @commands.is_owner()
+    async def refresh_clues(self, ctx):
+        """
+        Reload the anagram, cipher and cryptic clue indexes from the database after the tables have been changed.
+
+        :param ctx:
+        """
+        counts = await self.clue_solver.refresh(self.bot.db)
+        counts_formatted = "\n".join(f"{table}: {count}" for table, count in counts.items())
+        await ctx.send(f"```{counts_formatted}```")
+
     @commands.command(aliases=["map"])
     async def maps(self, ctx):
         """
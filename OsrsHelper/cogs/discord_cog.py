@@ -113,6 +113,85 @@ class DiscordCog(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @commands.command(name="cachestats")
+    @commands.is_owner()
+    async def get_cache_stats(self, ctx):
+        """
+        Send the counters of the shared HTTP fetcher to see how many upstream requests the cache has saved, and the
+        circuit breaker state and latency of every upstream host.
+
+        :param ctx:
+        """
+        stats = self.bot.fetcher.stats()
+        saved = stats["hits"] + stats["stale_hits"] + stats["coalesced"]
+        stats_formatted = "\n".join(f"{key}: {value:,}" for key, value in stats.items())
+        circuits = []
+        for host, breaker in sorted(self.bot.fetcher.breakers.items()):
+            p95 = breaker.latency_quantile(0.95)
+            p95_formatted = "-" if p95 is None else f"{p95 * 1000:.0f} ms"
+            circuits.append(f"{host}: {breaker.state}, p95 {p95_formatted}, timeout {breaker.get_timeout(5):.1f} s, "
+                            f"opened {breaker.counters['opened']} times")
+        circuits_formatted = "\n".join(circuits) or "No upstream requests yet"
+
+        await ctx.send(f"```{stats_formatted}\n\nUpstream requests saved: {saved:,}```".replace(",", " ") +
+                       f"```{circuits_formatted}```")
+
+    @commands.command(name="perf")
+    @commands.is_owner()
+    async def get_performance(self, ctx):
+        """
+        Send the slowest commands and spans by their total time, the event loop lag and the most common errors since
+        the bot was started.
+
+        :param ctx:
+        """
+        registry = self.bot.metrics
+        headers = ["", "count", "mean ms", "p50 ms", "p95 ms", "max ms"]
+
+        def make_table(rows):
+            rows = [[row[0], row[1]] + [round(value * 1000, 1) for value in row[2:]] for row in rows[:8]]
+            # Imported on first use, so that it isn't imported during the startup
+            from tabulate import tabulate
+            return tabulate(rows, headers=headers, tablefmt="orgtbl")
+
+        commands_table = make_table(registry.summary("command_duration_seconds", "command"))
+        spans_table = make_table(registry.summary("span_duration_seconds", "span", "target"))
+        lag = registry.get_histograms("event_loop_lag_seconds").get(())
+        lag_formatted = "no samples" if lag is None else \
+            f"p95 {lag.quantile(0.95) * 1000:.1f} ms, max {lag.max * 1000:.1f} ms"
+
+        errors = list(registry.get_counters("command_errors_total").items())
+        errors += registry.get_counters("span_errors_total").items()
+        errors.sort(key=lambda error: -error[1])
+        errors_formatted = "\n".join(f"{' '.join(value for _, value in labels)}: {count}"
+                                     for labels, count in errors[:5]) or "none"
+
+        await ctx.send(f"```Commands\n{commands_table}\n\nSpans\n{spans_table}\n\nEvent loop lag: {lag_formatted}"
+                       f"\n\nErrors\n{errors_formatted}```")
+
+    @commands.command(name="watchdog")
+    @commands.is_owner()
+    async def toggle_watchdog(self, ctx, state: str = None):
+        """
+        Start or stop the event loop watchdog, or send its state and the latest blocks it has detected.
+
+        :param ctx:
+        :param state: "on" or "off" to start or stop the watchdog. Without it the state is sent.
+        """
+        loop_watchdog = self.bot.watchdog
+        if state == "on":
+            loop_watchdog.start()
+        elif state == "off":
+            loop_watchdog.stop()
+        elif state is not None:
+            await ctx.send("Give either 'on' or 'off'.")
+            return
+
+        status_formatted = "\n".join(f"{key}: {value}" for key, value in loop_watchdog.status().items())
+        reports = "\n".join(f"{report.started_at:%Y-%m-%d %H:%M:%S} {report.duration * 1000:.0f} ms {report.blamed}"
+                            for report in loop_watchdog.latest_reports())
+        await ctx.send(f"```{status_formatted}\n\n{reports or 'No blocks detected'}```")
+
 
 def setup(bot):
     bot.add_cog(DiscordCog(bot))
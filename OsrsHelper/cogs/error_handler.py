@@ -49,6 +49,9 @@ class CommandErrorHandler(commands.Cog):
         # MissingRequiredArgument should be raised only when user doesn't give any input to command when needed
         ignored = (commands.CommandNotFound, commands.MissingRequiredArgument)
         error = getattr(error, "original", error)
+        if ctx.command is not None:
+            self.bot.metrics.increment("command_errors_total", (("command", ctx.command.qualified_name),
+                                                                ("error", type(error).__name__)))
 
         if isinstance(error, ignored):
             return
@@ -65,6 +68,14 @@ class CommandErrorHandler(commands.Cog):
             except:
                 pass
 
+        elif isinstance(error, commands.NotOwner):
+            await ctx.send(f"Only the owner of the bot can use {ctx.command}.")
+            return
+
+        elif isinstance(error, commands.MissingPermissions):
+            await ctx.send(f"You need the permissions {', '.join(error.missing_perms)} to use {ctx.command}.")
+            return
+
         # Will be raised if user gives amount of kills that is inconvertible to int in command 'loot'.
         elif isinstance(error, commands.UserInputError):
             if ctx.command.name == "loot":
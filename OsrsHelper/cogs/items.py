@@ -24,9 +24,16 @@ SOFTWARE.
 
 from discord.ext import commands
 import discord
-import datetime
-import json
 import asyncio
+import io
+from typing import Optional, Tuple
+
+from OsrsHelper import htmlparse, itemindex, metrics, priceanalytics, prices
+
+# Maximum amount of items in one 'prices' command to keep the message under the Discord message length limit
+MAX_PRICE_ITEMS = 30
+# Amount of price charts kept in memory. A chart is over a hundred kilobytes, unlike the other analytics.
+CHART_CACHE_SIZE = 32
 
 
 class ItemsCog(commands.Cog):
@@ -36,76 +43,76 @@ class ItemsCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.price_store = prices.PriceStore(bot.db, bot.fetcher)
+        # Other shard workers fetch the prices when they are needed, mostly from the shared cache
+        if bot.primary:
+            self.price_store.start()
+        self.analytics_cache = priceanalytics.DailyCache()
+        # Charts have their own cache, so that a burst of charts doesn't evict the analytics of every other item
+        self.chart_cache = priceanalytics.DailyCache(max_size=CHART_CACHE_SIZE)
+        # Charts are drawn in a separate process so that matplotlib doesn't block the event loop
+        self._chart_executor = None
+
+    def cog_unload(self):
+        self.price_store.stop()
+        if self._chart_executor is not None:
+            self._chart_executor.shutdown(wait=False)
+
+    async def warm_up(self):
+        """
+        Load the tradeable items and item keys into the item index. Called in the background after login.
+        """
+        await self.price_store.ensure_tradeables()
+
+    async def get_price_history(self, ctx, item_name: str) -> Optional[Tuple[str, prices.PriceHistory]]:
+        """
+        Find an item and its price history. If either can't be found, the reason is sent to discord.
+
+        :param ctx:
+        :param item_name: Item name, item key or a search similar enough to only one item name
+        :return: The correctly capitalized item name and its price history, or None if either was not found
+        """
+        result = await self.price_store.find_item(item_name)
+        if not result:
+            suggestions = await self.price_store.suggest_items(item_name)
+            if suggestions:
+                await ctx.send("Could not find any items with your search. Did you mean:\n" + "\n".join(suggestions))
+            else:
+                await ctx.send("Could not find any items with your search.")
+            return None
+        item_name, item_id = result
 
-    async def visit_website(self, link: str, encoding: str = "utf-8", timeout: int = 5):
         try:
-            async with self.bot.aiohttp_session.get(link, timeout=timeout) as r:
-                resp = await r.text(encoding=encoding)
-            return resp
+            price_history = await self.price_store.get_history(item_id)
         except asyncio.TimeoutError:
-            # Return None if TimeoutError occurs
+            await ctx.send("Osrs API answers too slowly. Try again later.")
             return None
+        return item_name, price_history
 
     @commands.command(name="price", aliases=["pricechange"])
     async def get_tradeable_price(self, ctx, *, price_search):
-        api_link = "https://services.runescape.com/m=itemdb_oldschool/api/graph/{id}.json"
-
         # Check if user gave a multiplier
-        if "*" in price_search:
-            price_search = price_search.replace(" * ", "*").split("*")
-            item_name = price_search[0]
-            multiplier = price_search[1]
-
-            # Check the multiplier for abbreviations 'k' and 'm'
-            try:
-                if multiplier[-1] == "k":
-                    multiplier = int(multiplier[:-1]) * 1000
-                elif multiplier[-1] == "m":
-                    multiplier = int(multiplier[:-1]) * 1000000
-                else:
-                    multiplier = int(multiplier)
-                if multiplier < 1:
-                    raise ValueError
-            except ValueError:
-                await ctx.send("Multiplier was in unsupported format. It must be a positive integer, and only "
-                               "abbreviations `k` and `m` are supported.")
-                return
-        else:
-            item_name = price_search
-            multiplier = 1
-
-        self.bot.cursor.execute("""SELECT * FROM tradeables WHERE NAME = %s;""", [item_name])
-        result = self.bot.cursor.fetchone()
-        if not result:
-            await ctx.send("Could not find any items with your search.")
-            return
-        item_name = result[0]
-        item_id = result[1]
-
         try:
-            price_data = json.loads(await self.visit_website(api_link.format(id=item_id)))
-        except TypeError:
-            await ctx.send("Osrs API answers too slowly. Try again later.")
+            item_name, multiplier = prices.split_quantity(price_search)
+        except ValueError:
+            await ctx.send("Multiplier was in unsupported format. It must be a positive integer, and only "
+                           "abbreviations `k` and `m` are supported.")
             return
 
-        daily_data = price_data["daily"]
-
-        # Timestamps to get the item prices from Osrs APIs data
-        timestamps = list(daily_data.keys())
-        latest_ts = timestamps[-1]
-        day_ts = timestamps[-2]
-        week_ts = timestamps[-8]
-        month_ts = timestamps[-31]
+        result = await self.get_price_history(ctx, item_name)
+        if result is None:
+            return
+        item_name, price_history = result
 
-        latest_price = daily_data[latest_ts]
+        latest_price = price_history.latest_price
         price_total = "{:,}".format(latest_price * multiplier).replace(",", " ")
         latest_price_formatted = "{:,}".format(latest_price).replace(",", " ")
 
         # Price differences between the latest price and prices day, week and month ago. Format them so that the sign
         # is always shown and thousands are separated by spaces.
-        diff_day = "{:+,}".format(latest_price - daily_data[day_ts]).replace(",", " ")
-        diff_week = "{:+,}".format(latest_price - daily_data[week_ts]).replace(",", " ")
-        diff_month = "{:+,}".format(latest_price - daily_data[month_ts]).replace(",", " ")
+        diff_day = "{:+,}".format(price_history.price_change(1)).replace(",", " ")
+        diff_week = "{:+,}".format(price_history.price_change(7)).replace(",", " ")
+        diff_month = "{:+,}".format(price_history.price_change(30)).replace(",", " ")
 
         if multiplier != 1:
             title = f"{item_name} ({multiplier} pcs)"
@@ -114,17 +121,184 @@ class ItemsCog(commands.Cog):
             title = item_name
             item_price = f"{latest_price_formatted} gp"
 
-        # Convert latest timestamp to date. The timestamp is in milliseconds so divide it by 1000 to convert it to
-        # seconds
-        latest_ts_date = datetime.datetime.utcfromtimestamp(int(latest_ts) / 1e3)
-
         embed = discord.Embed(title=title).add_field(name="Latest price", value=item_price) \
             .add_field(name="Price changes", value=f"In a day: {diff_day} gp\nIn a week: {diff_week} gp\n"
                                                    f"In a month: {diff_month} gp", inline=False) \
-            .set_footer(text=f"Latest price from {latest_ts_date} UTC")
+            .set_footer(text=f"Latest price from {price_history.latest_date} UTC")
 
         await ctx.send(embed=embed)
 
+    @commands.command(name="prices")
+    async def get_tradeable_prices(self, ctx, *, price_searches):
+        """
+        Get the total price of many items at once, e.g. a whole loadout. Items are separated with commas and can have
+        a multiplier in the same format as in command 'price'.
+
+        :param ctx:
+        :param price_searches: Comma separated item names, e.g. "abyssal whip, rune pouch, shark * 20"
+        """
+        searches = [search for search in price_searches.split(",") if search.strip()]
+        if len(searches) > MAX_PRICE_ITEMS:
+            await ctx.send(f"Only up to {MAX_PRICE_ITEMS} items can be priced at once.")
+            return
+
+        items = []
+        not_found = []
+        for search in searches:
+            try:
+                item_name, multiplier = prices.split_quantity(search)
+            except ValueError:
+                await ctx.send(f"Multiplier of `{search.strip()}` was in unsupported format. It must be a positive "
+                               f"integer, and only abbreviations `k` and `m` are supported.")
+                return
+            result = await self.price_store.find_item(item_name)
+            if result:
+                items.append((result[0], result[1], multiplier))
+            else:
+                not_found.append(item_name)
+
+        price_histories = await self.price_store.get_histories(item_id for _, item_id, _ in items)
+        rows = []
+        total = 0
+        unavailable = []
+        for item_name, item_id, multiplier in items:
+            price_history = price_histories[item_id]
+            if price_history is None:
+                unavailable.append(item_name)
+                continue
+            item_total = price_history.latest_price * multiplier
+            total += item_total
+            rows.append([item_name, f"{multiplier:,}", f"{price_history.latest_price:,}", f"{item_total:,}"])
+
+        message = ""
+        if rows:
+            # Imported on first use, so that it isn't imported during the startup
+            from tabulate import tabulate
+            table = tabulate(rows, tablefmt="orgtbl", headers=["Item", "Pcs", "Each", "Total"])
+            message = f"```{table}\n\nTotal: {total:,} gp```".replace(",", " ")
+        if not_found:
+            message += f"Could not find items: {', '.join(not_found)}\n"
+        if unavailable:
+            message += f"Osrs API answers too slowly for items: {', '.join(unavailable)}\n"
+        await ctx.send(message or "Give at least one item to price.")
+
+    @commands.command(name="pricestats")
+    async def get_price_stats(self, ctx, *, item_name):
+        """
+        Get statistics of the price history of an item: price changes, moving averages, minimum and maximum prices,
+        volatility and trend.
+
+        :param ctx:
+        :param item_name: Item name, item key or a search similar enough to only one item name
+        """
+        result = await self.get_price_history(ctx, item_name)
+        if result is None:
+            return
+        item_name, price_history = result
+        analytics = self.analytics_cache.get_analytics(price_history)
+
+        changes = "\n".join(f"{period.capitalize()}: {change:+,} gp ({percentage:+.1f}%)"
+                            for period, (change, percentage) in analytics.changes.items())
+        moving_averages = "\n".join(f"{window} days: {average:,.0f} gp"
+                                    for window, average in analytics.moving_averages.items())
+        ranges = f"{priceanalytics.RECENT_DAYS} days: {analytics.recent_min:,} - {analytics.recent_max:,} gp\n" \
+                 f"{len(price_history)} days: {analytics.all_time_min:,} - {analytics.all_time_max:,} gp"
+        trend = f"Volatility: {analytics.volatility:.2f}% per day\nTrend: {analytics.trend:+.2f}% per day"
+
+        embed = discord.Embed(title=item_name) \
+            .add_field(name="Latest price", value=f"{analytics.latest_price:,} gp") \
+            .add_field(name="Average price", value=f"{analytics.latest_average:,} gp") \
+            .add_field(name="Price changes", value=changes.replace(",", " "), inline=False) \
+            .add_field(name="Moving averages", value=moving_averages.replace(",", " ")) \
+            .add_field(name="Price range", value=ranges.replace(",", " ")) \
+            .add_field(name=f"Past {priceanalytics.RECENT_DAYS} days", value=trend, inline=False) \
+            .set_footer(text=f"Latest price from {analytics.latest_date} UTC")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="pricechart")
+    async def get_price_chart(self, ctx, *, item_name):
+        """
+        Get a chart of the daily and average prices and moving averages of an item.
+
+        :param ctx:
+        :param item_name: Item name, item key or a search similar enough to only one item name
+        """
+        result = await self.get_price_history(ctx, item_name)
+        if result is None:
+            return
+        item_name, price_history = result
+
+        key = self.chart_cache.make_key("chart", price_history)
+        chart = self.chart_cache.get(key)
+        if chart is None:
+            if self._chart_executor is None:
+                self._chart_executor = htmlparse.create_process_pool(max_workers=1)
+            try:
+                with metrics.span("render", "pricechart"):
+                    chart = await asyncio.get_event_loop().run_in_executor(
+                        self._chart_executor, priceanalytics.render_chart, item_name, price_history.days,
+                        price_history.daily, price_history.average)
+            except ImportError:
+                await ctx.send("Price charts are not available, because matplotlib is not installed.")
+                return
+            self.chart_cache.put(key, chart)
+
+        await ctx.send(file=discord.File(io.BytesIO(chart), filename="pricechart.png"))
+
+    @commands.command(name="addkey")
+    @commands.is_owner()
+    async def add_item_key(self, ctx, *, key_and_item):
+        """
+        Add a key that can be used instead of an item name in price commands. Keys are shared by all servers, so only
+        the bot owner can manage them.
+
+        :param ctx:
+        :param key_and_item: Key and the full item name separated by comma, e.g. "whip, abyssal whip"
+        """
+        if "," not in key_and_item:
+            await ctx.send("Give the key and the item name separated by comma, e.g. `!addkey whip, abyssal whip`.")
+            return
+        item_key, item_name = (part.strip() for part in key_and_item.split(",", 1))
+
+        await self.price_store.load_tradeables()
+        item_index = self.price_store.item_index
+        item = item_index.get_item(item_name)
+        if not item_key or item is None:
+            await ctx.send("Could not find an item with that name. Give the full name of the item.")
+        elif item_index.get_item(item_key) is not None or itemindex.normalize(item_key) in item_index.item_keys:
+            await ctx.send(f"`{item_key}` is already an item name or a key.")
+        else:
+            await itemindex.add_item_key(self.bot.db, item_key, item.name)
+            await self.price_store.load_tradeables()
+            await ctx.send(f"Added key `{itemindex.normalize(item_key)}` for {item.name}.")
+
+    @commands.command(name="removekey")
+    @commands.is_owner()
+    async def remove_item_key(self, ctx, *, item_key):
+        """
+        Remove a key added with command 'addkey'.
+
+        :param ctx:
+        :param item_key: The key to remove
+        """
+        if await itemindex.remove_item_key(self.bot.db, item_key):
+            await self.price_store.load_tradeables()
+            await ctx.send(f"Removed key `{itemindex.normalize(item_key)}`.")
+        else:
+            await ctx.send("Could not find such key.")
+
+    @commands.command(name="pricestatus")
+    @commands.is_owner()
+    async def get_price_status(self, ctx):
+        """
+        Send the progress of the background GE price ingest.
+
+        :param ctx:
+        """
+        progress = self.price_store.progress()
+        progress_formatted = "\n".join(f"{key}: {value}" for key, value in progress.items())
+        await ctx.send(f"```{progress_formatted}```")
+
 
 def setup(bot):
     bot.add_cog(ItemsCog(bot))
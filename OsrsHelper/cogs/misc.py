@@ -24,7 +24,6 @@ SOFTWARE.
 
 import discord
 from discord.ext import commands
-import json
 import datetime
 import typing
 
@@ -49,8 +48,7 @@ class MiscCog(commands.Cog):
         :param month: (optional) Month name when searching for something else than current month. The default value is
         current month as an int.
         """
-        with open("resources\\harvest_seasons_fi.json", encoding="utf-8-sig") as data_file:
-            data = json.load(data_file)
+        data = self.bot.resources.harvest_seasons
 
         months_fi = ["tammikuu", "helmikuu", "maaliskuu", "huhtikuu", "toukokuu", "kesäkuu", "heinäkuu", "elokuu",
                      "syyskuu", "lokakuu", "marraskuu", "joulukuu"]
@@ -22,17 +22,27 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import math
 from discord.ext import commands
-from tabulate import tabulate
 import datetime
 import json
-import numpy as np
-from bs4 import BeautifulSoup
 import discord
-import fractions
-from typing import Union
 import asyncio
+import functools
+from typing import List
+from OsrsHelper import experience, highscores, loot, metrics, prices, scoretable, snapshots, wikiindex
+from OsrsHelper.ehp import ACCOUNT_TYPE_TABLES, get_calculator as get_ehp_calculator
+from OsrsHelper.gains import compute_gains
+from OsrsHelper.htmlparse import NewsArticle
+from OsrsHelper.news import NewsPoller
+from OsrsHelper.registry import SkillEhp
+from OsrsHelper.tracker import TrackingScheduler
+
+# Prefixes of the aliases of commands 'stats' and 'compare', and the account types whose highscores they search
+ACCOUNT_TYPE_PREFIXES = {"iron": "ironman", "uim": "uim", "hc": "hcim", "dmm": "dmm", "season": "seasonal",
+                         "seasonal": "seasonal", "tournament": "tournament"}
+# Maximum amount of usernames in one command 'stats', and how many of their highscores are fetched at the same time
+MAX_BULK_USERNAMES = 25
+BULK_CONCURRENCY = 5
 
 
 class OsrsCog(commands.Cog):
@@ -43,314 +53,223 @@ class OsrsCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-
-    @staticmethod
-    async def format_scoretable(scorelist: list, gains: bool) -> list:
+        # The refreshes bypass the cache, so that they don't evict the responses that the commands reuse
+        self.tracking_scheduler = TrackingScheduler(bot.db, functools.partial(highscores.get_highscores_data,
+                                                                              bot.fetcher, use_cache=False))
+        if bot.primary:
+            self.tracking_scheduler.start()
+        # Only the primary worker polls the homepage. The other workers read the articles from the shared cache.
+        self.news_poller = NewsPoller(bot.db, bot.fetcher, bot.html_parser.news_articles, self.send_news,
+                                      shared_cache=bot.fetcher.shared_cache, leader=bot.primary)
+        if bot.primary or bot.fetcher.shared_cache is not None:
+            self.news_poller.start()
+        self.wiki_index = None
+
+    def cog_unload(self):
+        self.tracking_scheduler.stop()
+        self.news_poller.stop()
+
+    async def warm_up(self):
+        """
+        Build the ehp calculators and load the wiki title index. Called in the background after login.
         """
-        Format the scorelist so the scorelist values have thousands separated with comma.
+        for ehp_table in self.bot.resources.ehp:
+            get_ehp_calculator(self.bot.resources, ehp_table)
+        await self.load_wiki_index()
 
-        :param scorelist: List of lists which values can be converted to int
-        :param gains: Boolean parameter to determine if positive values should have plus sign
-        :return: List of lists which values are separated by comma and positive values have visible plus
-                 sign (if gains=True)
+    async def load_wiki_index(self) -> int:
         """
+        Load the wiki titles dump from the resources directory in a thread. Command 'wiki' visits the wiki for every
+        search until the index is loaded, or if there is no dump.
 
-        for index, list_ in enumerate(scorelist):
-            for index2, value in enumerate(list_):
-                if gains and value > 0:
-                    separated = f"{value:+,}"
-                else:
-                    value = int(value)
-                    separated = f"{value:,}"
-                scorelist[index][index2] = separated
-        return scorelist
+        :return: Amount of pages in the index
+        """
+        path = wikiindex.find_titles_file(self.bot.resources.directory)
+        if path is None:
+            self.wiki_index = None
+            return 0
+        self.wiki_index = await asyncio.get_event_loop().run_in_executor(None, wikiindex.WikiIndex.load, path)
+        return len(self.wiki_index)
 
     @staticmethod
-    async def make_scoretable(highscores_data: list, username: str, combat_level: int, gains: bool = False,
-                              old_savedate: str = None, new_savedate: str = None, account_type: str = "normal") -> str:
-        """
-        Takes a list of lists that has users' highscore data and uses tabulate to make it into table format.
-        Lists and sublists need to be in the same order as in Osrs official highscores and api
-        ([[Rank, Level, Xp], ...]). Sublist elements can be either str or int, as long as they consist of 2 or 3
-        elements (2 for mini games and 3 for skills).
-
-        :param highscores_data: Data returned by Osrs highscores api splitted into list of lists
-        :param username: Username of the account whose highscores are being handled
-        :param combat_level: Combat level of the user whose score table will be made
-        :param gains: Boolean parameter to determine the table header and behaviour of separate_thousands
-        :param old_savedate: A date when user stats were last saved into database. Only needed when gains = True
-        :param new_savedate: A date when user new stats are compared to old ones. Only needed when gains = True
-        :param account_type: Account type which is shown in a table that the bot sends to Discord
-        :return: Skill and clue highscores combined inside of discord code block quotes
-        """
-
-        skill_headers = ["Total", "Attack", "Defence", "Strength", "Hitpoints", "Ranged", "Prayer", "Magic", "Cooking",
-                         "Woodcutting", "Fletching", "Fishing", "Firemaking", "Crafting", "Smithing", "Mining",
-                         "Herblore", "Agility", "Thieving", "Slayer", "Farming", "Runecrafting", "Hunter",
-                         "Construction"]
-        clue_headers = ["All", "Beginner", "Easy", "Medium", "Hard", "Elite", "Master"]
-        skills = highscores_data[:24]
-        clues = highscores_data[27:34]
-
-        # Separate thousands with comma in another static method.
-        await OsrsCog.format_scoretable(skills, gains=gains)
-        await OsrsCog.format_scoretable(clues, gains=gains)
-
-        # Insert row headers from above lists to highscores lists with corresponding indexes
-        for index, skill in enumerate(skills):
-            skill.insert(0, skill_headers[index])
-        for index, clue in enumerate(clues):
-            clue.insert(0, clue_headers[index])
-
-        skilltable = tabulate(skills, tablefmt="orgtbl", headers=["Skill", "Rank", "Level", "Xp"])
-        cluetable = tabulate(clues, tablefmt="orgtbl", headers=["Clue", "Rank", "Amount"])
-        if gains:
-            table_header = "{:^50}\n{:^50}\n{}".format(f"Gains for {username}",
-                                                       f"Account type: {account_type.capitalize()}",
-                                                       f"Between {old_savedate} - {new_savedate} UTC\n\n"
-                                                       f"Combat level: {combat_level:+}")
-        else:
-            # Show stats prefix only if account type is something else than normal
-            if account_type == "normal":
-                account_type = ""
-            table_header = "{:^65}".format(f"{account_type.capitalize()} Stats of {username}\n\n"
-                                           f"Combat level: {combat_level}")
-
-        scoretable = f"```{table_header}\n\n{skilltable}\n\n{cluetable}```"
-        return scoretable
+    def make_wiki_suggestions(search_results: list) -> discord.Embed:
+        """
+        :param search_results: List of (page title, href) tuples
+        :return: Embed with links to the pages
+        """
+        hyperlinks = []
+        # Discord cant handle links with ')' as a ending character properly so escape it if present
+        for page_title, href in search_results:
+            if href[-1] == ")":
+                href = href[:-1] + "\\)"
+            hyperlinks.append(f"[{page_title}]({wikiindex.WIKI_URL}{href})")
+        return discord.Embed(title="Did you mean some of these?", description="\n".join(hyperlinks))
 
     @staticmethod
-    async def make_ehp_list(ehp_rates: dict, experiences: Union[tuple, list]):
+    async def make_ehp_list(ehp_rates: SkillEhp):
         """
-        Convert a dictionary of ehp xp's and xp rates into a string with level and xp rates. String is returned so the
-        levels and rates are one below another
+        Convert ehp xp's and xp rates into a string with level and xp rates. String is returned so the levels and rates
+        are one below another
 
-        :param ehp_rates: Dictionary of ehp xp and rates in format {xp required: xph, ...}. Values can be either str or
-        int
-        :param experiences: Tuple or list of tuples that has all (level, xp) pairs for all levels
+        :param ehp_rates: Ehp xp thresholds and rates for one skill from the resource registry
         :return: String of 'minimum level: xph' pairs one below another
         """
 
         ehp_list = []
 
-        # Loop through whole dictionary for skill, convert required xp's to levels and append 'level: xph' pairs to list
-        for rate in ehp_rates.items():
-            ehp_xp_required = int(rate[0])
-            ehp_xph = rate[1]
+        # Loop through all thresholds for skill, convert required xp's to levels and append 'level: xph' pairs to list
+        for ehp_xp_required, ehp_xph in zip(ehp_rates.thresholds, ehp_rates.rates):
 
-            if ehp_xp_required == 200_000_000:
-                ehp_list.append(f"Lvl 127: {ehp_xph} xp/h")
+            if ehp_xp_required == experience.MAX_EXPERIENCE:
+                ehp_list.append(f"Lvl {experience.MAX_LEVEL}: {ehp_xph} xp/h")
                 break
 
-            # Convert ehp xp's required to levels by comparing them to levels in experiences tuple
-            # Closest level downwards is given
-            for experience_tuple in experiences:
-                level = experience_tuple[0]
-                level_xp_required = experience_tuple[1]
-                if level_xp_required > ehp_xp_required:
-                    ehp_lvl_required = int(level) - 1
-                    ehp_list.append(f"Lvl {ehp_lvl_required}+: {ehp_xph} xp/h")
-                    break
+            # Convert ehp xp's required to levels. Closest level downwards is given
+            ehp_lvl_required = experience.level_for_experience(ehp_xp_required)
+            ehp_list.append(f"Lvl {ehp_lvl_required}+: {ehp_xph} xp/h")
 
         return "\n".join(ehp_list)
 
-    async def visit_website(self, link: str, encoding: str = "utf-8", timeout: int = 5):
-        """
-        Visit given link to get its data for parsing purposes. asyncio.TimeoutError is raised if the host takes more
-        than 5 seconds to respond. This is to prevent too delayed bot messages.
-
-        :param link: A link that should be visited
-        :param encoding: Encoding in which the API or website will respond. In some cases it can be something else than
-        UTF-8
-        :param timeout: Amount of seconds that are waited before asyncio.TimeoutError is raised if no response is given
-        :raise Exception: Any exception that occurs during the GET (usually asyncio.TimeoutError after timeout)
-        :return: Html response in string format
-        """
-        async with self.bot.aiohttp_session.get(link, timeout=timeout) as r:
-            resp = await r.text(encoding=encoding)
-        return resp
-
-    async def get_highscores_data(self, username: str, account_type: str = "normal"):
-        """
-        Get highscore data for given user from official Old School Runescape api. The highscore type is based on given
-        account type prefix. The data inside sublists is in string format.
-
-        :param username: Username of the account whose highscores are wanted
-        :param account_type: Account type to determine the highscores and url type
-        :return: User highscore data as a list of lists which values are in str, user combat level as an int
-        """
-
-        def calculate_combat_level():
-            combat_skills = highscore_data[1:8]
-
-            # Calculate combat level
-            att_lvl = int(combat_skills[0][1])
-            def_lvl = int(combat_skills[1][1])
-            str_lvl = int(combat_skills[2][1])
-            hp_lvl = int(combat_skills[3][1])
-            ranged_lvl = int(combat_skills[4][1])
-            prayer_lvl = int(combat_skills[5][1])
-            magic_lvl = int(combat_skills[6][1])
-
-            base_combat = 0.25 * (def_lvl + hp_lvl + math.floor(prayer_lvl / 2))
-            melee_combat = 0.325 * (att_lvl + str_lvl)
-            ranged_combat = 0.325 * math.floor((3 / 2) * ranged_lvl)
-            magic_combat = 0.325 * math.floor((3 / 2) * magic_lvl)
-            final_combat = math.floor(base_combat + max([melee_combat, ranged_combat, magic_combat]))
-            return final_combat
-
-        if account_type == "normal":
-            header = "hiscore_oldschool"
-        elif account_type == "ironman":
-            header = "hiscore_oldschool_ironman"
-        elif account_type == "uim":
-            header = "hiscore_oldschool_ultimate"
-        elif account_type == "hcim":
-            header = "hiscore_oldschool_hardcore_ironman"
-        elif account_type == "dmm":
-            header = "hiscore_oldschool_deadman"
-        elif account_type == "seasonal":
-            header = "hiscore_oldschool_seasonal"
-        elif account_type == "tournament":
-            header = "hiscore_oldschool_tournament"
-        else:
-            raise TypeError(f"Invalid account type: {account_type}")
-
-        highscore_data = []
-        highscores_link = f"https://services.runescape.com/m={header}/index_lite.ws?player={username}"
-        raw_highscore_data = await self.visit_website(highscores_link)
-
-        if "<title>404 - Page not found</title>" in raw_highscore_data:
-            return None
-
-        # Appends into highscore_data in format [Rank, Level, xp] for skills and [Rank, Amount] for everything else.
-        # Data from Osrs api ends in \n
-        for datarow in raw_highscore_data.split("\n")[:-1]:
-            datarow = datarow.split(",")
-
-            # If user doesn't have any highscore entry for skill/clue its returned as -1 which looks ugly in final table
-            # Also it can't be something like "-" because that would cause an error when calculating gains
-            for index, value in enumerate(datarow):
-                if value == "-1":
-                    datarow[index] = "0"
-            highscore_data.append(datarow)
-
-        combat_level = calculate_combat_level()
-
-        return highscore_data, combat_level
-
-    @commands.command(name="ttm")
+    @commands.command(name="ttm", aliases=["ironttm", "skillerttm", "f2pttm"])
     async def check_ttm(self, ctx, *, username):
         """
-        Requests Crystalmathlabs api for a time to max for a given username. Response is in Efficient Hours Played.
+        Calculate the time to max (99 in every skill) and time to 200M experience in every skill for a given username
+        from its highscores. Times are in Efficient Hours Played, so the ehp rate table depends on the alias used to
+        invoke the command.
 
         :param ctx:
         :param username: Username of the account whose ttm is wanted
         :return:
         """
 
-        ttm_link = f"https://crystalmathlabs.com/tracker/api.php?type=ttm&player={username}"
+        invoked_with = ctx.invoked_with
+        if invoked_with == "ttm":
+            table, account_type = "ehp", "normal"
+        elif invoked_with == "ironttm":
+            table, account_type = "ehp_ironman", "ironman"
+        elif invoked_with == "skillerttm":
+            table, account_type = "ehp_skiller", "normal"
+        elif invoked_with == "f2pttm":
+            table, account_type = "ehp_f2p", "normal"
+        else:
+            return
+
         try:
-            ttm_response = await self.visit_website(ttm_link, encoding="utf-8-sig")
+            highscores_data, _ = await highscores.get_highscores_data(self.bot.fetcher, username,
+                                                                      account_type=account_type)
         except asyncio.TimeoutError:
-            await ctx.send("CML API answers too slowly. Try again later.")
-            return
-        ehp = ttm_response
-        msg = f"Ttm for {username}: {ehp} EHP"
-        if ehp == -1:
-            msg = "This username is not in use or it has not been updated in CML yet."
-        elif ehp == 0:
-            msg = "0 EHP (maxed)"
-        elif ehp == -2:
-            return
-        elif ehp == -4:
-            msg = "CML api is temporarily out of service due to heavy traffic on their sites."
-        await ctx.send(msg)
+            await ctx.send("Osrs highscores answer too slowly. Try again later.")
+            return
+        if not highscores_data:
+            await ctx.send("Could not find any highscores with that username.")
+            return
+
+        calculator = get_ehp_calculator(self.bot.resources, table)
+        skills_experience = [row[2] for row in highscores_data[:highscores.SKILL_ROWS]]
+        ttm = calculator.time_to_max(skills_experience)[0]
+        tt200m = calculator.time_to_200m(skills_experience)[0]
+        current_ehp = calculator.skill_hours(skills_experience)[0]
+        ehp_type = table.lstrip("ehp_").capitalize()  # This is empty for normal EHP rates
+
+        if ttm == 0:
+            msg = f"{ehp_type} Ttm for {username}: 0 EHP (maxed)"
+        else:
+            msg = f"{ehp_type} Ttm for {username}: {ttm:,.2f} EHP"
+        msg += f"\nTime to 200M all: {tt200m:,.2f} EHP\nCurrent EHP: {current_ehp:,.2f}"
+        await ctx.send(msg.replace(",", " ").strip())
 
     @commands.command(name="wiki")
     async def search_osrs_wiki(self, ctx, *, args):
         """
         Search official Oldschool Runescape wiki and returns a link if any page is found. If no page is found, try to
-        make list of "Did you mean" suggestions.
+        make list of "Did you mean" suggestions. Pages and redirects are searched from the wiki title index first.
+        Otherwise the wiki is visited, because the page may have been created after the titles dump, and the similar
+        pages of the index are suggested only if the wiki has no such page either.
 
         :param ctx:
         :param args: Page name/search term given by user
         """
 
+        # Answer from the wiki title index without visiting the wiki if the search is a page or a redirect
+        index_results = []
+        if self.wiki_index is not None:
+            page_title = self.wiki_index.find_page(args)
+            if page_title is not None:
+                await ctx.send(f"<{wikiindex.WIKI_URL}{wikiindex.page_href(page_title)}>")
+                return
+            index_results = [(title, wikiindex.page_href(title)) for title in self.wiki_index.suggest(args)]
+
         # Try to make a wiki link straight from words given by user
         page_name = "_".join(args.split())
-        base_link = "https://oldschool.runescape.wiki"
-        href = f"/w/{page_name}"
-        page_link = base_link + href
-        wiki_response = await self.visit_website(page_link)
-        if not wiki_response:
-            await ctx.send("Osrs wiki answers too slowly. Try again later.")
+        page_link = wikiindex.WIKI_URL + wikiindex.page_href(args)
+        try:
+            wiki_response = await self.bot.fetcher.visit_website(page_link)
+        except asyncio.TimeoutError:
+            if index_results:
+                await ctx.send(embed=self.make_wiki_suggestions(index_results))
+            else:
+                await ctx.send("Osrs wiki answers too slowly. Try again later.")
             return
 
+        page_missing = f"This page doesn&#039;t exist on the wiki. Maybe it should?" in wiki_response
+        # Similar pages of the index are as good as the suggestions of the wiki search
+        if page_missing and index_results:
+            await ctx.send(embed=self.make_wiki_suggestions(index_results))
+
         # If previous link doesn't have any wiki page, try manual search in wiki
-        if f"This page doesn&#039;t exist on the wiki. Maybe it should?" in wiki_response:
-            hyperlinks = []
-            wiki_search_link = f"https://oldschool.runescape.wiki/w/Special:Search?search={page_name}"
-            wiki_search_resp = await self.visit_website(wiki_search_link)
-            if not wiki_search_resp:
+        elif page_missing:
+            wiki_search_link = f"{wikiindex.WIKI_URL}/w/Special:Search?search={page_name}"
+            try:
+                wiki_search_resp = await self.bot.fetcher.visit_website(wiki_search_link)
+            except asyncio.TimeoutError:
                 await ctx.send("Osrs wiki answers too slowly. Try again later.")
                 return
 
-            # parse wiki search response and search for possible "did you mean" matches
-            search_resp_html = BeautifulSoup(wiki_search_resp, "html.parser")
-            search_resp_headings = search_resp_html.findAll("div", class_="mw-search-result-heading")
-            if len(search_resp_headings) == 0:
+            # Parse the "did you mean" matches of wiki search response in a worker
+            search_results = await self.bot.html_parser.search_results(wiki_search_resp)
+            if len(search_results) == 0:
                 await ctx.send("Could not find any pages with your search.")
                 return
-
-            # Loop through 5 suggestions given by wiki search
-            # Discord cant handle links with ')' as a ending character properly so escape it if present
-            for heading in search_resp_headings[:5]:
-                href = heading.find("a")["href"]
-                if href[-1] == ")":
-                    href = list(href)
-                    href[-1] = "\\)"
-                    href = "".join(href)
-                page_title = heading.find("a")["title"]
-                hyperlinks.append(f"[{page_title}]({base_link}{href})")
-
-            embed = discord.Embed(title="Did you mean some of these?", description="\n".join(hyperlinks))
-            await ctx.send(embed=embed)
+            await ctx.send(embed=self.make_wiki_suggestions(search_results))
 
         # The wiki link made from user words is valid. Disable discord link preview to prevent flooding the chat
         else:
             await ctx.send(f"<{page_link}>")
 
+    @commands.command(name="reloadwiki")
+    @commands.is_owner()
+    async def reload_wiki_index(self, ctx):
+        """
+        Reload the wiki title index after the wiki titles dump in resources directory has been updated.
+
+        :param ctx:
+        """
+        pages = await self.load_wiki_index()
+        if pages == 0:
+            await ctx.send("Could not find a wiki titles dump. Command 'wiki' visits the wiki for every search.")
+            return
+        await ctx.send(f"Loaded {pages} wiki pages.")
+
     @commands.command(name="stats", aliases=["ironstats", "uimstats", "hcstats", "dmmstats", "seasonstats",
                                              "seasonalstats", "tournamentstats"])
     async def get_user_stats(self, ctx, *, username):
         """
         Command to search for user highscores from official Old School Runescape api. Search supports using different
         highscores for different type of characters. If highscore data is successfully found, send the current stats
-        into chat.
+        into chat. If many usernames separated with commas are given, their levels are sent side by side instead.
 
         :param ctx:
-        :param username: Account whose stats are wanted to be searched
+        :param username: Account whose stats are wanted to be searched, or many accounts separated with commas
         """
 
-        invoked_with = ctx.invoked_with
-        if invoked_with == "ironstats":
-            account_type = "ironman"
-        elif invoked_with == "uimstats":
-            account_type = "uim"
-        elif invoked_with == "hcstats":
-            account_type = "hcim"
-        elif invoked_with == "dmmstats":
-            account_type = "dmm"
-        elif invoked_with == "tournamentstats":
-            account_type = "tournament"
-        elif invoked_with == "seasonstats" or invoked_with == "seasonalstats":
-            account_type = "seasonal"
-        else:
-            account_type = "normal"
+        account_type = ACCOUNT_TYPE_PREFIXES.get(ctx.invoked_with[:-len("stats")], "normal")
+        if "," in username:
+            await self.send_bulk_stats(ctx, self.split_usernames(username), account_type)
+            return
 
         try:
-            user_highscores, combat_level = await self.get_highscores_data(username, account_type=account_type)
+            user_highscores, combat_level = await highscores.get_highscores_data(self.bot.fetcher, username,
+                                                                                 account_type=account_type)
         except asyncio.TimeoutError:
             await ctx.send("Osrs highscores answer too slowly. Try again later")
             return
@@ -358,12 +277,134 @@ class OsrsCog(commands.Cog):
             msg = "Could not find any highscores with that username."
         else:
             try:
-                msg = await self.make_scoretable(user_highscores, username, combat_level, account_type=account_type)
+                with metrics.span("render", "scoretable"):
+                    msg = scoretable.make_scoretable(user_highscores, username, combat_level,
+                                                     account_type=account_type)
             except IndexError:
                 msg = "Cannot make highscores table. There are more mini game or skill fields in Osrs highscores " \
                       "than before. This needs to be fixed in the source code."
         await ctx.send(msg)
 
+    @staticmethod
+    def split_usernames(args: str) -> List[str]:
+        """
+        Split comma separated usernames and drop empty and duplicate ones.
+
+        :param args: Usernames separated with commas
+        :return: Usernames in the given order
+        """
+        usernames = []
+        for username in args.split(","):
+            username = username.strip()
+            if username and username.lower() not in [added.lower() for added in usernames]:
+                usernames.append(username)
+        return usernames
+
+    async def fetch_bulk_highscores(self, usernames: List[str], account_type: str) -> tuple:
+        """
+        Fetch the highscores of many accounts concurrently, at most BULK_CONCURRENCY at a time. If the highscores of a
+        player tracked with the same account type can't be fetched, the latest stored snapshot of the player is used
+        instead.
+
+        :param usernames: Accounts whose highscores are fetched
+        :param account_type: Account type to determine the highscores
+        :return: Found accounts as (username, highscores data, combat level, save date of the stored snapshot or None)
+        tuples in the given order, usernames that are not on the highscores and usernames that could not be fetched
+        """
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def fetch(username):
+            async with semaphore:
+                return await highscores.get_highscores_data(self.bot.fetcher, username, account_type=account_type)
+
+        results = await asyncio.gather(*[fetch(username) for username in usernames], return_exceptions=True)
+        failed = [username for username, result in zip(usernames, results) if isinstance(result, Exception)]
+        stored_snapshots = await snapshots.get_latest_snapshots_of(self.bot.db, failed, account_type)
+
+        found, not_found, unavailable = [], [], []
+        for username, result in zip(usernames, results):
+            if isinstance(result, Exception):
+                snapshot = stored_snapshots.get(username.lower())
+                if snapshot is None:
+                    unavailable.append(username)
+                else:
+                    savedate, combat_level, highscores_data = snapshot
+                    found.append((username, highscores_data, combat_level, savedate))
+            elif not result[0]:
+                not_found.append(username)
+            else:
+                found.append((username, result[0], result[1], None))
+        return found, not_found, unavailable
+
+    @staticmethod
+    def make_bulk_notes(found: list, not_found: List[str], unavailable: List[str]) -> str:
+        """
+        :return: Message about the accounts that were not found, could not be fetched or are shown from stored stats
+        """
+        notes = []
+        if not_found:
+            notes.append(f"Could not find any highscores with usernames {', '.join(not_found)}.")
+        if unavailable:
+            notes.append(f"Osrs highscores answer too slowly for {', '.join(unavailable)}. Try again later.")
+        stored = [f"{username} ({savedate:%Y-%m-%d})" for username, _, _, savedate in found if savedate is not None]
+        if stored:
+            notes.append(f"Osrs highscores answer too slowly, so the latest saved stats are shown for "
+                         f"{', '.join(stored)}.")
+        return "\n".join(notes)
+
+    async def send_bulk_stats(self, ctx, usernames: List[str], account_type: str):
+        """
+        Send the levels of many accounts side by side in as few messages as possible.
+
+        :param ctx:
+        :param usernames: Accounts whose levels are sent
+        :param account_type: Account type to determine the highscores
+        """
+        if len(usernames) > MAX_BULK_USERNAMES:
+            await ctx.send(f"Stats can be searched for at most {MAX_BULK_USERNAMES} accounts at once.")
+            return
+
+        found, not_found, unavailable = await self.fetch_bulk_highscores(usernames, account_type)
+        messages = []
+        if found:
+            with metrics.span("render", "levelstables"):
+                messages = scoretable.make_levels_tables([account[0] for account in found],
+                                                         [account[1] for account in found],
+                                                         [account[2] for account in found], account_type=account_type)
+        notes = self.make_bulk_notes(found, not_found, unavailable)
+        if notes:
+            messages.append(notes)
+        for message in messages:
+            await ctx.send(message)
+
+    @commands.command(name="compare", aliases=["ironcompare", "uimcompare", "hccompare", "dmmcompare",
+                                               "seasoncompare", "seasonalcompare", "tournamentcompare"])
+    async def compare_users(self, ctx, *, usernames):
+        """
+        Compare the levels and experience of two accounts side by side.
+
+        :param ctx:
+        :param usernames: Two usernames separated with a comma, or with a space if neither of them contains spaces
+        """
+        account_type = ACCOUNT_TYPE_PREFIXES.get(ctx.invoked_with[:-len("compare")], "normal")
+        usernames = self.split_usernames(usernames) if "," in usernames else usernames.split()
+        if len(usernames) != 2:
+            await ctx.send("Give two different usernames separated with a comma, e.g. !compare Zezima, Lynx Titan")
+            return
+
+        found, not_found, unavailable = await self.fetch_bulk_highscores(usernames, account_type)
+        notes = self.make_bulk_notes(found, not_found, unavailable)
+        if len(found) < 2:
+            await ctx.send(notes)
+            return
+        with metrics.span("render", "comparisontable"):
+            msg = scoretable.make_comparison_table([account[0] for account in found],
+                                                   [account[1] for account in found],
+                                                   [account[2] for account in found], account_type=account_type)
+        await ctx.send(msg)
+        if notes:
+            await ctx.send(notes)
+
     # noinspection PyBroadException
     @commands.command(name="track")
     async def track_player(self, ctx, *, track_args):
@@ -395,7 +436,8 @@ class OsrsCog(commands.Cog):
             return
 
         try:
-            current_highscores, combat_level = await self.get_highscores_data(username, account_type)
+            current_highscores, combat_level = await highscores.get_highscores_data(self.bot.fetcher, username,
+                                                                                    account_type)
         except asyncio.TimeoutError:
             await ctx.send("Osrs highscores answer too slowly. Try again later.")
             return
@@ -404,28 +446,34 @@ class OsrsCog(commands.Cog):
             return
         save_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         try:
-            self.bot.cursor.execute("""INSERT INTO tracked_players (USERNAME, OLD_NAMES, SAVEDATE, STATS, COMBAT_LEVEL, 
-                                    ACC_TYPE) VALUES (%s, %s, %s, %s, %s, %s);""",
-                                    [username.lower(), None, save_timestamp, json.dumps(current_highscores),
-                                     combat_level, account_type])
-            self.bot.db.commit()
+            await self.bot.db.execute("""INSERT INTO tracked_players (USERNAME, OLD_NAMES, SAVEDATE, STATS, 
+                                      COMBAT_LEVEL, ACC_TYPE) VALUES (%s, %s, %s, %s, %s, %s);""",
+                                      [username.lower(), None, save_timestamp, json.dumps(current_highscores),
+                                       combat_level, account_type])
             msg = f"Started tracking {username}. Account type: {account_type}"
         except:
             msg = "This user is already being tracked."
         await ctx.send(msg)
 
     @commands.command(name="gains")
-    async def get_user_gains(self, ctx, *, username):
+    async def get_user_gains(self, ctx, *, gains_args):
         """
         Calculate user gains based on saved highscores and current highscores. Gains are formatted in table and sent to
-        discord.
+        discord. By default the gains are calculated since the last check. If a period (day, week or month) is given
+        after the username, the gains are calculated from the oldest stored snapshot within that period.
 
         :param ctx:
-        :param username: Username whose gains are wanted. User has to be tracked for this command to work.
+        :param gains_args: Username whose gains are wanted and optionally the period. User has to be tracked for this
+        command to work.
         """
-        self.bot.cursor.execute("""SELECT SAVEDATE, STATS, COMBAT_LEVEL, ACC_TYPE FROM tracked_players 
-                                   WHERE USERNAME = %s;""", [username])
-        old_user_data = self.bot.cursor.fetchone()
+        username, _, period = gains_args.rpartition(" ")
+        period = period.lower()
+        if not username or period not in snapshots.PERIODS:
+            username = gains_args
+            period = None
+
+        old_user_data = await self.bot.db.fetchone("""SELECT SAVEDATE, STATS, COMBAT_LEVEL, ACC_TYPE 
+                                                      FROM tracked_players WHERE USERNAME = %s;""", [username])
         if not old_user_data:
             await ctx.send("This user is not being tracked.")
             return
@@ -433,32 +481,33 @@ class OsrsCog(commands.Cog):
         old_highscores = json.loads(old_user_data[1])
         old_combat_level = old_user_data[2]
         account_type = old_user_data[3]
-        new_savedate = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.datetime.now()
+        new_savedate = now.strftime("%Y-%m-%d %H:%M:%S")
+
+        if period:
+            snapshot = await snapshots.get_snapshot_since(self.bot.db, username, now - snapshots.PERIODS[period])
+            if not snapshot:
+                await ctx.send(f"There are no stored stats for {username} from the past {period}.")
+                return
+            old_savedate, old_combat_level, old_highscores = snapshot
+            old_savedate = old_savedate.strftime("%Y-%m-%d %H:%M:%S")
         try:
-            new_highscores, new_combat_level = await self.get_highscores_data(username, account_type)
+            new_highscores, new_combat_level = await highscores.get_highscores_data(self.bot.fetcher, username,
+                                                                                    account_type)
         except asyncio.TimeoutError:
             await ctx.send("Osrs highscores answers too slowly to get updated data. Try again later.")
             return
+        if not new_highscores:
+            await ctx.send("Could not find any highscores with that username.")
+            return
 
         # Calculate the gains and then make a score table
-        new_skills_array = np.array(new_highscores[:24], dtype=int)
-        old_skills_array = np.array(old_highscores[:24], dtype=int)
-        new_minigames_array = np.array(new_highscores[24:], dtype=int)
-        old_minigames_array = np.array(old_highscores[24:], dtype=int)
-
-        skills_difference = new_skills_array - old_skills_array
+        # Stored highscores can have less rows if new skills or activities have been added to highscores since
+        old_scores, new_scores = highscores.align(highscores.Highscores.from_list(old_highscores),
+                                                  highscores.Highscores.from_list(new_highscores))
+        skills_difference = new_scores.skills - old_scores.skills
+        minigames_difference = new_scores.activities - old_scores.activities
         combat_level_difference = new_combat_level - old_combat_level
-        try:
-            minigames_difference = new_minigames_array - old_minigames_array
-        except ValueError:
-            # ValueError is raised if Osrs adds new mini games to highscores and hence the dimensions of the new array
-            # differs from stored one. Try to make an array of zeros with dimensions of the old mini games array so
-            # users skills gains can be still shown.
-            await ctx.send("The old mini games data in Osrs highscores doesn't match the dimensions of new mini games "
-                           "data. Clue gains cannot be shown now, but they should be fixed after this. If this command "
-                           "continues to act weirdly, you can try to reset your stored stats using command "
-                           f"`!reset {username}`.")
-            minigames_difference = np.zeros(shape=old_skills_array.shape, dtype=int)
 
         # Multiply every rank difference by -1 so they are positive if player has climbed in highscores and vice versa
         skills_difference[:, 0] *= -1
@@ -466,17 +515,25 @@ class OsrsCog(commands.Cog):
         gains = skills_difference.tolist() + minigames_difference.tolist()
 
         try:
-            message = await self.make_scoretable(gains, username, combat_level_difference, gains=True,
-                                                 old_savedate=old_savedate, new_savedate=new_savedate,
-                                                 account_type=account_type)
+            with metrics.span("render", "scoretable"):
+                message = scoretable.make_scoretable(gains, username, combat_level_difference, gains=True,
+                                                     old_savedate=old_savedate, new_savedate=new_savedate,
+                                                     account_type=account_type)
+            ehp_table = ACCOUNT_TYPE_TABLES.get(account_type)
+            if ehp_table:
+                ehp_gained = get_ehp_calculator(self.bot.resources, ehp_table).skill_hours(
+                    [new_scores.skills[:, 2], old_scores.skills[:, 2]])[:, 0]
+                message += f"\nEHP gained: {ehp_gained[0] - ehp_gained[1]:.2f}"
         except IndexError:
             message = "Cannot make highscores table. There are more mini game or skill fields in Osrs highscores " \
                       "than before. This needs to be fixed in the source code. However, your new stats should still " \
                       "be stored right."
 
-        self.bot.cursor.execute("""UPDATE tracked_players SET SAVEDATE = %s, STATS = %s WHERE USERNAME = %s;""",
-                                [new_savedate, json.dumps(new_highscores), username])
-        self.bot.db.commit()
+        # Gains for a period don't reset the stats used for gains since the last check
+        if not period:
+            await self.bot.db.execute("""UPDATE tracked_players SET SAVEDATE = %s, STATS = %s 
+                                         WHERE USERNAME = %s;""", [new_savedate, json.dumps(new_highscores), username])
+        await snapshots.add_snapshots(self.bot.db, [(username, now, new_combat_level, new_highscores)])
         await ctx.send(message)
 
     @commands.command(name="xp", aliases=["exp", "level", "lvl"])
@@ -507,9 +564,8 @@ class OsrsCog(commands.Cog):
                 return
 
         if len(level_query) == 1:
-            target_level = level_query[0]
-            self.bot.cursor.execute("""SELECT xp FROM experiences WHERE level = %s;""", [target_level])
-            xp_required = self.bot.cursor.fetchone()[0]
+            target_level = int(level_query[0])
+            xp_required = experience.experience_for_level(target_level)
             base_message = f"Xp required to level {target_level}: "
         else:
             starting_level = int(level_query[0])
@@ -517,13 +573,8 @@ class OsrsCog(commands.Cog):
             if target_level < starting_level:
                 await ctx.send("Target level can't be smaller than the starting level.")
                 return
-            self.bot.cursor.execute("""SELECT xp FROM experiences WHERE level IN (%s, %s);""", [starting_level,
-                                                                                                target_level])
-            level_reqs = self.bot.cursor.fetchall()
-            # Xp required by levels are given as int tuples e.g. ((8771558,), (13034431,))
-            starting_xp_req = level_reqs[0][0]
-            target_xp_req = level_reqs[1][0]
-            xp_required = target_xp_req - starting_xp_req
+            xp_required = experience.experience_for_level(target_level) - \
+                experience.experience_for_level(starting_level)
             base_message = f"Xp required between level gap {starting_level}-{target_level}: "
 
         # Separate thousands with spaces in the xp required
@@ -533,36 +584,82 @@ class OsrsCog(commands.Cog):
     @commands.command(name="update")
     async def osrs_latest_news(self, ctx):
         """
-        Parse Old School Runescape homepage for latest game and community news and send links to them.
+        Send a link to the latest game or community news of Old School Runescape. The news are polled from the
+        homepage in the background, and the homepage is visited here only if there are no articles yet, or the news
+        are not polled in this shard worker and the articles are outdated.
 
         :param ctx:
         :return:
         """
-        news_articles = {}
+        latest_article = self.news_poller.latest_article()
+        if self.news_poller.needs_poll():
+            try:
+                await self.news_poller.poll()
+            except asyncio.TimeoutError:
+                # Outdated articles are better than no answer
+                if latest_article is None:
+                    await ctx.send("Osrs API answers too slowly. Try again later.")
+                    return
+            latest_article = self.news_poller.latest_article()
+        if latest_article is None:
+            await ctx.send("Could not find any news from the Old School Runescape homepage.")
+            return
 
-        osrs_homepage = "https://oldschool.runescape.com/"
-        osrs_response = await self.visit_website(osrs_homepage)
-        if not osrs_response:
-            await ctx.send("Osrs API answers too slowly. Try again later.")
-            return 
+        await ctx.send(f"Latest news about Old School Runescape ({latest_article.type}):\n\n{latest_article.link}")
 
-        osrs_response_html = BeautifulSoup(osrs_response, "html.parser")
+    async def send_news(self, channel_id: int, article: NewsArticle):
+        """
+        Send a new article to a subscribed channel.
 
-        for div_tag in osrs_response_html.findAll("div", attrs={"class": "news-article__details"}):
-            p_tag = div_tag.p
-            # The article types in their HTML always ends in space
-            article_type = div_tag.span.contents[0][:-1]
-            article_link = p_tag.a["href"]
-            article_number = p_tag.a["id"][-1]
-            news_articles[article_number] = {"link": article_link, "type": article_type}
+        :param channel_id: Id of the channel
+        :param article: New article from the news poller
+        """
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            # The channel is deleted or in a shard of another shard worker, which sends the news there
+            return
+        await channel.send(f"New Old School Runescape news ({article.type}):\n\n{article.link}")
 
-        # Find the latest article by finding the smallest article key
-        latest_article_key = min(news_articles.keys())
+    @commands.command(name="subscribenews")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def subscribe_news(self, ctx, channel: discord.TextChannel = None):
+        """
+        Send new Old School Runescape news to a channel of the guild as soon as they are found from the homepage. The
+        guild can have only one news channel, so any previous channel is replaced.
 
-        article_link = news_articles[latest_article_key]["link"]
-        article_type = news_articles[latest_article_key]["type"]
+        :param ctx:
+        :param channel: Channel for the news. Defaults to the channel where the command was used.
+        """
+        channel = channel or ctx.channel
+        await self.news_poller.subscribe(ctx.guild.id, channel.id)
+        await ctx.send(f"New Old School Runescape news will be sent to {channel.mention}.")
+
+    @commands.command(name="unsubscribenews")
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def unsubscribe_news(self, ctx):
+        """
+        Stop sending new Old School Runescape news to the guild.
+
+        :param ctx:
+        """
+        if await self.news_poller.unsubscribe(ctx.guild.id):
+            await ctx.send("New Old School Runescape news will no longer be sent to this server.")
+        else:
+            await ctx.send("This server has not subscribed to the news.")
 
-        await ctx.send(f"Latest news about Old School Runescape ({article_type}):\n\n{article_link}")
+    @commands.command(name="newsstatus")
+    @commands.is_owner()
+    async def get_news_status(self, ctx):
+        """
+        Send the state of the background news poller.
+
+        :param ctx:
+        """
+        progress = self.news_poller.progress()
+        progress_formatted = "\n".join(f"{key}: {value}" for key, value in progress.items())
+        await ctx.send(f"```{progress_formatted}```")
 
     @commands.command(name="ehp", aliases=["ironehp", "skillerehp", "f2pehp"])
     async def get_skill_ehp(self, ctx, skillname):
@@ -587,34 +684,10 @@ class OsrsCog(commands.Cog):
         else:
             return
 
-        with open(f"resources\\{filename}.json") as ehp_file:
-            ehp_data = json.load(ehp_file)
+        ehp_data = self.bot.resources.ehp[filename]
 
         # Users tend to use shortened names for some skills
-        if skillname == "att":
-            skillname = "attack"
-        elif skillname == "str":
-            skillname = "strength"
-        elif skillname == "def":
-            skillname = "defence"
-        elif skillname == "hp":
-            skillname = "hitpoints"
-        elif skillname == "range":
-            skillname = "ranged"
-        elif skillname == "pray":
-            skillname = "prayer"
-        elif skillname == "wc":
-            skillname = "woodcutting"
-        elif skillname == "fm":
-            skillname = "firemaking"
-        elif skillname == "agi":
-            skillname = "agility"
-        elif skillname == "thiev":
-            skillname = "thieving"
-        elif skillname == "rc":
-            skillname = "runecrafting"
-        elif skillname == "cons":
-            skillname = "construction"
+        skillname = highscores.SKILL_ALIASES.get(skillname, skillname)
 
         try:
             skill_ehp_rates = ehp_data[skillname]
@@ -626,94 +699,82 @@ class OsrsCog(commands.Cog):
             await ctx.send(f"There are no EHP rates for {skillname.capitalize()} for given account type.")
             return
 
-        self.bot.cursor.execute("SELECT * FROM experiences;")
-        experiences = self.bot.cursor.fetchall()
-        ehp_rates = await self.make_ehp_list(skill_ehp_rates, experiences)
+        ehp_rates = await self.make_ehp_list(skill_ehp_rates)
         ehp_type = filename.lstrip("ehp_").capitalize()  # This is empty for normal EHP rates
         await ctx.send(f"{ehp_type} EHP rates for {skillname}:\n\n{ehp_rates}")
 
     @commands.command(name="loot", aliases=["kill"])
     async def get_drop_chances(self, ctx, amount: int, *args):
         """
-        Calculate chances in percents to get unique drops from a given boss with given amount of kills. Chances are
-        rounded with two decimal places.
+        Calculate chances in percents to get unique drops from a given boss with given amount of kills, the expected
+        amounts of drops and the kills needed to get every drop. Chances are rounded with two decimal places.
 
         :param ctx:
         :param amount: Kill amount given by user. discord.py will try to convert this automatically to int. If its not
         possible, an exception UserInputError is raised and will be handled in error_handler cog
-        :param args: A name of the boss given by user
+        :param args: A name of the boss given by user. Chambers of Xeric can be followed by the raid points, e.g.
+        "cox 45k".
         """
 
-        def calculate_chance(rate: float):
+        def format_chance(chance: float) -> str:
             """
-            Calculate the chance for a drop with given attempts and drop rate.
-
-            :param rate: Drop rate for the drop as a float
-            :return: String that has the chance to get the drop in percents
+            :param chance: Chance between 0 and 1
+            :return: String that has the chance in percents
             """
-            chance = (1 - (1 - rate) ** amount) * 100
+            chance *= 100
             if chance < 0.01:
-                chance = "< 0.01%"
+                return "< 0.01%"
             elif chance > 99.99:
-                chance = "> 99.99%"
-            else:
-                chance = f"{chance:.2f}%"
-            return chance
+                return "> 99.99%"
+            return f"{chance:.2f}%"
 
-        with open("resources\\drop_rates.json") as rates_file:
-            drop_rates_dict = json.load(rates_file)
+        if amount < 1:
+            await ctx.send("Amount of kills must be positive.")
+            return
 
+        drop_rates_dict = self.bot.resources.drop_rates
         boss_name = " ".join(args).lower()
-
-        # Convert some most common nicknames to the full names
-        if boss_name in ["corp", "corpo"]:
-            boss_name = "corporeal beast"
-        elif boss_name == "cerb":
-            boss_name = "cerberus"
-        elif boss_name == "sire":
-            boss_name = "abyssal sire"
-        elif boss_name == "kq":
-            boss_name = "kalphite queen"
-        elif boss_name in ["bando", "bandos"]:
-            boss_name = "general graardor"
-        elif boss_name == "mole":
-            boss_name = "giant mole"
-        elif boss_name == "kbd":
-            boss_name = "king black dragon"
-        elif boss_name in ["kreearra", "arma"]:
-            boss_name = "kree'arra"
-        elif boss_name == "thermo":
-            boss_name = "thermonuclear smoke devil"
-        elif boss_name == "vetion":
-            boss_name = "vet'ion"
-        elif boss_name in ["zilyana", "sara", "zily"]:
-            boss_name = "commander zilyana"
-        elif boss_name == "zammy":
-            boss_name = "k'ril tsutsaroth"
-        elif boss_name == "hydra":
-            boss_name = "alchemical hydra"
-        elif boss_name in ["cox", "raid", "raids", "raids 1", "olm"]:
-            boss_name = "chambers of xeric"
+        boss_name = loot.BOSS_ALIASES.get(boss_name, boss_name)
+        points = loot.COX_DEFAULT_POINTS
+        if boss_name not in drop_rates_dict and len(args) > 1:
+            # Raid points after the boss name
+            try:
+                points = prices.parse_quantity(args[-1])
+            except ValueError:
+                pass
+            else:
+                boss_name = " ".join(args[:-1]).lower()
+                boss_name = loot.BOSS_ALIASES.get(boss_name, boss_name)
 
         try:
             boss_rates = drop_rates_dict[boss_name]
         except KeyError:
             await ctx.send("Could not find a boss with that name.")
             return
-        # Loop through all item drop rates for boss and add them to list
-        drop_chances = []
-        for item_drop_rate in boss_rates.items():
-            itemname = item_drop_rate[0]
-            drop_rate_frac = fractions.Fraction(item_drop_rate[1])
-            drop_rate = float(drop_rate_frac)
-            if boss_name == "chambers of xeric":
-                # The drop rates are based on average of 30k points. The formula for base rates can be found in wiki
-                drop_rate = float(drop_rate_frac) * 30000
-            drop_chance = calculate_chance(drop_rate)
-            drop_chances.append(f"**{itemname}:** {drop_chance}")
+
+        if boss_name == "chambers of xeric":
+            boss_loot = loot.BossLoot.chambers_of_xeric(boss_rates, points)
+            title = f"Chances to get loot in {amount} raids with {points:,} points from Chambers of Xeric:"
+        else:
+            boss_loot = loot.BossLoot.from_rates(boss_rates)
+            title = f"Chances to get loot in {amount} kills from {boss_name.capitalize()}:"
+
+        chances = boss_loot.chance_of_any(amount)
+        expected_counts = boss_loot.expected_counts(amount)
+        kills_for_90 = boss_loot.kills_for_chance(0.9)
+        drop_chances = [f"**{item_name}:** {format_chance(chance)} (expected {expected:.2f}, 90% in {kills:,} kills)"
+                        for item_name, chance, expected, kills in zip(boss_loot.names, chances, expected_counts,
+                                                                      kills_for_90)]
+
+        chance_of_all, kills_for_all = await asyncio.get_event_loop().run_in_executor(None, boss_loot.every_drop,
+                                                                                      amount)
+        confidences = "/".join(f"{confidence * 100:.0f}" for confidence in loot.CONFIDENCES)
+        kills_for_all = " / ".join(f"{kills:,}" for kills in kills_for_all)
 
         drop_chances_joined = "\n".join(drop_chances)
-        await ctx.send(f"Chances to get loot in {amount} kills from {boss_name.capitalize()}:\n\n{drop_chances_joined}")
+        message = f"{title}\n\n{drop_chances_joined}\n\nChance to get every drop: {format_chance(chance_of_all)}\n" \
+                  f"Kills for {confidences}% chance to get every drop: {kills_for_all}"
+        await ctx.send(message.replace(",", " "))
 
     @commands.command(name="reset")
     async def reset_tracked_stats(self, ctx, *,  username):
@@ -726,31 +787,34 @@ class OsrsCog(commands.Cog):
         :param username: Username whose stats needs to be reset
         :return:
         """
-        self.bot.cursor.execute("""SELECT ACC_TYPE FROM tracked_players WHERE USERNAME = %s;""", [username])
-        account_type = self.bot.cursor.fetchone()
+        account_type = await self.bot.db.fetchone("""SELECT ACC_TYPE FROM tracked_players WHERE USERNAME = %s;""",
+                                                  [username])
         if not account_type:
             await ctx.send("This user is not being tracked.")
             return
         try:
-            user_highscores, combat_level = await self.get_highscores_data(username, account_type=account_type[0])
+            user_highscores, combat_level = await highscores.get_highscores_data(self.bot.fetcher, username,
+                                                                                 account_type=account_type[0])
         except asyncio.TimeoutError:
             await ctx.send("Osrs highscores answer too slowly. Try again later.")
             return
-        self.bot.cursor.execute("""UPDATE tracked_players SET SAVEDATE = %s, STATS = %s, COMBAT_LEVEL = %s 
-                                   WHERE USERNAME = %s;""",
-                                [datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), json.dumps(user_highscores),
-                                 combat_level, username])
-        self.bot.db.commit()
+        if not user_highscores:
+            await ctx.send("Could not find any highscores with that username.")
+            return
+        await self.bot.db.execute("""UPDATE tracked_players SET SAVEDATE = %s, STATS = %s, COMBAT_LEVEL = %s 
+                                     WHERE USERNAME = %s;""",
+                                  [datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                   json.dumps(user_highscores), combat_level, username])
         await ctx.send(f"Stats for `{username}` successfully reset.")
 
     @commands.command(name="nicks")
     async def get_old_nicks(self, ctx, *, username):
-        self.bot.cursor.execute("""SELECT OLD_NAMES FROM tracked_players WHERE USERNAME = %s;""", [username])
-        old_nicks = self.bot.cursor.fetchone()[0]
+        old_nicks = (await self.bot.db.fetchone("""SELECT OLD_NAMES FROM tracked_players WHERE USERNAME = %s;""",
+                                                [username]))[0]
         old_nicks_list = old_nicks.split(",")
         cml_old_nick_link = f"https://www.crystalmathlabs.com/tracker/api.php?type=previousname&player={username}"
         try:
-            cml_response = await self.visit_website(cml_old_nick_link, encoding="utf-8-sig")
+            cml_response = await self.bot.fetcher.visit_website(cml_old_nick_link, encoding="utf-8-sig")
             if cml_response != -1 and cml_response != -2 and cml_response != -3 and cml_response != -4:
                 if cml_response not in old_nicks_list:
                     old_nicks_list.append(cml_response)
@@ -764,6 +828,107 @@ class OsrsCog(commands.Cog):
             embed = discord.Embed(title=f"Old nicknames for {username}", description="\n".join(old_nicks_list))
             await ctx.send(embed=embed)
 
+    async def get_tracked_gains(self, period: str):
+        """
+        Calculate the gains of all tracked players during given period from their stored snapshots.
+
+        :param period: One of the periods in snapshots.PERIODS
+        :return: Gains of every tracked player that has snapshots from the period, or None if there are none
+        """
+        since = datetime.datetime.now() - snapshots.PERIODS[period]
+        first_snapshots = await snapshots.get_first_snapshots_since(self.bot.db, since)
+        latest_snapshots = await snapshots.get_latest_snapshots(self.bot.db)
+        account_types = dict(await self.bot.db.fetchall("SELECT USERNAME, ACC_TYPE FROM tracked_players;"))
+
+        usernames = sorted(set(first_snapshots) & set(latest_snapshots) & set(account_types))
+        if not usernames:
+            return None
+
+        ehp_calculators = {account_type: get_ehp_calculator(self.bot.resources, table)
+                           for account_type, table in ACCOUNT_TYPE_TABLES.items()}
+        return compute_gains(usernames, [first_snapshots[username][2] for username in usernames],
+                             [latest_snapshots[username][2] for username in usernames],
+                             account_types=[account_types[username] for username in usernames],
+                             ehp_calculators=ehp_calculators)
+
+    @commands.command(name="clangains")
+    async def get_clan_gains(self, ctx, period: str = "week"):
+        """
+        Show the tracked players who have gained the most experience during given period, with their gained levels and
+        Efficient Hours Played.
+
+        :param ctx:
+        :param period: day, week or month. Default is week.
+        """
+        period = period.lower()
+        if period not in snapshots.PERIODS:
+            await ctx.send("Period must be day, week or month.")
+            return
+
+        tracked_gains = await self.get_tracked_gains(period)
+        if tracked_gains is None:
+            await ctx.send(f"There are no stored stats of tracked players from the past {period}.")
+            return
+
+        rows = []
+        for rank, index in enumerate(tracked_gains.top_indexes(tracked_gains.xp[:, 0], k=10), start=1):
+            rows.append([rank, tracked_gains.usernames[index], f"{tracked_gains.xp[index, 0]:+,}",
+                         f"{tracked_gains.levels[index, 0]:+,}", f"{tracked_gains.ehp[index, 0]:+.2f}"])
+
+        # Imported on first use, so that it isn't imported during the startup
+        from tabulate import tabulate
+        table = tabulate(rows, tablefmt="orgtbl", headers=["#", "Name", "Xp", "Levels", "Ehp"])
+        await ctx.send(f"```{f'Top gains of the past {period}':^50}\n\n{table}```")
+
+    @commands.command(name="leaderboard", aliases=["lb"])
+    async def get_leaderboard(self, ctx, metric: str = "total", period: str = "week"):
+        """
+        Rank tracked players by experience gained in a skill or by Efficient Hours Played during given period.
+
+        :param ctx:
+        :param metric: Skill name (the most common abbreviations are supported), total or ehp. Default is total.
+        :param period: day, week or month. Default is week.
+        """
+        metric = highscores.SKILL_ALIASES.get(metric.lower(), metric.lower())
+        period = period.lower()
+        if metric != "ehp" and metric not in highscores.SKILLS:
+            await ctx.send("Invalid skill name.")
+            return
+        if period not in snapshots.PERIODS:
+            await ctx.send("Period must be day, week or month.")
+            return
+
+        tracked_gains = await self.get_tracked_gains(period)
+        if tracked_gains is None:
+            await ctx.send(f"There are no stored stats of tracked players from the past {period}.")
+            return
+
+        if metric == "ehp":
+            top_players = [(username, f"{value:+.2f}")
+                           for username, value in tracked_gains.top(tracked_gains.ehp[:, 0])]
+        else:
+            skill_index = highscores.SKILLS.index(metric)
+            top_players = [(username, f"{value:+,}")
+                           for username, value in tracked_gains.top(tracked_gains.xp[:, skill_index])]
+
+        rows = [[rank, username, value] for rank, (username, value) in enumerate(top_players, start=1)]
+        header = "Ehp" if metric == "ehp" else "Xp"
+        from tabulate import tabulate
+        table = tabulate(rows, tablefmt="orgtbl", headers=["#", "Name", header])
+        await ctx.send(f"```{f'{metric.capitalize()} leaderboard of the past {period}':^40}\n\n{table}```")
+
+    @commands.command(name="trackerstatus")
+    @commands.is_owner()
+    async def get_tracker_status(self, ctx):
+        """
+        Send the progress of the background refresh of tracked players.
+
+        :param ctx:
+        """
+        progress = self.tracking_scheduler.progress()
+        progress_formatted = "\n".join(f"{key}: {value}" for key, value in progress.items())
+        await ctx.send(f"```{progress_formatted}```")
+
 
 def setup(bot):
     bot.add_cog(OsrsCog(bot))
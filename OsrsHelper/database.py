@@ -22,9 +22,235 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import MySQLdb
+import asyncio
+import concurrent.futures
+import functools
+from typing import Any, Callable, List, Optional, Sequence
+
+from OsrsHelper import metrics
 
 
 def connect(password):
+    # Imported here so the pool can be used with other DB-API drivers (e.g. sqlite3) without mysqlclient installed
+    import MySQLdb
     connection = MySQLdb.connect(host="localhost", user="Admin", password=password, database="osrshelper")
     return connection
+
+
+def _run_fetchone(connection, query: str, args: Optional[Sequence]) -> Optional[tuple]:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, args or ())
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _run_fetchall(connection, query: str, args: Optional[Sequence]) -> List[tuple]:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, args or ())
+        return list(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def _run_execute(connection, query: str, args: Optional[Sequence], many: bool = False) -> int:
+    cursor = connection.cursor()
+    try:
+        if many:
+            cursor.executemany(query, args)
+        else:
+            cursor.execute(query, args or ())
+        connection.commit()
+        return cursor.rowcount
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _run_get_columns(connection, table: str) -> List[str]:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT * FROM {table} LIMIT 0;")
+        return [column[0] for column in cursor.description]
+    finally:
+        cursor.close()
+
+
+class Connection:
+    """
+    A connection checked out from ConnectionPool. All methods run the blocking driver calls in the pool's executor
+    so the event loop is never blocked by a database round-trip.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw_connection):
+        self._pool = pool
+        self.raw = raw_connection
+
+    async def fetchone(self, query: str, args: Sequence = None) -> Optional[tuple]:
+        return await self._pool.run(_run_fetchone, self.raw, self._pool.format_query(query), args)
+
+    async def fetchall(self, query: str, args: Sequence = None) -> List[tuple]:
+        return await self._pool.run(_run_fetchall, self.raw, self._pool.format_query(query), args)
+
+    async def execute(self, query: str, args: Sequence = None) -> int:
+        return await self._pool.run(_run_execute, self.raw, self._pool.format_query(query), args)
+
+    async def executemany(self, query: str, args_list: Sequence[Sequence]) -> int:
+        return await self._pool.run(_run_execute, self.raw, self._pool.format_query(query), args_list, True)
+
+    async def get_columns(self, table: str) -> List[str]:
+        """
+        :return: Column names of given table in the order they were defined
+        """
+        return await self._pool.run(_run_get_columns, self.raw, table)
+
+
+class _ConnectionContext:
+
+    def __init__(self, pool: "ConnectionPool"):
+        self._pool = pool
+        self._connection = None
+
+    async def __aenter__(self) -> Connection:
+        self._connection = Connection(self._pool, await self._pool.acquire())
+        return self._connection
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # A cancelled query may still be running in the executor thread, so that connection can't be reused
+        self._pool.release(self._connection.raw, discard=isinstance(exc, asyncio.CancelledError))
+
+
+class ConnectionPool:
+    """
+    A bounded pool of blocking DB-API 2.0 connections (MySQLdb by default) for use from coroutines. Connections are
+    opened lazily up to the pool size and every query checks out its own connection, so one slow query only holds
+    one connection instead of stalling every command behind a shared cursor.
+
+    Usage:
+        row = await pool.fetchone("SELECT ACC_TYPE FROM tracked_players WHERE USERNAME = %s;", [username])
+
+        async with pool.connection() as conn:
+            await conn.execute(...)
+            await conn.execute(...)
+    """
+
+    def __init__(self, connect_func: Callable[[], Any], size: int = 5, paramstyle: str = "format"):
+        """
+        :param connect_func: A callable without arguments that returns a new DB-API connection
+        :param size: Maximum amount of simultaneously open connections
+        :param paramstyle: Placeholder style of the driver. Queries are always written with %s placeholders and they
+        are converted to ? if this is "qmark" (e.g. when using sqlite3 as a local stand-in)
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+
+        self.size = size
+        self.paramstyle = paramstyle
+        self._connect_func = connect_func
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix="db")
+        self._idle = []
+        self._waiters = None
+        self._opened = 0
+        self._closed = False
+
+    def format_query(self, query: str) -> str:
+        if self.paramstyle == "qmark":
+            return query.replace("%s", "?")
+        return query
+
+    async def run(self, func: Callable, *args):
+        """
+        Run a blocking function in the executor of this pool. The time is recorded as a span including the wait for a
+        free executor thread.
+        """
+        loop = asyncio.get_event_loop()
+        with metrics.span("sql", getattr(func, "__name__", "connect").replace("_run_", "")):
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def acquire(self):
+        """
+        Check out a raw connection from the pool. A new connection is opened if there are no idle ones and the pool
+        is not full, otherwise wait until some other coroutine releases one.
+
+        :return: Raw DB-API connection. It must be given back with release().
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed.")
+        if self._waiters is None:
+            # Created here instead of __init__ so the semaphore binds to the running loop on older Python versions
+            self._waiters = asyncio.Semaphore(self.size)
+
+        await self._waiters.acquire()
+        try:
+            if self._idle:
+                return self._idle.pop()
+            connection = await self.run(self._connect_func)
+            self._opened += 1
+            return connection
+        except BaseException:
+            self._waiters.release()
+            raise
+
+    def release(self, connection, discard: bool = False):
+        """
+        Give a connection back to the pool.
+
+        :param connection: Raw connection returned by acquire()
+        :param discard: Drop the connection instead of reusing it, e.g. if the query was cancelled midway. The driver
+        closes it when it gets garbage collected.
+        """
+        if discard:
+            self._opened -= 1
+        elif self._closed:
+            self._opened -= 1
+            connection.close()
+        else:
+            self._idle.append(connection)
+        self._waiters.release()
+
+    def connection(self) -> _ConnectionContext:
+        """
+        Check out one connection for several queries, e.g. when multiple statements must use the same connection.
+        """
+        return _ConnectionContext(self)
+
+    async def fetchone(self, query: str, args: Sequence = None) -> Optional[tuple]:
+        async with self.connection() as connection:
+            return await connection.fetchone(query, args)
+
+    async def fetchall(self, query: str, args: Sequence = None) -> List[tuple]:
+        async with self.connection() as connection:
+            return await connection.fetchall(query, args)
+
+    async def execute(self, query: str, args: Sequence = None) -> int:
+        """
+        Execute a modifying query and commit it. The transaction is rolled back if the query fails.
+
+        :return: Amount of affected rows
+        """
+        async with self.connection() as connection:
+            return await connection.execute(query, args)
+
+    async def executemany(self, query: str, args_list: Sequence[Sequence]) -> int:
+        async with self.connection() as connection:
+            return await connection.executemany(query, args_list)
+
+    async def get_columns(self, table: str) -> List[str]:
+        async with self.connection() as connection:
+            return await connection.get_columns(table)
+
+    def close(self):
+        """
+        Close all idle connections and stop accepting new queries. Connections that are currently checked out are
+        closed when they are released.
+        """
+        self._closed = True
+        for connection in self._idle:
+            self._opened -= 1
+            connection.close()
+        self._idle.clear()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,152 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import Mapping
+
+import numpy as np
+
+from OsrsHelper import experience
+from OsrsHelper.highscores import SKILLS
+from OsrsHelper.registry import ResourceRegistry, SkillEhp
+
+# Ehp tables used for each account type that can be tracked
+ACCOUNT_TYPE_TABLES = {"normal": "ehp", "ironman": "ehp_ironman", "hcim": "ehp_ironman", "uim": "ehp_ironman"}
+MAX_SKILL_EXPERIENCE = experience.experience_for_level(99)
+# Larger than any experience in one skill
+_SKILL_KEY_SHIFT = 2.0 ** 32
+
+# Calculators and the ehp tables they were built from by the name of the table. A reloaded table replaces the
+# calculator of the old one.
+_calculators = {}
+
+
+class EhpCalculator:
+    """
+    Converts experience to Efficient Hours Played with one ehp table. For every skill the hours needed to reach each
+    rate threshold from 0 xp are precomputed, so the hours for any xp are one binary search plus the remaining xp
+    divided by the rate of that section.
+    """
+
+    def __init__(self, ehp_table: Mapping[str, SkillEhp]):
+        """
+        :param ehp_table: One ehp table from ResourceRegistry.ehp. Skills that are missing or have no rates (e.g.
+        hitpoints) are never counted to ehp.
+        """
+        self.thresholds = {}
+        self.rates = {}
+        self.cumulative_hours = {}
+        for skill in SKILLS[1:]:
+            skill_ehp = ehp_table.get(skill)
+            if not skill_ehp:
+                continue
+            thresholds = np.array(skill_ehp.thresholds, dtype=np.float64)
+            rates = np.array(skill_ehp.rates, dtype=np.float64)
+            section_hours = np.diff(thresholds) / rates[:-1]
+            self.thresholds[skill] = thresholds
+            self.rates[skill] = rates
+            self.cumulative_hours[skill] = np.concatenate(([0.0], np.cumsum(section_hours)))
+
+        # The sections of all skills merged into one sorted array, so that the sections of all skills of any amount of
+        # players are found with one binary search. The key of a section is its skill index shifted past the largest
+        # possible experience plus its threshold. Skills without rates have one section with an infinite rate.
+        keys, rates, cumulative_hours, first_sections = [], [], [], []
+        for index, skill in enumerate(SKILLS):
+            first_sections.append(len(keys))
+            thresholds = self.thresholds.get(skill, np.zeros(1))
+            keys.extend(index * _SKILL_KEY_SHIFT + thresholds)
+            rates.extend(self.rates.get(skill, np.full(1, np.inf)))
+            cumulative_hours.extend(self.cumulative_hours.get(skill, np.zeros(1)))
+        self._keys = np.array(keys)
+        self._rates = np.array(rates)
+        self._cumulative_hours = np.array(cumulative_hours)
+        self._thresholds = self._keys % _SKILL_KEY_SHIFT
+        self._first_sections = np.array(first_sections)
+        self._skill_offsets = np.arange(len(SKILLS)) * _SKILL_KEY_SHIFT
+
+    def hours(self, skill: str, experience) -> np.ndarray:
+        """
+        :param skill: Skill name in lowercase
+        :param experience: Experience in the skill as a number or an array
+        :return: Efficient hours needed to get the experience from 0 xp, with the same shape as experience
+        """
+        experience = np.asarray(experience, dtype=np.float64)
+        thresholds = self.thresholds.get(skill)
+        if thresholds is None:
+            return np.zeros_like(experience)
+
+        # Experience below the first threshold (only possible if it isn't 0) is counted with the first rate
+        sections = np.maximum(np.searchsorted(thresholds, experience, side="right") - 1, 0)
+        remaining_xp = experience - thresholds[sections]
+        return self.cumulative_hours[skill][sections] + remaining_xp / self.rates[skill][sections]
+
+    def skill_hours(self, skills_experience) -> np.ndarray:
+        """
+        :param skills_experience: Array of shape (..., 24) of experiences in highscores order, total included
+        :return: Hours of every skill with the same shape. The total column is the sum of the skills.
+        """
+        skills_experience = np.clip(np.asarray(skills_experience, dtype=np.float64), 0, _SKILL_KEY_SHIFT - 1)
+        sections = np.searchsorted(self._keys, self._skill_offsets + skills_experience, side="right") - 1
+        sections = np.maximum(sections, self._first_sections)
+        remaining_xp = skills_experience - self._thresholds[sections]
+        hours = self._cumulative_hours[sections] + remaining_xp / self._rates[sections]
+        hours[..., 0] = hours[..., 1:].sum(axis=-1)
+        return hours
+
+    def hours_to(self, skills_experience: np.ndarray, target_experience: int) -> np.ndarray:
+        """
+        :param skills_experience: Array of shape (..., 24) of experiences in highscores order, total included
+        :param target_experience: Experience to reach in every skill
+        :return: Hours needed to reach the target experience in every skill with the same shape as skills_experience.
+        Skills already past the target need 0 hours. The total column is the sum of the skills.
+        """
+        skills_experience = np.asarray(skills_experience, dtype=np.float64)
+        target = np.maximum(skills_experience, target_experience)
+        return self.skill_hours(target) - self.skill_hours(skills_experience)
+
+    def time_to_max(self, skills_experience: np.ndarray) -> np.ndarray:
+        """
+        :return: Hours needed to get level 99 in every skill, see hours_to()
+        """
+        return self.hours_to(skills_experience, MAX_SKILL_EXPERIENCE)
+
+    def time_to_200m(self, skills_experience: np.ndarray) -> np.ndarray:
+        """
+        :return: Hours needed to get 200M experience in every skill, see hours_to()
+        """
+        return self.hours_to(skills_experience, experience.MAX_EXPERIENCE)
+
+
+def get_calculator(resources: ResourceRegistry, table: str) -> EhpCalculator:
+    """
+    Get a cached calculator for an ehp table. Tables reloaded by ResourceRegistry get a new calculator.
+
+    :param resources: Registry of the ehp tables
+    :param table: Name of the ehp table, one of registry.EHP_TABLES
+    """
+    ehp_table = resources.ehp[table]
+    cached = _calculators.get(table)
+    if cached is None or cached[0] is not ehp_table:
+        cached = ehp_table, EhpCalculator(ehp_table)
+        _calculators[table] = cached
+    return cached[1]
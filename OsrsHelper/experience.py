@@ -0,0 +1,67 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import array
+import bisect
+
+MAX_LEVEL = 127
+MAX_EXPERIENCE = 200_000_000
+
+
+def _make_experience_table() -> array.array:
+    """
+    Calculate the experience required for levels 1-126 with the Runescape experience formula. Level 127 is used for
+    the maximum experience of 200M, which is also how 'max' is handled in commands.
+
+    :return: Array where index 0 is the experience required for level 1
+    """
+    experiences = array.array("l", [0])
+    points = 0
+    for level in range(1, MAX_LEVEL - 1):
+        points += int(level + 300 * 2 ** (level / 7))
+        experiences.append(points // 4)
+    experiences.append(MAX_EXPERIENCE)
+    return experiences
+
+
+EXPERIENCES = _make_experience_table()
+
+
+def experience_for_level(level: int) -> int:
+    """
+    :param level: Level in range 1-127
+    :raise ValueError: If the level is out of range
+    :return: Experience required for the level
+    """
+    if level < 1 or level > MAX_LEVEL:
+        raise ValueError(f"Level must be in range 1-{MAX_LEVEL}.")
+    return EXPERIENCES[level - 1]
+
+
+def level_for_experience(experience: int) -> int:
+    """
+    :param experience: Any amount of experience. Negative amounts are handled as 0.
+    :return: The highest level (virtual levels included) that the experience is enough for
+    """
+    return max(bisect.bisect_right(EXPERIENCES, experience), 1)
@@ -0,0 +1,335 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import time
+import urllib.parse
+from typing import Dict, Optional, Tuple
+
+from OsrsHelper import circuitbreaker, metrics
+
+
+class CachePolicy:
+    """
+    Caching rules for one endpoint.
+
+    :param ttl: Seconds a response is served from cache without contacting the upstream
+    :param stale_ttl: Additional seconds an expired response may still be served while it is refreshed in the
+    background (stale-while-revalidate). 0 disables this.
+    """
+
+    __slots__ = ("ttl", "stale_ttl")
+
+    def __init__(self, ttl: float, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+
+# Matched by the longest URL prefix. GE prices update only once a day, so the graph API can be served stale for a
+# long time while a refresh runs in the background.
+DEFAULT_POLICIES = {
+    "https://services.runescape.com/m=itemdb_oldschool/api/graph/": CachePolicy(ttl=30 * 60, stale_ttl=6 * 60 * 60),
+    "https://services.runescape.com/m=hiscore_oldschool": CachePolicy(ttl=60),
+    "https://crystalmathlabs.com/": CachePolicy(ttl=60),
+    "https://www.crystalmathlabs.com/": CachePolicy(ttl=60),
+    "https://oldschool.runescape.wiki/": CachePolicy(ttl=60 * 60),
+    "https://oldschool.runescape.com/": CachePolicy(ttl=5 * 60)
+}
+
+
+# Response of a conditional request. Text is None if the resource was not modified.
+ConditionalResponse = collections.namedtuple("ConditionalResponse", ["status", "text", "etag", "last_modified"])
+
+
+class _CacheEntry:
+
+    __slots__ = ("text", "size", "fetched_at", "policy")
+
+    def __init__(self, text: str, fetched_at: float, policy: CachePolicy):
+        self.text = text
+        self.size = len(text.encode("utf-8"))
+        self.fetched_at = fetched_at
+        self.policy = policy
+
+
+class Fetcher:
+    """
+    Bot-wide HTTP fetcher on top of a shared aiohttp session. Responses are cached per endpoint in an LRU cache that is
+    bounded by the total size of cached responses, and concurrent requests to the same URL share one upstream request.
+    Every upstream host has a circuit breaker, so that requests to a failing host fail fast and are answered from cache
+    when possible.
+    """
+
+    def __init__(self, session, policies: Dict[str, CachePolicy] = None, max_bytes: int = 32 * 1024 * 1024,
+                 shared_cache=None):
+        """
+        :param session: aiohttp.ClientSession used for all requests
+        :param policies: Cache policies by URL prefix. URLs without a matching prefix are not cached.
+        :param max_bytes: Maximum total size of cached responses before the least recently used are evicted
+        :param shared_cache: Optional sharedcache.SharedCache checked before the upstream when a response is not in
+        this cache, so that the bot processes of a sharded deployment don't fetch the same responses
+        """
+        self.session = session
+        self.shared_cache = shared_cache
+        self.policies = DEFAULT_POLICIES if policies is None else policies
+        self.max_bytes = max_bytes
+        self.cached_bytes = 0
+        self.counters = collections.Counter()
+        self._cache = collections.OrderedDict()
+        self._in_flight = {}
+        self.breakers = {}
+        # Writes to the shared cache that are still running, kept so that they aren't garbage collected
+        self._shared_sets = set()
+
+    def get_policy(self, link: str) -> Optional[CachePolicy]:
+        matches = [prefix for prefix in self.policies if link.startswith(prefix)]
+        if not matches:
+            return None
+        return self.policies[max(matches, key=len)]
+
+    def get_breaker(self, link: str) -> circuitbreaker.CircuitBreaker:
+        host = urllib.parse.urlsplit(link).netloc
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = circuitbreaker.CircuitBreaker(host)
+        return breaker
+
+    def _before_request(self, breaker: circuitbreaker.CircuitBreaker):
+        try:
+            breaker.before_request()
+        except circuitbreaker.CircuitOpenError:
+            self.counters["rejected"] += 1
+            metrics.REGISTRY.increment("http_rejected_total", (("host", breaker.host),))
+            raise
+        self.counters["upstream_requests"] += 1
+
+    def get_cached(self, link: str) -> Tuple[Optional[str], bool]:
+        """
+        Get a cached response regardless of its age.
+
+        :param link: URL of the response
+        :return: Cached response or None, and a boolean telling if the response is still within its TTL
+        """
+        entry = self._cache.get(link)
+        if entry is None:
+            return None, False
+        return entry.text, time.monotonic() - entry.fetched_at <= entry.policy.ttl
+
+    def invalidate(self, link: str):
+        entry = self._cache.pop(link, None)
+        if entry is not None:
+            self.cached_bytes -= entry.size
+
+    def _store(self, link: str, text: str, policy: CachePolicy, age: float = 0):
+        self.invalidate(link)
+        entry = _CacheEntry(text, time.monotonic() - age, policy)
+        if entry.size > self.max_bytes:
+            return
+        self._cache[link] = entry
+        self.cached_bytes += entry.size
+        while self.cached_bytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self.cached_bytes -= evicted.size
+            self.counters["evictions"] += 1
+
+    async def _get_shared(self, link: str, policy: CachePolicy) -> Optional[str]:
+        result = await self.shared_cache.get(link)
+        if result is None:
+            return None
+        remaining, text = result
+        age = policy.ttl + policy.stale_ttl - remaining
+        # Stale responses are refreshed from the upstream, otherwise background refreshes would never get a new one
+        if age > policy.ttl:
+            return None
+        self.counters["shared_hits"] += 1
+        self._store(link, text, policy, age)
+        return text
+
+    async def _set_shared(self, link: str, text: str, ttl: float):
+        try:
+            await self.shared_cache.set(link, text, ttl)
+        except Exception:
+            self.counters["shared_errors"] += 1
+
+    async def _request(self, link: str, encoding: str, timeout: float, policy: Optional[CachePolicy]) -> str:
+        if policy is not None and self.shared_cache is not None:
+            text = await self._get_shared(link, policy)
+            if text is not None:
+                return text
+
+        breaker = self.get_breaker(link)
+        self._before_request(breaker)
+        started = time.monotonic()
+        try:
+            with metrics.span("http", breaker.host):
+                async with self.session.get(link, timeout=breaker.get_timeout(timeout)) as r:
+                    resp = await r.text(encoding=encoding)
+                    status = r.status
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception:
+            self.counters["upstream_errors"] += 1
+            breaker.record_failure()
+            raise
+        if status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success(time.monotonic() - started)
+        # Server errors are not cached so the next command tries again
+        if policy is not None and status < 500:
+            self._store(link, resp, policy)
+            if self.shared_cache is not None:
+                # Not awaited, so that the caller doesn't wait for the write to the shared cache
+                task = asyncio.ensure_future(self._set_shared(link, resp, policy.ttl + policy.stale_ttl))
+                self._shared_sets.add(task)
+                task.add_done_callback(self._shared_sets.discard)
+        return resp
+
+    def _start_request(self, link: str, encoding: str, timeout: float, policy: Optional[CachePolicy]):
+        # Uncached requests are coalesced only with each other, because their responses are not stored in cache
+        key = (link, policy is not None)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return future
+
+        future = asyncio.ensure_future(self._request(link, encoding, timeout, policy))
+        self._in_flight[key] = future
+
+        def done(fut):
+            self._in_flight.pop(key, None)
+            # Background refreshes are never awaited, so retrieve the exception to avoid warnings about it
+            if not fut.cancelled():
+                fut.exception()
+
+        future.add_done_callback(done)
+        return future
+
+    async def visit_website(self, link: str, encoding: str = "utf-8", timeout: int = 5, use_cache: bool = True) -> str:
+        """
+        Visit given link to get its data for parsing purposes. A cached response is returned if the endpoint has a
+        cache policy and the response is fresh enough.
+
+        :param link: A link that should be visited
+        :param encoding: Encoding in which the API or website will respond. In some cases it can be something else than
+        UTF-8
+        :param timeout: Amount of seconds that are waited before asyncio.TimeoutError is raised if no response is given
+        :param use_cache: False to neither read nor store the response in cache, e.g. for bulk downloads that would
+        only evict the responses of commands
+        :raise Exception: Any exception that occurs during the GET (usually asyncio.TimeoutError after timeout, or its
+        subclass circuitbreaker.CircuitOpenError if the host has been failing) if there is no cached response at all
+        :return: Html response in string format
+        """
+        if not use_cache:
+            self.counters["uncached"] += 1
+            return await asyncio.shield(self._start_request(link, encoding, timeout, None))
+
+        policy = self.get_policy(link)
+        entry = self._cache.get(link)
+
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age <= entry.policy.ttl:
+                self._cache.move_to_end(link)
+                self.counters["hits"] += 1
+                return entry.text
+            if age <= entry.policy.ttl + entry.policy.stale_ttl:
+                self._cache.move_to_end(link)
+                self.counters["stale_hits"] += 1
+                self._start_request(link, encoding, timeout, policy)
+                return entry.text
+
+        self.counters["misses"] += 1
+        try:
+            # Shield the shared request so one cancelled command doesn't cancel it for every other waiter
+            return await asyncio.shield(self._start_request(link, encoding, timeout, policy))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # An expired response is better than no response when the upstream is down
+            if entry is None:
+                raise
+            self.counters["fallback_hits"] += 1
+            return entry.text
+
+    async def visit_conditional(self, link: str, etag: str = None, last_modified: str = None, encoding: str = "utf-8",
+                                timeout: int = 5) -> ConditionalResponse:
+        """
+        Visit given link with a conditional GET, so that the response has no body if it has not been modified since
+        the previous visit. The response is neither read from nor stored in cache.
+
+        :param link: A link that should be visited
+        :param etag: ETag header of the previous response or None
+        :param last_modified: Last-Modified header of the previous response or None
+        :param encoding: Encoding in which the API or website will respond
+        :param timeout: Amount of seconds that are waited before asyncio.TimeoutError is raised if no response is given
+        :raise Exception: Any exception that occurs during the GET (usually asyncio.TimeoutError after timeout, or its
+        subclass circuitbreaker.CircuitOpenError if the host has been failing)
+        :return: Status, text and validators of the response. Validators are kept from the previous response if the
+        resource was not modified.
+        """
+        headers = {}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+
+        breaker = self.get_breaker(link)
+        self._before_request(breaker)
+        started = time.monotonic()
+        try:
+            with metrics.span("http", breaker.host):
+                async with self.session.get(link, headers=headers, timeout=breaker.get_timeout(timeout)) as r:
+                    if r.status == 304:
+                        self.counters["not_modified"] += 1
+                        response = ConditionalResponse(r.status, None, etag, last_modified)
+                    else:
+                        resp = await r.text(encoding=encoding)
+                        response = ConditionalResponse(r.status, resp, r.headers.get("ETag"),
+                                                       r.headers.get("Last-Modified"))
+        except asyncio.CancelledError:
+            breaker.record_cancelled()
+            raise
+        except Exception:
+            self.counters["upstream_errors"] += 1
+            breaker.record_failure()
+            raise
+        if response.status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success(time.monotonic() - started)
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Hit, miss, coalesce and upstream request counters and the current size of the cache
+        """
+        stats = {key: self.counters[key] for key in ("hits", "stale_hits", "misses", "shared_hits", "shared_errors",
+                                                     "uncached", "fallback_hits", "coalesced", "not_modified",
+                                                     "upstream_requests", "upstream_errors", "rejected", "evictions")}
+        stats["cached_responses"] = len(self._cache)
+        stats["cached_bytes"] = self.cached_bytes
+        return stats
@@ -0,0 +1,137 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from OsrsHelper.ehp import EhpCalculator
+from OsrsHelper.highscores import Highscores, SKILL_ROWS
+
+# Marks rows that are missing from an older highscores schema. Real values are never negative after parsing.
+MISSING = -1
+RANK, LEVEL, XP = 0, 1, 2
+AMOUNT = 1
+
+
+def stack(scores: Sequence[Highscores], activity_rows: int) -> np.ndarray:
+    """
+    Stack highscores of many players into one array of shape (players, skill rows + activity rows, 3). Activity rows
+    have their rank and amount in the first two columns. Rows missing from a player's schema are filled with MISSING.
+
+    :param scores: Highscores of every player
+    :param activity_rows: Amount of activity rows in the result. Extra rows are dropped.
+    """
+    stacked = np.full((len(scores), SKILL_ROWS + activity_rows, 3), MISSING, dtype=np.int64)
+    stacked[:, SKILL_ROWS:, 2] = 0
+
+    # Players with the same schema are copied with one assignment
+    groups = {}
+    for index, player_scores in enumerate(scores):
+        groups.setdefault(player_scores.schema, []).append(index)
+    for (skill_rows, player_activity_rows), indexes in groups.items():
+        skill_rows = min(skill_rows, SKILL_ROWS)
+        player_activity_rows = min(player_activity_rows, activity_rows)
+        stacked[indexes, :skill_rows] = np.stack([scores[i].skills[:skill_rows] for i in indexes])
+        stacked[indexes, SKILL_ROWS:SKILL_ROWS + player_activity_rows, :2] = \
+            np.stack([scores[i].activities[:player_activity_rows] for i in indexes])
+    return stacked
+
+
+class GainsResult:
+    """
+    Gains of many players. Every array has the players on its first axis in the same order as usernames.
+
+    Attributes:
+        xp: Experience gained in every skill, shape (players, 24)
+        levels: Levels gained in every skill, shape (players, 24)
+        ranks: Ranks climbed in every skill and activity (positive if climbed up), shape (players, rows)
+        activities: Gained amounts of every activity (clues, mini games, bosses), shape (players, activity rows)
+        ehp: Efficient hours gained in every skill, total in the first column, shape (players, 24)
+    """
+
+    def __init__(self, usernames: List[str], old: np.ndarray, new: np.ndarray, ehp: np.ndarray):
+        self.usernames = usernames
+        difference = new - old
+        self.xp = difference[:, :SKILL_ROWS, XP]
+        self.levels = difference[:, :SKILL_ROWS, LEVEL]
+        self.ranks = -difference[..., RANK]
+        self.activities = difference[:, SKILL_ROWS:, AMOUNT]
+        self.ehp = ehp
+
+    @staticmethod
+    def top_indexes(values: np.ndarray, k: int = 10) -> np.ndarray:
+        """
+        Rank players by given values without sorting all of them.
+
+        :param values: One value per player, e.g. self.xp[:, 0] for total experience gained
+        :param k: Amount of players to return
+        :return: Indexes of the k players with the highest values in descending order of the values
+        """
+        k = min(k, len(values))
+        if k == 0:
+            return np.array([], dtype=np.intp)
+        top_indexes = np.argpartition(-values, k - 1)[:k]
+        return top_indexes[np.argsort(-values[top_indexes], kind="stable")]
+
+    def top(self, values: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        :return: (username, value) of the k players with the highest values in descending order
+        """
+        return [(self.usernames[i], values[i].item()) for i in self.top_indexes(values, k)]
+
+
+def compute_gains(usernames: List[str], old_scores: Sequence[Highscores], new_scores: Sequence[Highscores],
+                  account_types: Sequence[str] = None,
+                  ehp_calculators: Mapping[str, EhpCalculator] = None) -> GainsResult:
+    """
+    Calculate gains between old and new highscores for many players at once. The schemas of the highscores may differ
+    between players and between old and new highscores of one player. Rows missing from the old highscores are
+    handled as no gains, and rows missing from the new ones are ignored.
+
+    :param usernames: Username of every player
+    :param old_scores: Older highscores of every player
+    :param new_scores: Newer highscores of every player
+    :param account_types: Account type of every player. Needed only for ehp.
+    :param ehp_calculators: EhpCalculator for every account type. Ehp gains are 0 if not given.
+    :return: Gains of all players
+    """
+    activity_rows = max((len(scores.activities) for scores in new_scores), default=0)
+    old = stack(old_scores, activity_rows)
+    new = stack(new_scores, activity_rows)
+
+    missing = (old[..., RANK] == MISSING) | (new[..., RANK] == MISSING)
+    # If the row is missing only from the new highscores, both become MISSING and the gains are still 0
+    old = np.where(missing[..., np.newaxis], new, old)
+
+    ehp = np.zeros((len(usernames), SKILL_ROWS), dtype=np.float64)
+    if ehp_calculators and account_types is not None:
+        account_types = np.asarray(account_types)
+        for account_type, calculator in ehp_calculators.items():
+            players = account_types == account_type
+            if players.any():
+                ehp[players] = calculator.skill_hours(new[players, :SKILL_ROWS, XP]) - \
+                    calculator.skill_hours(old[players, :SKILL_ROWS, XP])
+
+    return GainsResult(list(usernames), old, new, ehp)
@@ -0,0 +1,191 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import math
+from typing import Tuple
+
+import numpy as np
+
+# The layout of the highscores api is identified by the amount of skill rows ([Rank, Level, Xp]) and activity rows
+# ([Rank, Amount], e.g. clues, mini games and bosses). New activities are always added to the end of the api response.
+HighscoresSchema = collections.namedtuple("HighscoresSchema", ["skill_rows", "activity_rows"])
+
+SKILL_ROWS = 24
+# Skills in the same order as in the highscores api
+SKILLS = ("total", "attack", "defence", "strength", "hitpoints", "ranged", "prayer", "magic", "cooking", "woodcutting",
+          "fletching", "fishing", "firemaking", "crafting", "smithing", "mining", "herblore", "agility", "thieving",
+          "slayer", "farming", "runecrafting", "hunter", "construction")
+# Users tend to use shortened names for some skills
+SKILL_ALIASES = {"att": "attack", "str": "strength", "def": "defence", "hp": "hitpoints", "range": "ranged",
+                 "pray": "prayer", "wc": "woodcutting", "fm": "firemaking", "agi": "agility", "thiev": "thieving",
+                 "rc": "runecrafting", "cons": "construction"}
+# Clue rows start after league points and two bounty hunter rows
+CLUE_ROWS = slice(3, 10)
+
+
+class Highscores:
+    """
+    Highscores of one account as int64 arrays. Ranks and values that are not on the highscores (-1 in the api) are 0.
+    """
+
+    __slots__ = ("skills", "activities")
+
+    def __init__(self, skills: np.ndarray, activities: np.ndarray):
+        """
+        :param skills: Array of shape (skill rows, 3)
+        :param activities: Array of shape (activity rows, 2)
+        """
+        self.skills = skills
+        self.activities = activities
+
+    @classmethod
+    def from_list(cls, highscores_data: list) -> "Highscores":
+        """
+        Make an instance from highscores in list format, e.g. stored in database. Values may be str or int.
+        """
+        skill_rows = 0
+        for row in highscores_data:
+            if len(row) != 3:
+                break
+            skill_rows += 1
+        skills = np.array(highscores_data[:skill_rows], dtype=np.int64).reshape(-1, 3)
+        activities = np.array(highscores_data[skill_rows:], dtype=np.int64).reshape(-1, 2)
+        return cls(skills, activities)
+
+    @property
+    def schema(self) -> HighscoresSchema:
+        return HighscoresSchema(len(self.skills), len(self.activities))
+
+    @property
+    def clues(self) -> np.ndarray:
+        return self.activities[CLUE_ROWS]
+
+    def to_list(self) -> list:
+        """
+        :return: Highscores in format [[Rank, Level, Xp], ..., [Rank, Amount], ...] with int values
+        """
+        return self.skills.tolist() + self.activities.tolist()
+
+    def combat_level(self) -> int:
+        att_lvl, def_lvl, str_lvl, hp_lvl, ranged_lvl, prayer_lvl, magic_lvl = self.skills[1:8, 1].tolist()
+
+        base_combat = 0.25 * (def_lvl + hp_lvl + math.floor(prayer_lvl / 2))
+        melee_combat = 0.325 * (att_lvl + str_lvl)
+        ranged_combat = 0.325 * math.floor((3 / 2) * ranged_lvl)
+        magic_combat = 0.325 * math.floor((3 / 2) * magic_lvl)
+        final_combat = math.floor(base_combat + max([melee_combat, ranged_combat, magic_combat]))
+        return final_combat
+
+
+def parse_highscores(raw_highscore_data: str) -> Highscores:
+    """
+    Parse the response of the highscores api (index_lite.ws) straight into int64 arrays. Every row has either three
+    (skills) or two values, so the schema is known from the amount of rows and commas without splitting the rows.
+
+    :param raw_highscore_data: Response of the api, rows separated by newlines
+    :raise ValueError: If the response is not in the highscores format
+    :return: Parsed highscores
+    """
+    raw_highscore_data = raw_highscore_data.strip()
+    rows = raw_highscore_data.count("\n") + 1
+    skill_rows = raw_highscore_data.count(",") - rows
+    values = np.fromstring(raw_highscore_data.replace("\n", ","), dtype=np.int64, sep=",")
+    if skill_rows < 0 or len(values) != skill_rows * 3 + (rows - skill_rows) * 2:
+        raise ValueError("Response is not in the highscores format.")
+
+    # If user doesn't have any highscore entry for skill/clue its returned as -1 which looks ugly in final table
+    np.maximum(values, 0, out=values)
+    skill_values = skill_rows * 3
+    return Highscores(values[:skill_values].reshape(-1, 3), values[skill_values:].reshape(-1, 2))
+
+
+def align(old: Highscores, new: Highscores) -> Tuple[Highscores, Highscores]:
+    """
+    Make old highscores comparable with newer ones that may have a different schema. Rows that didn't exist in the old
+    schema are filled with the new values so they show no gains, and rows that no longer exist are dropped.
+
+    :return: Old and new highscores with the schema of the new ones
+    """
+    if old.schema == new.schema:
+        return old, new
+
+    def fit(old_array, new_array):
+        rows = min(len(old_array), len(new_array))
+        return np.concatenate((old_array[:rows], new_array[rows:]))
+
+    return Highscores(fit(old.skills, new.skills), fit(old.activities, new.activities)), new
+
+
+class HighscoresUnavailableError(asyncio.TimeoutError):
+    """
+    Raised when the highscores api answers with a page that is not highscores, e.g. during maintenance. It is a
+    subclass of asyncio.TimeoutError, so commands answer it the same way as a slow api.
+    """
+
+
+async def get_highscores_data(fetcher, username: str, account_type: str = "normal", use_cache: bool = True):
+    """
+    Get highscore data for given user from official Old School Runescape api. The highscore type is based on given
+    account type prefix.
+
+    :param fetcher: Fetcher used to request the highscores
+    :param username: Username of the account whose highscores are wanted
+    :param account_type: Account type to determine the highscores and url type
+    :param use_cache: False to neither read nor store the response in the cache of the fetcher, e.g. for background
+    refreshes of many players
+    :raise HighscoresUnavailableError: If the response is neither highscores nor the page of a missing user
+    :return: User highscore data as a list of lists which values are in int, user combat level as an int. Both are
+    None if the user is not found from the highscores.
+    """
+
+    if account_type == "normal":
+        header = "hiscore_oldschool"
+    elif account_type == "ironman":
+        header = "hiscore_oldschool_ironman"
+    elif account_type == "uim":
+        header = "hiscore_oldschool_ultimate"
+    elif account_type == "hcim":
+        header = "hiscore_oldschool_hardcore_ironman"
+    elif account_type == "dmm":
+        header = "hiscore_oldschool_deadman"
+    elif account_type == "seasonal":
+        header = "hiscore_oldschool_seasonal"
+    elif account_type == "tournament":
+        header = "hiscore_oldschool_tournament"
+    else:
+        raise TypeError(f"Invalid account type: {account_type}")
+
+    highscores_link = f"https://services.runescape.com/m={header}/index_lite.ws?player={username}"
+    raw_highscore_data = await fetcher.visit_website(highscores_link, use_cache=use_cache)
+
+    if "<title>404 - Page not found</title>" in raw_highscore_data:
+        return None, None
+
+    try:
+        user_highscores = parse_highscores(raw_highscore_data)
+    except ValueError as e:
+        raise HighscoresUnavailableError(f"Invalid highscores response for {username}") from e
+    return user_highscores.to_list(), user_highscores.combat_level()
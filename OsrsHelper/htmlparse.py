@@ -0,0 +1,172 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import importlib.util
+import multiprocessing
+import sys
+from typing import Callable, List, Tuple
+
+from OsrsHelper import metrics
+
+# lxml is an optional and much faster parser backend. The built in html.parser is used if it isn't installed.
+DEFAULT_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+WIKI_SEARCH_RESULTS = 5
+
+NewsArticle = collections.namedtuple("NewsArticle", ["number", "type", "link"])
+
+
+def create_process_pool(max_workers: int) -> concurrent.futures.Executor:
+    """
+    Create a pool of worker processes that are not forked from the bot process. The bot process already runs threads
+    (database connections, the event loop watchdog, DNS resolving) when the pool starts, and a forked worker can
+    deadlock on a lock that one of them held.
+
+    :param max_workers: Amount of worker processes
+    :return: ProcessPoolExecutor using forkserver, or spawn where forkserver isn't available. Python 3.6 can't choose
+    the start method of the pool, so a ThreadPoolExecutor is returned there.
+    """
+    if sys.version_info < (3, 7):
+        return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers,
+                                                  mp_context=multiprocessing.get_context(start_method))
+
+
+def extract_search_results(html: str, parser: str = DEFAULT_PARSER, limit: int = WIKI_SEARCH_RESULTS) \
+        -> List[Tuple[str, str]]:
+    """
+    Extract the results of an Osrs wiki search page. Only the result headings are parsed into a tree.
+
+    :param html: Wiki search page
+    :param parser: BeautifulSoup parser backend
+    :param limit: Maximum amount of results
+    :return: List of (page title, href) tuples in the order of the search results
+    """
+    # Imported here so that only the worker processes import BeautifulSoup
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    strainer = SoupStrainer("div", attrs={"class": "mw-search-result-heading"})
+    headings = BeautifulSoup(html, parser, parse_only=strainer)
+    results = []
+    for heading in headings.find_all("div", limit=limit):
+        link = heading.find("a")
+        if link is not None and link.has_attr("href"):
+            results.append((link.get("title", link.get_text()), link["href"]))
+    return results
+
+
+def extract_news_articles(html: str, parser: str = DEFAULT_PARSER) -> List[NewsArticle]:
+    """
+    Extract the news articles of the Old School Runescape homepage. Only the article details are parsed into a tree.
+
+    :param html: Old School Runescape homepage
+    :param parser: BeautifulSoup parser backend
+    :return: List of NewsArticles. Number of the latest article is the smallest.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    strainer = SoupStrainer("div", attrs={"class": "news-article__details"})
+    details = BeautifulSoup(html, parser, parse_only=strainer)
+    articles = []
+    for div_tag in details.find_all("div"):
+        if div_tag.p is None or div_tag.p.a is None or div_tag.span is None:
+            continue
+        link = div_tag.p.a
+        # The article types in their HTML always ends in space
+        articles.append(NewsArticle(link["id"][-1], div_tag.span.get_text().strip(), link["href"]))
+    return articles
+
+
+class ParsingExecutor:
+    """
+    Runs HTML extraction functions in a pool of worker processes, so that parsing whole pages doesn't block the event
+    loop. The amount of jobs submitted at once is bounded and further jobs wait for a free slot.
+
+    :param max_workers: Amount of worker processes or threads
+    :param max_pending: Maximum amount of jobs queued or running at once
+    :param parser: BeautifulSoup parser backend passed to the extraction functions
+    :param processes: Use worker processes instead of threads. Threads still share the GIL with the event loop.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, parser: str = DEFAULT_PARSER,
+                 processes: bool = True):
+        self.max_workers = max_workers
+        self.parser = parser
+        self.processes = processes
+        self._slots = asyncio.Semaphore(max_pending)
+        self._executor = None
+        self.metrics = {"jobs": 0, "failed": 0, "waiting": 0}
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        # Workers are started on first use, so that bots that never parse pages don't start them
+        if self._executor is None:
+            if self.processes:
+                self._executor = create_process_pool(self.max_workers)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers,
+                                                                       thread_name_prefix="html")
+        return self._executor
+
+    async def run(self, func: Callable, html: str, **kwargs):
+        """
+        Run an extraction function in the pool. With worker processes the function must be defined at module level.
+
+        :param func: Function that takes the HTML as its first argument and the keyword argument parser
+        :param html: HTML to parse
+        :param kwargs: Additional keyword arguments for func
+        :return: Return value of func
+        """
+        self.metrics["waiting"] += 1
+        async with self._slots:
+            self.metrics["waiting"] -= 1
+            self.metrics["jobs"] += 1
+            job = functools.partial(func, html, parser=self.parser, **kwargs)
+            try:
+                with metrics.span("parse", func.__name__):
+                    return await asyncio.get_event_loop().run_in_executor(self._get_executor(), job)
+            except Exception:
+                self.metrics["failed"] += 1
+                raise
+
+    async def search_results(self, html: str, limit: int = WIKI_SEARCH_RESULTS) -> List[Tuple[str, str]]:
+        """
+        :return: Results of a wiki search page, see extract_search_results()
+        """
+        return await self.run(extract_search_results, html, limit=limit)
+
+    async def news_articles(self, html: str) -> List[NewsArticle]:
+        """
+        :return: News articles of the Old School Runescape homepage, see extract_news_articles()
+        """
+        return await self.run(extract_news_articles, html)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
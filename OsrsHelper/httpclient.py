@@ -0,0 +1,93 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+
+import aiohttp
+
+# The wiki asks API clients to identify themselves instead of using the default aiohttp user agent
+USER_AGENT = "OsrsHelper Discord bot (https://github.com/Visperi/OsrsHelper)"
+
+
+class ClientSettings:
+    """
+    Connection pool, keep-alive, DNS cache and timeout settings of the bot-wide aiohttp session.
+
+    :param limit: Maximum amount of simultaneous connections to all hosts
+    :param limit_per_host: Maximum amount of simultaneous connections to one host, so that a slow upstream can't take
+    the whole pool. Requests over the limit wait for a free connection.
+    :param keepalive_timeout: Seconds an idle connection is kept open for the next request to the same host
+    :param dns_cache_ttl: Seconds a resolved host name is cached. None caches forever.
+    :param connect_timeout: Seconds to wait for a free connection and connecting to the host
+    :param total_timeout: Seconds a request may take at most if the caller doesn't give a shorter timeout
+    :param compress: Ask for gzip or deflate compressed responses, which aiohttp decompresses transparently
+    :param user_agent: User-Agent header of all requests
+    """
+
+    __slots__ = ("limit", "limit_per_host", "keepalive_timeout", "dns_cache_ttl", "connect_timeout", "total_timeout",
+                 "compress", "user_agent")
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 20, keepalive_timeout: float = 30,
+                 dns_cache_ttl: int = 300, connect_timeout: float = 5, total_timeout: float = 30,
+                 compress: bool = True, user_agent: str = USER_AGENT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.total_timeout = total_timeout
+        self.compress = compress
+        self.user_agent = user_agent
+
+
+DEFAULT_SETTINGS = ClientSettings()
+
+
+def create_session(settings: ClientSettings = None, loop: asyncio.AbstractEventLoop = None) -> aiohttp.ClientSession:
+    """
+    Create an aiohttp session with a connection pool configured by given settings. The session must be closed with
+    close_session().
+
+    :param settings: Settings of the session, DEFAULT_SETTINGS by default
+    :param loop: Event loop of the session. Defaults to the current event loop.
+    :return: A new aiohttp.ClientSession
+    """
+    settings = DEFAULT_SETTINGS if settings is None else settings
+    connector = aiohttp.TCPConnector(limit=settings.limit, limit_per_host=settings.limit_per_host,
+                                     keepalive_timeout=settings.keepalive_timeout, use_dns_cache=True,
+                                     ttl_dns_cache=settings.dns_cache_ttl, loop=loop)
+    timeout = aiohttp.ClientTimeout(total=settings.total_timeout, connect=settings.connect_timeout)
+    headers = {"User-Agent": settings.user_agent,
+               "Accept-Encoding": "gzip, deflate" if settings.compress else "identity"}
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers, loop=loop)
+
+
+async def close_session(session: aiohttp.ClientSession):
+    """
+    Close the session and its pooled connections. Waits a moment afterwards, because aiohttp closes SSL connections
+    only after the event loop has run once more and would warn about unclosed transports if the loop was closed
+    immediately.
+    """
+    await session.close()
+    await asyncio.sleep(0.25)
@@ -0,0 +1,196 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import bisect
+import collections
+import re
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from OsrsHelper.clueindex import normalize, trigrams
+from OsrsHelper.database import ConnectionPool
+
+ItemMatch = collections.namedtuple("ItemMatch", ["name", "item_id", "score"])
+
+# User created item keys (aliases) for item names, e.g. "whip" for "Abyssal whip"
+ITEM_KEYS_TABLE = """CREATE TABLE IF NOT EXISTS item_keys (
+                         ITEM_KEY VARCHAR(100) NOT NULL PRIMARY KEY,
+                         NAME VARCHAR(100) NOT NULL);"""
+
+SUGGESTION_THRESHOLD = 0.25
+# A search that is not an item name or key is resolved to the best match only if it is good enough and clearly
+# better than the second best
+RESOLVE_THRESHOLD = 0.5
+RESOLVE_MARGIN = 0.1
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9+]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split normalized text into words and numbers, e.g. "dragon dagger(p++)" to ["dragon", "dagger", "p++"].
+    """
+    return _TOKEN_PATTERN.findall(text)
+
+
+class ItemIndex:
+    """
+    In-memory index of tradeable item names and user created item keys. Searches that are not exact item names or keys
+    are scored by how many of their words start some word of the item name and by the trigram similarity of the whole
+    names, so abbreviated and misspelled searches still find the item.
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, int]] = (), item_keys: Mapping[str, str] = None):
+        """
+        :param items: (item name, item id) of all tradeable items
+        :param item_keys: Item names by item key
+        """
+        self.names = []
+        self.item_ids = []
+        self._exact = {}
+        trigram_postings = collections.defaultdict(list)
+        token_postings = collections.defaultdict(set)
+        trigram_counts = []
+        for item_name, item_id in items:
+            index = len(self.names)
+            key = normalize(item_name)
+            self.names.append(item_name)
+            self.item_ids.append(int(item_id))
+            self._exact.setdefault(key, index)
+            key_trigrams = trigrams(key)
+            for trigram in key_trigrams:
+                trigram_postings[trigram].append(index)
+            trigram_counts.append(len(key_trigrams))
+            for token in tokenize(key):
+                token_postings[token].add(index)
+
+        self._trigram_postings = {trigram: np.array(indexes, dtype=np.int32)
+                                  for trigram, indexes in trigram_postings.items()}
+        self._trigram_counts = np.array(trigram_counts, dtype=np.int32)
+        # Sorted tokens so that all tokens with the same prefix are next to each other
+        self._tokens = sorted(token_postings)
+        self._token_postings = [np.array(sorted(token_postings[token]), dtype=np.int32) for token in self._tokens]
+
+        self.item_keys = {}
+        for item_key, item_name in (item_keys or {}).items():
+            index = self._exact.get(normalize(item_name))
+            if index is not None:
+                self.item_keys[normalize(item_key)] = index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _match(self, index: int, score: float) -> ItemMatch:
+        return ItemMatch(self.names[index], self.item_ids[index], score)
+
+    def _token_hits(self, token: str) -> np.ndarray:
+        start = bisect.bisect_left(self._tokens, token)
+        end = bisect.bisect_left(self._tokens, token + "\uffff", lo=start)
+        if start == end:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(self._token_postings[start:end]))
+
+    def scores(self, search: str) -> np.ndarray:
+        """
+        :return: Similarity between 0 and 1 of given search and every item name
+        """
+        key = normalize(search)
+        search_trigrams = trigrams(key)
+        postings = [self._trigram_postings[trigram] for trigram in search_trigrams if trigram in self._trigram_postings]
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.names)) if postings \
+            else np.zeros(len(self.names))
+        dice = 2 * shared / (len(search_trigrams) + self._trigram_counts)
+
+        tokens = tokenize(key)
+        if not tokens:
+            return dice
+        token_hits = [self._token_hits(token) for token in tokens]
+        matched_tokens = np.bincount(np.concatenate(token_hits), minlength=len(self.names))
+        return (dice + matched_tokens / len(tokens)) / 2
+
+    def suggest(self, search: str, limit: int = 5, threshold: float = SUGGESTION_THRESHOLD) -> List[ItemMatch]:
+        """
+        :return: Items most similar to given search ordered by descending score. Equal scores are ordered by the
+        shorter name first.
+        """
+        if not self.names:
+            return []
+        scores = self.scores(search)
+        candidates = np.flatnonzero(scores >= threshold)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = sorted(candidates.tolist(), key=lambda index: (-scores[index], len(self.names[index]), index))
+        return [self._match(index, float(scores[index])) for index in ranked]
+
+    def get_item(self, item_name: str) -> Optional[ItemMatch]:
+        """
+        :return: The item with exactly given name (case insensitive) or None
+        """
+        index = self._exact.get(normalize(item_name))
+        return None if index is None else self._match(index, 1.0)
+
+    def resolve(self, search: str) -> Optional[ItemMatch]:
+        """
+        Find the item meant by given search. Exact item names are preferred over item keys, and item keys over
+        similar names.
+
+        :return: The matching item or None if no item matched well enough
+        """
+        key = normalize(search)
+        index = self._exact.get(key)
+        if index is None:
+            index = self.item_keys.get(key)
+        if index is not None:
+            return self._match(index, 1.0)
+
+        suggestions = self.suggest(key, limit=2, threshold=RESOLVE_THRESHOLD)
+        if not suggestions:
+            return None
+        if len(suggestions) == 1 or suggestions[0].score - suggestions[1].score >= RESOLVE_MARGIN:
+            return suggestions[0]
+        return None
+
+
+async def setup(db: ConnectionPool):
+    await db.execute(ITEM_KEYS_TABLE)
+
+
+async def get_item_keys(db: ConnectionPool) -> Dict[str, str]:
+    """
+    :return: Item names by item key
+    """
+    rows = await db.fetchall("SELECT ITEM_KEY, NAME FROM item_keys;")
+    return {item_key: item_name for item_key, item_name in rows}
+
+
+async def add_item_key(db: ConnectionPool, item_key: str, item_name: str):
+    await db.execute("INSERT INTO item_keys (ITEM_KEY, NAME) VALUES (%s, %s);", [normalize(item_key), item_name])
+
+
+async def remove_item_key(db: ConnectionPool, item_key: str) -> bool:
+    """
+    :return: True if the key existed
+    """
+    return await db.execute("DELETE FROM item_keys WHERE ITEM_KEY = %s;", [normalize(item_key)]) > 0
@@ -0,0 +1,88 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from typing import List
+
+from OsrsHelper import sharedcache
+
+
+def split_shards(shard_count: int, workers: int) -> List[List[int]]:
+    """
+    :return: Shard ids of every worker. Shards are dealt in turns so that the workers get as many shards as possible.
+    """
+    return [list(range(worker, shard_count, workers)) for worker in range(workers)]
+
+
+def run_worker(name: str, shard_ids: List[int], shard_count: int, worker: int, shared_cache_path: str):
+    # Imported in the worker so that the bot and its event loop are created in the worker process
+    from OsrsHelper import main
+    main.run(name, shard_ids=shard_ids, shard_count=shard_count, worker=worker, shared_cache_path=shared_cache_path)
+
+
+def launch(name: str, shard_count: int, workers: int, shared_cache_path: str = sharedcache.DEFAULT_PATH):
+    """
+    Run the bot in several processes, each running its share of the shards, and a shared cache process for the HTTP
+    responses. Blocks until every worker has exited. Requires Unix sockets.
+
+    :param name: Name of the bot token in credentials.json
+    :param shard_count: Total amount of shards
+    :param workers: Amount of worker processes, at most shard_count
+    :param shared_cache_path: Path of the Unix socket of the shared cache
+    """
+    if os.path.exists(shared_cache_path):
+        os.remove(shared_cache_path)
+    cache_process = multiprocessing.Process(target=sharedcache.run_server, args=(shared_cache_path,),
+                                            name="shared-cache", daemon=True)
+    cache_process.start()
+    while not os.path.exists(shared_cache_path) and cache_process.is_alive():
+        time.sleep(0.05)
+
+    processes = []
+    for worker, shard_ids in enumerate(split_shards(shard_count, min(workers, shard_count))):
+        process = multiprocessing.Process(target=run_worker, name=f"shards-{worker}",
+                                          args=(name, shard_ids, shard_count, worker, shared_cache_path))
+        process.start()
+        processes.append(process)
+    try:
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        cache_process.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the bot shards in several processes with a shared cache.")
+    parser.add_argument("name", nargs="?", default="development", help="Name of the bot token in credentials.json")
+    parser.add_argument("--shards", type=int, default=2, help="Total amount of shards")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Amount of worker processes")
+    parser.add_argument("--cache-path", default=sharedcache.DEFAULT_PATH, help="Unix socket of the shared cache")
+    args = parser.parse_args()
+    launch(args.name, args.shards, args.workers, args.cache_path)
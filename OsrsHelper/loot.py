@@ -0,0 +1,231 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import collections
+import math
+from typing import List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+# Most common nicknames of the bosses in drop_rates.json
+BOSS_ALIASES = {"corp": "corporeal beast", "corpo": "corporeal beast", "cerb": "cerberus", "sire": "abyssal sire",
+                "kq": "kalphite queen", "bando": "general graardor", "bandos": "general graardor", "mole": "giant mole",
+                "kbd": "king black dragon", "kreearra": "kree'arra", "arma": "kree'arra",
+                "thermo": "thermonuclear smoke devil", "vetion": "vet'ion", "zilyana": "commander zilyana",
+                "sara": "commander zilyana", "zily": "commander zilyana", "zammy": "k'ril tsutsaroth",
+                "hydra": "alchemical hydra", "cox": "chambers of xeric", "raid": "chambers of xeric",
+                "raids": "chambers of xeric", "raids 1": "chambers of xeric", "olm": "chambers of xeric"}
+
+# The drop rates of the Chambers of Xeric uniques in drop_rates.json are per point. The chance of any unique is the
+# points times the sum of the rates, capped to COX_MAX_UNIQUE_CHANCE.
+COX_MAX_UNIQUE_CHANCE = 0.657
+COX_DEFAULT_POINTS = 30000
+COX_PET = "Olmlet"
+
+CONFIDENCES = (0.5, 0.9, 0.99)
+# Exclusive tables larger than this are too slow for the inclusion-exclusion formula, so only Monte Carlo can tell
+# the chance of completing them
+MAX_EXACT_EXCLUSIVE_ITEMS = 16
+
+LootSimulation = collections.namedtuple("LootSimulation", ["chance_of_any", "expected_counts", "chance_of_all"])
+
+
+class DropTable:
+    """
+    Drops rolled once per kill. Items of an exclusive table are rolled together so that at most one of them is dropped
+    per kill (e.g. the unique table of a raid). Items of a non-exclusive table are all rolled independently.
+    """
+
+    __slots__ = ("names", "rates", "exclusive")
+
+    def __init__(self, names: Sequence[str], rates: Sequence[float], exclusive: bool = False):
+        self.names = list(names)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.exclusive = exclusive
+        if exclusive and self.rates.sum() > 1:
+            raise ValueError("Drop rates of an exclusive table can't sum up to more than 1")
+
+    def chance_of_all(self, kills: int) -> float:
+        """
+        :return: Chance to get every item of the table at least once, or NaN if the table is exclusive and too large
+        to calculate exactly
+        """
+        if not self.exclusive:
+            return float(np.prod(-np.expm1(kills * np.log1p(-self.rates))))
+        if len(self.rates) > MAX_EXACT_EXCLUSIVE_ITEMS:
+            return float("nan")
+        # Inclusion-exclusion over the subsets of items that are never dropped. The chance that none of the items in
+        # a subset drops in one kill is 1 - sum of their rates.
+        masks = np.arange(2 ** len(self.rates))
+        bits = (masks[:, None] >> np.arange(len(self.rates))) & 1
+        signs = np.where(bits.sum(axis=1) % 2, -1.0, 1.0)
+        subset_rates = np.minimum(bits @ self.rates, 1.0)
+        return float(np.clip(np.sum(signs * np.power(1.0 - subset_rates, kills)), 0.0, 1.0))
+
+    def simulate_counts(self, kills: int, trials: int, random_state: np.random.RandomState) -> np.ndarray:
+        """
+        :return: Amount of every item got in `kills` kills in each of the trials, shape (trials, items)
+        """
+        if not self.exclusive:
+            return random_state.binomial(kills, self.rates, size=(trials, len(self.rates)))
+        probabilities = np.append(self.rates, max(1 - self.rates.sum(), 0.0))
+        return random_state.multinomial(kills, probabilities, size=trials)[:, :-1]
+
+    def simulate_completion(self, trials: int, random_state: np.random.RandomState) -> np.ndarray:
+        """
+        :return: Amount of kills needed to get every item of the table at least once in each of the trials
+        """
+        if not self.exclusive:
+            return random_state.geometric(self.rates, size=(trials, len(self.rates))).max(axis=1)
+
+        # Kills between two drops from the table are geometric, so only the drops need to be simulated
+        drop_rate = self.rates.sum()
+        item_probabilities = self.rates / drop_rate
+        kills = np.zeros(trials, dtype=np.int64)
+        collected = np.zeros((trials, len(self.rates)), dtype=bool)
+        incomplete = np.arange(trials)
+        while len(incomplete):
+            kills[incomplete] += random_state.geometric(drop_rate, size=len(incomplete))
+            items = random_state.choice(len(self.rates), size=len(incomplete), p=item_probabilities)
+            collected[incomplete, items] = True
+            incomplete = incomplete[~collected[incomplete].all(axis=1)]
+        return kills
+
+
+class BossLoot:
+    """
+    Loot probability engine for the unique drops of one boss. Chances of single items are calculated in closed form for
+    all items at once. Completing the whole collection log is calculated exactly when possible, and every statistic
+    can also be estimated with a Monte Carlo simulation.
+    """
+
+    def __init__(self, tables: Sequence[DropTable]):
+        self.tables = [table for table in tables if table.names]
+        self.names = [name for table in self.tables for name in table.names]
+        self.rates = np.concatenate([table.rates for table in self.tables]) if self.tables else np.empty(0)
+
+    @classmethod
+    def from_rates(cls, drop_rates: Mapping[str, float], exclusive_items: Sequence[str] = ()) -> "BossLoot":
+        """
+        :param drop_rates: Drop rate of every item as float
+        :param exclusive_items: Items that are rolled from the same exclusive table. Others are independent.
+        """
+        exclusive = [name for name in drop_rates if name in exclusive_items]
+        independent = [name for name in drop_rates if name not in exclusive_items]
+        return cls([DropTable(exclusive, [drop_rates[name] for name in exclusive], exclusive=True),
+                    DropTable(independent, [drop_rates[name] for name in independent])])
+
+    @classmethod
+    def chambers_of_xeric(cls, drop_rates: Mapping[str, float], points: int = COX_DEFAULT_POINTS) -> "BossLoot":
+        """
+        :param drop_rates: Drop rates of CoX per point
+        :param points: Total points of the raid
+        """
+        uniques = [name for name in drop_rates if name != COX_PET]
+        unique_rates = np.array([drop_rates[name] for name in uniques]) * points
+        # Above the cap every unique and the pet become equally less likely
+        scale = min(1.0, COX_MAX_UNIQUE_CHANCE / unique_rates.sum()) if unique_rates.sum() else 1.0
+        tables = [DropTable(uniques, unique_rates * scale, exclusive=True)]
+        if COX_PET in drop_rates:
+            # The pet is rolled only when a unique is dropped, but it is counted as independent with the same average
+            # rate
+            tables.append(DropTable([COX_PET], [drop_rates[COX_PET] * points * scale]))
+        return cls(tables)
+
+    def chance_of_any(self, kills: int) -> np.ndarray:
+        """
+        :return: Chance to get each item at least once in given amount of kills
+        """
+        return -np.expm1(kills * np.log1p(-self.rates))
+
+    def expected_counts(self, kills: int) -> np.ndarray:
+        return kills * self.rates
+
+    def kills_for_chance(self, confidence: float) -> np.ndarray:
+        """
+        :return: Kills needed for each item to have at least `confidence` chance to get it at least once
+        """
+        return np.ceil(np.log1p(-confidence) / np.log1p(-self.rates)).astype(np.int64)
+
+    def chance_of_all(self, kills: int) -> float:
+        """
+        :return: Chance to get every item at least once in given amount of kills, or NaN if it can't be calculated
+        exactly
+        """
+        return float(np.prod([table.chance_of_all(kills) for table in self.tables]))
+
+    def kills_for_all(self, confidence: float) -> int:
+        """
+        :return: Kills needed to have at least `confidence` chance to get every item, or -1 if the chance can't be
+        calculated exactly
+        """
+        if math.isnan(self.chance_of_all(1)):
+            return -1
+        low = 0
+        high = int(self.kills_for_chance(confidence).max())
+        while self.chance_of_all(high) < confidence:
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.chance_of_all(middle) >= confidence:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def simulate(self, kills: int, trials: int = 10000, seed: int = None) -> LootSimulation:
+        """
+        Estimate the chances of getting each item and all items, and the expected amounts of items with a Monte Carlo
+        simulation of `trials` players doing `kills` kills each.
+        """
+        random_state = np.random.RandomState(seed)
+        counts = np.concatenate([table.simulate_counts(kills, trials, random_state) for table in self.tables],
+                                axis=1)
+        got_item = counts > 0
+        return LootSimulation(got_item.mean(axis=0), counts.mean(axis=0), float(got_item.all(axis=1).mean()))
+
+    def simulate_kills_for_all(self, confidences: Sequence[float] = CONFIDENCES, trials: int = 10000,
+                               seed: int = None) -> List[int]:
+        """
+        Estimate the kills needed to get every item with given confidences with a Monte Carlo simulation.
+        """
+        random_state = np.random.RandomState(seed)
+        completion = np.max([table.simulate_completion(trials, random_state) for table in self.tables], axis=0)
+        percentiles = [confidence * 100 for confidence in confidences]
+        return [int(kills) for kills in np.ceil(np.percentile(completion, percentiles))]
+
+    def every_drop(self, kills: int) -> Tuple[float, List[int]]:
+        """
+        Calculate the chance to get every item in given kills and the kills needed to get every item with the
+        confidences in CONFIDENCES. Both are simulated if they can't be calculated exactly. This takes up to a few
+        hundred milliseconds for large tables, so commands run it in an executor.
+
+        :return: Chance to get every item and the kills needed for each confidence
+        """
+        chance_of_all = self.chance_of_all(kills)
+        kills_for_all = [self.kills_for_all(confidence) for confidence in CONFIDENCES]
+        if -1 in kills_for_all:
+            chance_of_all = self.simulate(kills).chance_of_all
+            kills_for_all = self.simulate_kills_for_all()
+        return chance_of_all, kills_for_all
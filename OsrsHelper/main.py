@@ -22,17 +22,34 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import time
+# Taken before the heavy imports below so that they are included in the startup time
+_STARTED = time.perf_counter()
 import json
+import os
 import discord
 from discord.ext import commands
 import traceback
-import aiohttp
-from OsrsHelper import database
+import functools
+from typing import List
+from OsrsHelper import database, fetcher, htmlparse, httpclient, metrics, registry, sharedcache, startup, watchdog
 
 VERSION_NUMBER = "1.1.0"
-bot = commands.Bot(command_prefix="!")
+# Reload resource files automatically when they are modified while the bot is running
+WATCH_RESOURCES = False
+# Serve the metrics in Prometheus text format at http://127.0.0.1:METRICS_PORT/metrics. None disables the endpoint.
+# Shard workers started by launcher.py serve at METRICS_PORT + worker number.
+METRICS_PORT = None
+# Report callbacks that block the event loop for longer than this many seconds. None disables the watchdog, which can
+# also be toggled at runtime with command 'watchdog'.
+WATCHDOG_THRESHOLD = 0.25
+# Connection pool limits, keep-alive, DNS cache and timeouts of the HTTP session shared by all cogs
+HTTP_CLIENT_SETTINGS = httpclient.ClientSettings()
+# Runs all shards in this process unless shard ids are given to run()
+bot = commands.AutoShardedBot(command_prefix="!")
 # bot.remove_command("help")
 initial_extensions = ["cogs.discord_cog", "cogs.osrs", "cogs.error_handler", "cogs.items", "cogs.clues", "cogs.misc"]
+startup_timer = startup.StartupTimer(_STARTED)
 
 
 @bot.event
@@ -42,16 +59,24 @@ async def on_ready():
     print("|{:^26}|".format(bot.user.id))
     print("+{}+".format(26 * "-"))
     await bot.change_presence(activity=discord.Game("Say !help"))
+    # on_ready is dispatched again after reconnects
+    if "ready" not in startup_timer.phases:
+        startup_timer.mark("ready")
+        print(f"Started in {startup_timer.format()}")
+        bot.loop.create_task(warm_up_cogs())
 
 
-# noinspection PyBroadException
-def run(name: str):
-    with open("resources\\credentials.json") as credential_file:
-        credentials = json.load(credential_file)
+async def warm_up_cogs():
+    """
+    Load the data that cogs would otherwise load lazily on the first command, now that the bot is already answering.
+    """
+    warm_ups = {name: cog.warm_up() for name, cog in bot.cogs.items() if hasattr(cog, "warm_up")}
+    durations = await startup.warm_up(warm_ups)
+    print("Warmed up " + ", ".join(f"{name} in {seconds:.2f} s" for name, seconds in durations.items()))
 
-    bot_token = credentials["tokens"][name]
-    db_password = credentials["database"]["password"]
 
+# noinspection PyBroadException
+def load_extensions():
     for extension in initial_extensions:
         try:
             bot.load_extension(extension)
@@ -59,11 +84,93 @@ def run(name: str):
             print(f"Failed to load extension {extension}")
             traceback.print_exc()
 
+
+async def start(token: str):
+    """
+    Log in, load the extensions and connect to the gateway. The extension modules are imported in a thread while
+    waiting for the login response, after which loading them only initializes the cogs.
+
+    :param token: Bot token
+    """
+    await startup.overlap_imports(initial_extensions, bot.login(token))
+    startup_timer.mark("login")
+    # Extensions are loaded last because cogs may use the bot attributes already when they are initialized
+    load_extensions()
+    startup_timer.mark("extensions")
+    await bot.connect(reconnect=True)
+
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+
+
+@bot.after_invoke
+async def record_command_duration(ctx):
+    # After invoke hooks are called also when the command raised an exception
+    started_at = getattr(ctx, "started_at", None)
+    if started_at is not None:
+        bot.metrics.observe("command_duration_seconds", time.perf_counter() - started_at,
+                            (("command", ctx.command.qualified_name),))
+
+
+def get_command_names() -> dict:
+    return {command.callback.__code__: command.qualified_name for command in bot.walk_commands()}
+
+
+def run(name: str, shard_ids: List[int] = None, shard_count: int = None, worker: int = 0,
+        shared_cache_path: str = None):
+    """
+    Start the bot and block until it is closed.
+
+    :param name: Name of the bot token in credentials.json
+    :param shard_ids: Shards run by this process. All shards are run by default.
+    :param shard_count: Total amount of shards in all processes. Required with shard_ids.
+    :param worker: Number of this process among the shard workers. Background jobs run only in worker 0.
+    :param shared_cache_path: Unix socket of a shared cache server used by all shard workers, or None
+    """
+    startup_timer.mark("imports")
+    with open(os.path.join("resources", "credentials.json")) as credential_file:
+        credentials = json.load(credential_file)
+
+    bot_token = credentials["tokens"][name]
+    db_password = credentials["database"]["password"]
+    db_pool_size = credentials["database"].get("pool_size", 5)
+
     bot.VERSION_NUMBER = VERSION_NUMBER
-    bot.aiohttp_session = aiohttp.ClientSession(loop=bot.loop)
-    bot.db = database.connect(db_password)
-    bot.cursor = bot.db.cursor()
-    bot.run(bot_token, reconnect=True)
+    bot.shard_ids = shard_ids
+    bot.shard_count = shard_count
+    # Tracking, price ingest and other jobs that write or fetch the same data for every guild run only once
+    bot.primary = worker == 0
+    bot.metrics = metrics.REGISTRY
+    bot.loop.create_task(metrics.sample_loop_lag(bot.metrics))
+    if METRICS_PORT is not None:
+        bot.loop.create_task(metrics.serve(bot.metrics, port=METRICS_PORT + worker))
+    bot.watchdog = watchdog.LoopWatchdog(threshold=WATCHDOG_THRESHOLD or 0.25, registry=bot.metrics,
+                                         get_command_names=get_command_names)
+    if WATCHDOG_THRESHOLD is not None:
+        bot.watchdog.start()
+    bot.resources = registry.ResourceRegistry("resources")
+    bot.resources.load()
+    if WATCH_RESOURCES:
+        bot.loop.create_task(bot.resources.watch())
+    bot.aiohttp_session = httpclient.create_session(HTTP_CLIENT_SETTINGS, loop=bot.loop)
+    shared_cache = sharedcache.SharedCache(shared_cache_path) if shared_cache_path is not None else None
+    bot.fetcher = fetcher.Fetcher(bot.aiohttp_session, shared_cache=shared_cache)
+    bot.html_parser = htmlparse.ParsingExecutor()
+    bot.db = database.ConnectionPool(functools.partial(database.connect, db_password), size=db_pool_size)
+
+    startup_timer.mark("setup")
+
+    try:
+        bot.loop.run_until_complete(start(bot_token))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bot.loop.run_until_complete(bot.logout())
+        bot.loop.run_until_complete(httpclient.close_session(bot.aiohttp_session))
+        bot.html_parser.close()
+        bot.db.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,233 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import bisect
+import time
+from typing import Dict, List, Tuple
+
+# Upper bounds of the histogram buckets in seconds. The last bucket is unbounded.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PREFIX = "osrshelper_"
+
+
+class Histogram:
+    """
+    Histogram of durations in fixed buckets. Quantiles are estimated as the upper bound of the bucket
+    they fall in.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "total", "max")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        :param q: Quantile between 0 and 1
+        :return: Upper bound of the bucket of the quantile, or the largest value if it is in the unbounded bucket
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for upper_bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(upper_bound, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class _Span:
+    __slots__ = ("registry", "name", "target", "started")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, target: str):
+        self.registry = registry
+        self.name = name
+        self.target = target
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        labels = (("span", self.name), ("target", self.target))
+        self.registry.observe("span_duration_seconds", time.perf_counter() - self.started, labels)
+        # Cancelled commands are not errors of the upstream
+        if exc_type is not None and exc_type is not asyncio.CancelledError:
+            self.registry.increment("span_errors_total", labels + (("error", exc_type.__name__),))
+        return False
+
+
+class MetricsRegistry:
+    """
+    Counters and duration histograms of the whole bot, labeled with sorted (name, value) tuples. Spans time blocks of
+    code, e.g. HTTP requests, database queries, parsing and rendering, and count the exceptions raised from them.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.started_at = time.time()
+
+    def observe(self, name: str, value: float, labels: Tuple[Tuple[str, str], ...] = ()):
+        key = name, labels
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def increment(self, name: str, labels: Tuple[Tuple[str, str], ...] = (), amount: int = 1):
+        key = name, labels
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def span(self, name: str, target: str = "") -> _Span:
+        """
+        Time a block of code with `with registry.span("http", host):`. Works around awaits too.
+
+        :param name: Kind of the work, e.g. "http", "sql", "parse" or "render"
+        :param target: What the work was done for, e.g. the host of a request
+        """
+        return _Span(self, name, target)
+
+    def get_histograms(self, name: str) -> Dict[Tuple[Tuple[str, str], ...], Histogram]:
+        """
+        :return: Histograms of given metric by their labels
+        """
+        return {labels: histogram for (metric, labels), histogram in self.histograms.items() if metric == name}
+
+    def get_counters(self, name: str) -> Dict[Tuple[Tuple[str, str], ...], int]:
+        """
+        :return: Counters of given metric by their labels
+        """
+        return {labels: count for (metric, labels), count in self.counters.items() if metric == name}
+
+    def render_prometheus(self) -> str:
+        """
+        :return: All metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for name in sorted({metric for metric, _ in self.counters}):
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            for labels, count in sorted(self.get_counters(name).items()):
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {count}")
+        for name in sorted({metric for metric, _ in self.histograms}):
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for labels, histogram in sorted(self.get_histograms(name).items()):
+                cumulative = 0
+                for upper_bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    bucket_labels = labels + (("le", "+Inf" if upper_bound == float("inf") else repr(upper_bound)),)
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram.total}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+        lines.append(f"# TYPE {PREFIX}uptime_seconds gauge")
+        lines.append(f"{PREFIX}uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, name: str, *label_names: str) -> List[tuple]:
+        """
+        :param name: Name of a histogram metric
+        :param label_names: Labels whose values identify the rows, e.g. "command"
+        :return: (label values joined with spaces, count, mean, 50th percentile, 95th percentile, max) rows ordered by
+        the total time
+        """
+        rows = []
+        for labels, histogram in self.get_histograms(name).items():
+            labels = dict(labels)
+            value = " ".join(str(labels.get(label_name, "")) for label_name in label_names)
+            rows.append((value, histogram.count, histogram.mean, histogram.quantile(0.5), histogram.quantile(0.95),
+                         histogram.max, histogram.total))
+        rows.sort(key=lambda row: -row[-1])
+        return [row[:-1] for row in rows]
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    formatted = ",".join('{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                         for key, value in labels)
+    return "{" + formatted + "}"
+
+
+# Metrics of the whole bot. Modules record into this, and main.run exposes it as bot.metrics.
+REGISTRY = MetricsRegistry()
+
+
+def span(name: str, target: str = "") -> _Span:
+    """
+    Time a block of code in the bot-wide registry, see MetricsRegistry.span().
+    """
+    return REGISTRY.span(name, target)
+
+
+async def sample_loop_lag(registry: MetricsRegistry = REGISTRY, interval: float = 0.5):
+    """
+    Record how late the event loop wakes up from sleeps into histogram event_loop_lag_seconds forever.
+
+    :param registry: Registry for the lag histogram
+    :param interval: Seconds between two samples
+    """
+    loop = asyncio.get_event_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        registry.observe("event_loop_lag_seconds", max(loop.time() - started - interval, 0.0))
+
+
+async def serve(registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 9100):
+    """
+    Serve the metrics in the Prometheus text format at http://host:port/metrics until cancelled.
+    """
+    # Imported here because the endpoint is disabled by default
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=registry.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,264 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import datetime
+import json
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from OsrsHelper.database import ConnectionPool
+from OsrsHelper.fetcher import Fetcher
+from OsrsHelper.htmlparse import NewsArticle
+from OsrsHelper.sharedcache import SharedCache
+
+OSRS_HOMEPAGE = "https://oldschool.runescape.com/"
+# Key of the latest articles in the shared cache of the shard workers, and how long they are kept there. The leader
+# stores them again after every successful poll.
+SHARED_ARTICLES_KEY = "news:articles"
+SHARED_ARTICLES_TTL = 24 * 60 * 60
+
+# The channel of each guild where new articles are sent
+NEWS_SUBSCRIPTIONS_TABLE = """CREATE TABLE IF NOT EXISTS news_subscriptions (
+                                  GUILD_ID BIGINT NOT NULL PRIMARY KEY,
+                                  CHANNEL_ID BIGINT NOT NULL);"""
+
+
+async def setup(db: ConnectionPool):
+    await db.execute(NEWS_SUBSCRIPTIONS_TABLE)
+
+
+async def get_subscriptions(db: ConnectionPool) -> Dict[int, int]:
+    """
+    :return: Channel ids by guild id
+    """
+    rows = await db.fetchall("SELECT GUILD_ID, CHANNEL_ID FROM news_subscriptions;")
+    return {int(guild_id): int(channel_id) for guild_id, channel_id in rows}
+
+
+async def add_subscription(db: ConnectionPool, guild_id: int, channel_id: int):
+    await db.execute("REPLACE INTO news_subscriptions (GUILD_ID, CHANNEL_ID) VALUES (%s, %s);", [guild_id, channel_id])
+
+
+async def remove_subscription(db: ConnectionPool, guild_id: int) -> bool:
+    """
+    :return: True if the guild was subscribed
+    """
+    return await db.execute("DELETE FROM news_subscriptions WHERE GUILD_ID = %s;", [guild_id]) > 0
+
+
+class NewsPoller:
+    """
+    Background task that polls the Old School Runescape homepage for news with conditional requests, keeps the latest
+    articles in memory for commands and sends new articles to the subscribed channels. Articles on the homepage when
+    the poller starts are not sent.
+
+    With several shard workers only the leader polls the homepage and stores the articles in the shared cache. The
+    other workers poll the shared cache instead, and send the new articles to the subscribed channels of their shards.
+    """
+
+    def __init__(self, db: ConnectionPool, fetcher: Fetcher,
+                 parse_articles: Callable[[str], Awaitable[List[NewsArticle]]],
+                 publish: Callable[[int, NewsArticle], Awaitable] = None, url: str = OSRS_HOMEPAGE,
+                 interval: float = 5 * 60, shared_cache: SharedCache = None, leader: bool = True):
+        """
+        :param db: Connection pool to the bot database
+        :param fetcher: Fetcher used for the conditional requests
+        :param parse_articles: Coroutine function extracting the articles from the homepage, e.g.
+        ParsingExecutor.news_articles
+        :param publish: Coroutine function taking a channel id and a new article and sending it to the channel
+        :param url: Url of the homepage
+        :param interval: Seconds between two polls
+        :param shared_cache: Shared cache of the shard workers or None
+        :param leader: False if another shard worker polls the homepage and the articles are read from shared_cache
+        """
+        self.db = db
+        self.fetcher = fetcher
+        self.parse_articles = parse_articles
+        self.publish = publish
+        self.url = url
+        self.interval = interval
+        self.shared_cache = shared_cache
+        self.leader = leader
+        self.articles = []
+        self.polled_at = None
+        self.subscriptions = None
+        self._etag = None
+        self._last_modified = None
+        self._seen_links = set()
+        self._setup_lock = asyncio.Lock()
+        self._task = None
+        self.metrics = {"polls": 0, "not_modified": 0, "changed": 0, "failed": 0, "new_articles": 0, "published": 0,
+                        "publish_failed": 0}
+
+    async def _ensure_setup(self):
+        if self.subscriptions is None:
+            async with self._setup_lock:
+                if self.subscriptions is None:
+                    await setup(self.db)
+                    self.subscriptions = await get_subscriptions(self.db)
+
+    async def subscribe(self, guild_id: int, channel_id: int):
+        """
+        Send new articles to given channel. A guild can have only one news channel.
+        """
+        await self._ensure_setup()
+        await add_subscription(self.db, guild_id, channel_id)
+        self.subscriptions[guild_id] = channel_id
+
+    async def unsubscribe(self, guild_id: int) -> bool:
+        """
+        :return: True if the guild was subscribed
+        """
+        await self._ensure_setup()
+        self.subscriptions.pop(guild_id, None)
+        return await remove_subscription(self.db, guild_id)
+
+    def latest_article(self) -> Optional[NewsArticle]:
+        """
+        :return: The latest article of the previous successful poll or None
+        """
+        if not self.articles:
+            return None
+        # The latest article has the smallest number
+        return min(self.articles, key=lambda article: article.number)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def needs_poll(self) -> bool:
+        """
+        :return: True if a command has to poll the homepage itself, because there are no articles yet, or they are
+        outdated and the poller isn't running to update them
+        """
+        if not self.articles:
+            return True
+        return not self.running and (datetime.datetime.now() - self.polled_at).total_seconds() > self.interval
+
+    async def poll(self) -> List[NewsArticle]:
+        """
+        Fetch the homepage if it has been modified since the previous poll and find the articles not seen before. The
+        leader stores the articles in the shared cache.
+
+        :raise Exception: Any exception raised by the request (usually asyncio.TimeoutError)
+        :return: New articles from the oldest to the latest. Empty on the first successful poll.
+        """
+        self.metrics["polls"] += 1
+        response = await self.fetcher.visit_conditional(self.url, self._etag, self._last_modified)
+        if response.text is None:
+            self.metrics["not_modified"] += 1
+            self.polled_at = datetime.datetime.now()
+            await self._share_articles()
+            return []
+        articles = await self.parse_articles(response.text) if response.status < 400 else []
+        if not articles:
+            # Error pages and changed layouts are not remembered, so the next poll fetches the whole page again
+            self.metrics["failed"] += 1
+            return []
+
+        self._etag = response.etag
+        self._last_modified = response.last_modified
+        self.metrics["changed"] += 1
+        new_articles = self._update_articles(articles)
+        await self._share_articles()
+        return new_articles
+
+    async def poll_shared(self) -> List[NewsArticle]:
+        """
+        Read the articles the leader has stored in the shared cache and find the articles not seen before.
+
+        :return: New articles from the oldest to the latest. Empty on the first successful poll.
+        """
+        self.metrics["polls"] += 1
+        result = await self.shared_cache.get(SHARED_ARTICLES_KEY)
+        if result is None:
+            # The leader hasn't polled successfully yet or the shared cache can't be reached
+            self.metrics["failed"] += 1
+            return []
+        articles = [NewsArticle(*article) for article in json.loads(result[1])]
+        if articles == self.articles:
+            self.metrics["not_modified"] += 1
+            self.polled_at = datetime.datetime.now()
+            return []
+        self.metrics["changed"] += 1
+        return self._update_articles(articles)
+
+    async def _share_articles(self):
+        if self.leader and self.shared_cache is not None and self.articles:
+            await self.shared_cache.set(SHARED_ARTICLES_KEY, json.dumps(self.articles), SHARED_ARTICLES_TTL)
+
+    def _update_articles(self, articles: List[NewsArticle]) -> List[NewsArticle]:
+        self.polled_at = datetime.datetime.now()
+        first_poll = not self._seen_links
+        new_articles = [article for article in articles if article.link not in self._seen_links]
+        self._seen_links.update(article.link for article in articles)
+        self.articles = articles
+        if first_poll:
+            return []
+        self.metrics["new_articles"] += len(new_articles)
+        return sorted(new_articles, key=lambda article: article.number, reverse=True)
+
+    async def _publish(self, channel_id: int, article: NewsArticle):
+        try:
+            await self.publish(channel_id, article)
+            self.metrics["published"] += 1
+        except Exception:
+            # Deleted channels and missing permissions
+            self.metrics["publish_failed"] += 1
+
+    async def publish_articles(self, articles: List[NewsArticle]):
+        """
+        Send given articles to every subscribed channel. Channels are sent to concurrently, and the articles in order.
+        """
+        if self.publish is None or not articles:
+            return
+        await self._ensure_setup()
+        for article in articles:
+            await asyncio.gather(*[self._publish(channel_id, article) for channel_id in self.subscriptions.values()])
+
+    async def run(self):
+        await self._ensure_setup()
+        poll = self.poll if self.leader or self.shared_cache is None else self.poll_shared
+        while True:
+            try:
+                await self.publish_articles(await poll())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.metrics["failed"] += 1
+                print(f"News poll failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def progress(self) -> Dict[str, float]:
+        return dict(self.metrics, subscriptions=len(self.subscriptions or ()), articles=len(self.articles),
+                    polled_at=str(self.polled_at), running=self.running, leader=self.leader)
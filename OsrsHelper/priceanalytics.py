@@ -0,0 +1,186 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import collections
+import datetime
+import io
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from OsrsHelper.prices import DAY_MS, PriceHistory
+
+# Price changes are calculated for these amounts of days
+CHANGE_PERIODS = {"day": 1, "week": 7, "month": 30, "3 months": 90, "6 months": 180}
+MOVING_AVERAGE_WINDOWS = (7, 30)
+# Amount of latest days used for the short term minimum, maximum, volatility and trend
+RECENT_DAYS = 30
+
+PriceAnalytics = collections.namedtuple("PriceAnalytics", [
+    "item_id", "latest_date", "latest_price", "latest_average", "changes", "moving_averages", "recent_min",
+    "recent_max", "all_time_min", "all_time_max", "volatility", "trend"])
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    :return: Averages of every `window` consecutive values. The result is `window - 1` values shorter than the input,
+    or empty if there are less values than the window.
+    """
+    if len(values) < window:
+        return np.empty(0)
+    cumulative = np.cumsum(np.concatenate(([0], values)), dtype=np.float64)
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+
+def price_changes(prices: np.ndarray) -> Dict[str, Tuple[int, float]]:
+    """
+    :return: Absolute and percentage change between the latest price and the price of each period in CHANGE_PERIODS.
+    Periods longer than the history are compared with the oldest price.
+    """
+    latest = int(prices[-1])
+    changes = {}
+    for period, days in CHANGE_PERIODS.items():
+        old = int(prices[max(len(prices) - 1 - days, 0)])
+        changes[period] = latest - old, (latest - old) / old * 100 if old else 0.0
+    return changes
+
+
+def volatility(prices: np.ndarray) -> float:
+    """
+    :return: Standard deviation of the daily percentage changes
+    """
+    if len(prices) < 3:
+        return 0.0
+    prices = prices.astype(np.float64)
+    returns = np.diff(prices) / np.maximum(prices[:-1], 1)
+    return float(np.std(returns, ddof=1) * 100)
+
+
+def trend(prices: np.ndarray) -> float:
+    """
+    :return: Slope of the least squares line fitted to the prices, as percentage of the mean price per day
+    """
+    if len(prices) < 2:
+        return 0.0
+    prices = prices.astype(np.float64)
+    days = np.arange(len(prices), dtype=np.float64)
+    days -= days.mean()
+    mean_price = prices.mean()
+    slope = np.dot(days, prices - mean_price) / np.dot(days, days)
+    return float(slope / max(mean_price, 1) * 100)
+
+
+def analyze(history: PriceHistory) -> PriceAnalytics:
+    """
+    Calculate the statistics of one item price history.
+    """
+    daily = history.daily
+    recent = daily[-RECENT_DAYS:]
+    return PriceAnalytics(
+        item_id=history.item_id,
+        latest_date=history.latest_date,
+        latest_price=history.latest_price,
+        latest_average=int(history.average[-1]),
+        changes=price_changes(daily),
+        moving_averages={window: float(daily[-window:].mean()) for window in MOVING_AVERAGE_WINDOWS
+                         if len(daily) >= window},
+        recent_min=int(recent.min()),
+        recent_max=int(recent.max()),
+        all_time_min=int(daily.min()),
+        all_time_max=int(daily.max()),
+        volatility=volatility(recent),
+        trend=trend(recent))
+
+
+def render_chart(title: str, days: np.ndarray, daily: np.ndarray, average: np.ndarray) -> bytes:
+    """
+    Draw a line chart of the daily prices, the average prices and the moving averages. Matplotlib is slow and not
+    thread safe, so this is meant to be run in a worker process.
+
+    :param title: Title of the chart
+    :param days: Days since the Unix epoch
+    :param daily: Daily prices
+    :param average: Average prices
+    :return: The chart as PNG
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
+
+    dates = [datetime.datetime.utcfromtimestamp(int(day) * DAY_MS / 1e3) for day in days]
+    figure, axes = pyplot.subplots(figsize=(8, 4), dpi=100)
+    try:
+        axes.plot(dates, daily, label="Daily", linewidth=1.5)
+        axes.plot(dates, average, label="Average", linewidth=1)
+        for window in MOVING_AVERAGE_WINDOWS:
+            averages = moving_average(daily, window)
+            if len(averages):
+                axes.plot(dates[window - 1:], averages, label=f"{window} day moving average", linewidth=1,
+                          linestyle="--")
+        axes.set_title(title)
+        axes.grid(alpha=0.3)
+        axes.legend(loc="best", fontsize="small")
+        axes.yaxis.set_major_formatter(matplotlib.ticker.FuncFormatter(lambda value, _: f"{value:,.0f}"))
+        figure.autofmt_xdate()
+        figure.tight_layout()
+        png = io.BytesIO()
+        figure.savefig(png, format="png")
+        return png.getvalue()
+    finally:
+        pyplot.close(figure)
+
+
+class DailyCache:
+    """
+    LRU cache for values calculated from price histories. Keys include the latest day of the history, so values are
+    recalculated automatically after the GE has updated prices.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._values = collections.OrderedDict()
+
+    @staticmethod
+    def make_key(kind: str, history: PriceHistory) -> Tuple[str, int, int]:
+        return kind, history.item_id, int(history.days[-1])
+
+    def get(self, key: Hashable) -> Optional[object]:
+        value = self._values.get(key)
+        if value is not None:
+            self._values.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: object):
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def get_analytics(self, history: PriceHistory) -> PriceAnalytics:
+        key = self.make_key("analytics", history)
+        analytics = self.get(key)
+        if analytics is None:
+            analytics = analyze(history)
+            self.put(key, analytics)
+        return analytics
@@ -0,0 +1,315 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import datetime
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from OsrsHelper import itemindex
+from OsrsHelper.database import ConnectionPool
+from OsrsHelper.fetcher import Fetcher
+from OsrsHelper.tracker import RateLimiter
+
+GRAPH_URL = "https://services.runescape.com/m=itemdb_oldschool/api/graph/{id}.json"
+DAY_MS = 24 * 60 * 60 * 1000
+# GE prices can't exceed the maximum cash stack, so they fit in int32
+PRICE_DTYPE = np.int32
+
+
+def parse_quantity(quantity: str) -> int:
+    """
+    Parse an item quantity that may use abbreviations 'k' and 'm'.
+
+    :param quantity: Quantity given by user, e.g. "500", "10k" or "2m"
+    :raise ValueError: If the quantity is not a positive integer
+    :return: Quantity as int
+    """
+    quantity = quantity.strip().lower()
+    if quantity.endswith("k"):
+        value = int(quantity[:-1]) * 1000
+    elif quantity.endswith("m"):
+        value = int(quantity[:-1]) * 1000000
+    else:
+        value = int(quantity)
+    if value < 1:
+        raise ValueError(f"Quantity must be positive: {quantity}")
+    return value
+
+
+def split_quantity(search: str) -> Tuple[str, int]:
+    """
+    Split a price search in format "item name" or "item name * quantity" to the item name and quantity.
+
+    :raise ValueError: If the quantity is in unsupported format
+    """
+    if "*" not in search:
+        return search.strip(), 1
+    item_name, quantity = search.rsplit("*", 1)
+    return item_name.strip(), parse_quantity(quantity)
+
+
+class PriceHistory:
+    """
+    Daily GE prices of one item, ordered from oldest to latest. Days are days since the Unix epoch.
+    """
+
+    __slots__ = ("item_id", "days", "daily", "average")
+
+    def __init__(self, item_id: int, days: np.ndarray, daily: np.ndarray, average: np.ndarray):
+        self.item_id = item_id
+        self.days = days
+        self.daily = daily
+        self.average = average
+
+    @classmethod
+    def from_graph(cls, item_id: int, data: dict) -> "PriceHistory":
+        """
+        :param item_id: Id of the item
+        :param data: Response of the GE graph API in format {"daily": {timestamp: price}, "average": {timestamp: price}}
+        """
+        daily = data["daily"]
+        average = data.get("average", {})
+        days = np.fromiter((int(timestamp) // DAY_MS for timestamp in daily), dtype=np.int32, count=len(daily))
+        daily_prices = np.fromiter(daily.values(), dtype=PRICE_DTYPE, count=len(daily))
+        average_prices = np.fromiter((average.get(timestamp, price) for timestamp, price in daily.items()),
+                                     dtype=PRICE_DTYPE, count=len(daily))
+        order = np.argsort(days, kind="stable")
+        return cls(item_id, days[order], daily_prices[order], average_prices[order])
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def latest_price(self) -> int:
+        return int(self.daily[-1])
+
+    @property
+    def latest_date(self) -> datetime.datetime:
+        return datetime.datetime.utcfromtimestamp(int(self.days[-1]) * DAY_MS / 1e3)
+
+    def price_change(self, days: int) -> int:
+        """
+        :param days: Amount of price updates to look back. The oldest price is used if the history is shorter.
+        :return: Difference between the latest price and the price given amount of days earlier
+        """
+        index = max(len(self.daily) - 1 - days, 0)
+        return int(self.daily[-1]) - int(self.daily[index])
+
+
+class PriceStore:
+    """
+    In-memory mirror of the GE prices of all tradeable items. A background task walks through every tradeable item in
+    rate limited, concurrent requests and replaces the price histories of items older than the refresh interval, so
+    price commands are answered from memory. Items not mirrored yet are fetched when they are requested.
+    """
+
+    def __init__(self, db: ConnectionPool, fetcher: Fetcher, graph_url: str = GRAPH_URL,
+                 interval: float = 12 * 60 * 60, concurrency: int = 4, requests_per_second: float = 2,
+                 jitter: float = 0.2, idle_time: float = 10 * 60):
+        """
+        :param db: Connection pool to the bot database
+        :param fetcher: Fetcher used for all requests
+        :param graph_url: GE graph API URL with placeholder {id} for the item id
+        :param interval: Seconds between two refreshes of the same item. The GE updates prices once a day.
+        :param concurrency: Maximum amount of simultaneous GE API requests of the ingest
+        :param requests_per_second: Rate limit of the ingest
+        :param jitter: Relative random variation of the spacing between requests
+        :param idle_time: Seconds to wait before checking again when no items need a refresh
+        """
+        self.db = db
+        self.fetcher = fetcher
+        self.graph_url = graph_url
+        self.interval = interval
+        self.idle_time = idle_time
+        self.rate_limiter = RateLimiter(requests_per_second, jitter)
+        self._semaphore = asyncio.BoundedSemaphore(concurrency)
+        self._task = None
+        self._tradeables_lock = asyncio.Lock()
+        self._tradeable_rows = None
+        self.item_index = itemindex.ItemIndex()
+        self.histories = {}
+        self._updated_at = {}
+        self.metrics = {"rounds": 0, "round_total": 0, "round_done": 0, "round_failed": 0, "ingested": 0,
+                        "failed": 0, "last_round_seconds": 0.0}
+
+    async def load_tradeables(self) -> int:
+        """
+        Load the tradeable items and item keys. The item index is rebuilt only if they have changed.
+
+        :return: Amount of tradeable items
+        """
+        if self._tradeable_rows is None:
+            await itemindex.setup(self.db)
+        items = [(row[0], int(row[1])) for row in await self.db.fetchall("SELECT * FROM tradeables;")]
+        item_keys = await itemindex.get_item_keys(self.db)
+        if (items, item_keys) != self._tradeable_rows:
+            self.item_index = itemindex.ItemIndex(items, item_keys)
+            self._tradeable_rows = items, item_keys
+        return len(self.item_index)
+
+    async def ensure_tradeables(self):
+        if self._tradeable_rows is None:
+            async with self._tradeables_lock:
+                if self._tradeable_rows is None:
+                    await self.load_tradeables()
+
+    async def find_item(self, item_name: str) -> Optional[Tuple[str, int]]:
+        """
+        :param item_name: Item name, item key or a search similar enough to only one item name
+        :return: The correctly capitalized item name and item id, or None if no item matched
+        """
+        await self.ensure_tradeables()
+        match = self.item_index.resolve(item_name)
+        if match is None:
+            return None
+        return match.name, match.item_id
+
+    async def suggest_items(self, item_name: str, limit: int = 5) -> List[str]:
+        """
+        :return: Names of the items most similar to given search
+        """
+        await self.ensure_tradeables()
+        return [match.name for match in self.item_index.suggest(item_name, limit)]
+
+    async def fetch_history(self, item_id: int, use_cache: bool = True) -> PriceHistory:
+        """
+        Fetch the price history of an item from the GE API and store it.
+
+        :raise Exception: Any exception raised by the request (usually asyncio.TimeoutError) or ValueError if the
+        response was not a price graph
+        """
+        response = await self.fetcher.visit_website(self.graph_url.format(id=item_id), use_cache=use_cache)
+        try:
+            history = PriceHistory.from_graph(item_id, json.loads(response))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid price graph for item {item_id}") from e
+        if not len(history):
+            raise ValueError(f"Empty price graph for item {item_id}")
+        self.histories[item_id] = history
+        self._updated_at[item_id] = time.monotonic()
+        return history
+
+    def _get_mirrored(self, item_id: int) -> Optional[PriceHistory]:
+        # Histories not refreshed within the interval are fetched again, e.g. in shard workers that don't run the ingest
+        if time.monotonic() - self._updated_at.get(item_id, -self.interval) > self.interval:
+            return None
+        return self.histories.get(item_id)
+
+    async def get_history(self, item_id: int) -> PriceHistory:
+        """
+        :raise Exception: Same as fetch_history() if the item was not mirrored yet
+        """
+        history = self._get_mirrored(item_id)
+        if history is None:
+            try:
+                history = await self.fetch_history(item_id)
+            except Exception:
+                # An outdated history is better than none
+                if item_id not in self.histories:
+                    raise
+                history = self.histories[item_id]
+        return history
+
+    async def get_histories(self, item_ids: Iterable[int]) -> Dict[int, Optional[PriceHistory]]:
+        """
+        :return: Price histories by item id. Items whose history could not be fetched have None.
+        """
+        histories = {item_id: self._get_mirrored(item_id) for item_id in item_ids}
+        missing = [item_id for item_id, history in histories.items() if history is None]
+        if missing:
+            results = await asyncio.gather(*[self.fetch_history(item_id) for item_id in missing],
+                                           return_exceptions=True)
+            for item_id, result in zip(missing, results):
+                histories[item_id] = self.histories.get(item_id) if isinstance(result, Exception) else result
+        return histories
+
+    async def _ingest_item(self, item_id: int) -> bool:
+        async with self._semaphore:
+            await self.rate_limiter.wait()
+            try:
+                # Bulk responses would only evict the cached responses of commands
+                await self.fetch_history(item_id, use_cache=False)
+            except Exception:
+                self.metrics["round_failed"] += 1
+                self.metrics["failed"] += 1
+                return False
+        self.metrics["round_done"] += 1
+        self.metrics["ingested"] += 1
+        return True
+
+    async def ingest(self, item_ids: List[int]) -> int:
+        """
+        Fetch the price histories of given items concurrently.
+
+        :return: Amount of items ingested successfully
+        """
+        results = await asyncio.gather(*[self._ingest_item(item_id) for item_id in item_ids])
+        return sum(results)
+
+    def get_due_items(self) -> List[int]:
+        now = time.monotonic()
+        return sorted(item_id for item_id in set(self.item_index.item_ids)
+                      if now - self._updated_at.get(item_id, -self.interval) >= self.interval)
+
+    async def refresh_due(self) -> int:
+        """
+        Run one round: reload the tradeable items and ingest every item that is due.
+
+        :return: Amount of items that were due
+        """
+        started = time.monotonic()
+        await self.load_tradeables()
+        item_ids = self.get_due_items()
+        self.metrics.update(round_total=len(item_ids), round_done=0, round_failed=0)
+        await self.ingest(item_ids)
+        if item_ids:
+            self.metrics["rounds"] += 1
+            self.metrics["last_round_seconds"] = time.monotonic() - started
+        return len(item_ids)
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Price ingest failed: {e}")
+            await asyncio.sleep(self.idle_time)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def progress(self) -> Dict[str, float]:
+        return dict(self.metrics, items=len(self.histories), running=self._task is not None and not self._task.done())
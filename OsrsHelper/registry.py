@@ -0,0 +1,138 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import fractions
+import json
+import os
+import types
+from typing import Dict, Mapping
+
+# Efficient hours played xp rates for one skill. Thresholds are the minimum experiences (sorted ascending) from which
+# the rate with the same index applies.
+SkillEhp = collections.namedtuple("SkillEhp", ["thresholds", "rates"])
+
+EHP_TABLES = ("ehp", "ehp_ironman", "ehp_skiller", "ehp_f2p")
+
+
+def _load_json(path: str, encoding: str = "utf-8"):
+    with open(path, encoding=encoding) as data_file:
+        return json.load(data_file)
+
+
+def parse_ehp_table(data: dict) -> Mapping[str, SkillEhp]:
+    """
+    Convert an ehp table in format {skill: {xp required: xph, ...} or None} to {skill: SkillEhp or None}.
+    """
+    table = {}
+    for skill, rates in data.items():
+        if not rates:
+            table[skill] = None
+            continue
+        pairs = sorted((int(xp_required), int(xph)) for xp_required, xph in rates.items())
+        table[skill] = SkillEhp(tuple(pair[0] for pair in pairs), tuple(pair[1] for pair in pairs))
+    return types.MappingProxyType(table)
+
+
+def parse_drop_rates(data: dict) -> Mapping[str, Mapping[str, float]]:
+    """
+    Convert drop rates in format {boss: {item: "1/5000", ...}} to {boss: {item: 0.0002, ...}}.
+    """
+    return types.MappingProxyType({boss: types.MappingProxyType({item: float(fractions.Fraction(rate))
+                                                                 for item, rate in items.items()})
+                                   for boss, items in data.items()})
+
+
+def parse_harvest_seasons(data: dict) -> Mapping[str, Mapping[str, tuple]]:
+    return types.MappingProxyType({month: types.MappingProxyType({origin: tuple(crops)
+                                                                  for origin, crops in crops_by_origin.items()})
+                                   for month, crops_by_origin in data.items()})
+
+
+class ResourceRegistry:
+    """
+    All static json resources of the bot, loaded and normalized once instead of on every command invocation. The
+    loaded structures are read-only and are replaced as a whole when the files are reloaded, so cogs can keep
+    references to them only for the duration of one command.
+    """
+
+    def __init__(self, directory: str = "resources"):
+        self.directory = directory
+        self.ehp = types.MappingProxyType({})
+        self.drop_rates = types.MappingProxyType({})
+        self.solved_puzzles = types.MappingProxyType({})
+        self.harvest_seasons = types.MappingProxyType({})
+        self._mtimes = {}
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def _get_mtimes(self) -> Dict[str, float]:
+        filenames = [f"{table}.json" for table in EHP_TABLES]
+        filenames += ["drop_rates.json", "solved_puzzles.json", "harvest_seasons_fi.json"]
+        return {filename: os.path.getmtime(self._path(filename)) for filename in filenames}
+
+    def load(self):
+        """
+        Load and normalize all resource files. The new data replaces the old only if every file was loaded
+        successfully.
+        """
+        mtimes = self._get_mtimes()
+        ehp = types.MappingProxyType({table: parse_ehp_table(_load_json(self._path(f"{table}.json")))
+                                      for table in EHP_TABLES})
+        drop_rates = parse_drop_rates(_load_json(self._path("drop_rates.json")))
+        solved_puzzles = types.MappingProxyType(_load_json(self._path("solved_puzzles.json")))
+        harvest_seasons = parse_harvest_seasons(_load_json(self._path("harvest_seasons_fi.json"),
+                                                           encoding="utf-8-sig"))
+
+        self.ehp = ehp
+        self.drop_rates = drop_rates
+        self.solved_puzzles = solved_puzzles
+        self.harvest_seasons = harvest_seasons
+        self._mtimes = mtimes
+
+    def reload_if_changed(self) -> bool:
+        """
+        :return: True if any of the files had changed and the resources were reloaded
+        """
+        if self._get_mtimes() == self._mtimes:
+            return False
+        self.load()
+        return True
+
+    async def watch(self, interval: float = 10):
+        """
+        Poll the resource files for changes and reload them when they change. Errors while reloading (e.g. a file
+        being only partially written) are printed and the old resources are kept.
+
+        :param interval: Seconds between checks
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.reload_if_changed():
+                    print("Resource files changed and were reloaded.")
+            except (OSError, ValueError) as e:
+                print(f"Failed to reload resource files: {e}")
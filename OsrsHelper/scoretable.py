@@ -0,0 +1,220 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from typing import List, Sequence
+
+SKILL_NAMES = ("Total", "Attack", "Defence", "Strength", "Hitpoints", "Ranged", "Prayer", "Magic", "Cooking",
+               "Woodcutting", "Fletching", "Fishing", "Firemaking", "Crafting", "Smithing", "Mining", "Herblore",
+               "Agility", "Thieving", "Slayer", "Farming", "Runecrafting", "Hunter", "Construction")
+CLUE_NAMES = ("All", "Beginner", "Easy", "Medium", "Hard", "Elite", "Master")
+SKILL_COLUMNS = ("Skill", "Rank", "Level", "Xp")
+CLUE_COLUMNS = ("Clue", "Rank", "Amount")
+COMPARISON_ROWS = SKILL_NAMES + ("Combat",)
+# Maximum length of a Discord message
+MAX_MESSAGE_LENGTH = 2000
+
+# Tables are rendered exactly like tabulate(rows, headers, tablefmt="orgtbl") would render them: every column is at
+# least two characters wider than its header, and columns where every value is an integer (i.e. no thousands
+# separators) are aligned right while other columns are aligned left.
+MIN_PADDING = 2
+
+
+class _RowNames:
+    """
+    The first column of a table, padded once for every amount of rows it can have.
+    """
+
+    def __init__(self, header: str, names: Sequence[str]):
+        self.header = header
+        self.names = names
+        self._padded = {}
+
+    def padded(self, rows: int) -> tuple:
+        """
+        :return: Width of the column and the padded header and names of the first rows
+        """
+        padded = self._padded.get(rows)
+        if padded is None:
+            names = self.names[:rows]
+            width = max([len(self.header) + MIN_PADDING] + [len(name) for name in names])
+            padded = (width, f"| {self.header.ljust(width)} |", [f"| {name.ljust(width)} |" for name in names])
+            self._padded[rows] = padded
+        return padded
+
+
+_SKILL_ROW_NAMES = _RowNames(SKILL_COLUMNS[0], SKILL_NAMES)
+_CLUE_ROW_NAMES = _RowNames(CLUE_COLUMNS[0], CLUE_NAMES)
+_COMPARISON_ROW_NAMES = _RowNames(SKILL_COLUMNS[0], COMPARISON_ROWS)
+for _rows in (len(SKILL_NAMES), len(CLUE_NAMES)):
+    _SKILL_ROW_NAMES.padded(_rows)
+    _CLUE_ROW_NAMES.padded(_rows)
+
+
+def format_values(rows: Sequence[Sequence], gains: bool) -> List[List[str]]:
+    """
+    Separate thousands of the values with comma.
+
+    :param rows: List of lists which values can be converted to int
+    :param gains: Boolean parameter to determine if positive values should have plus sign
+    :return: New list of lists of formatted values
+    """
+    if gains:
+        return [[f"{int(value):+,}" if int(value) > 0 else f"{int(value):,}" for value in row] for row in rows]
+    return [[f"{int(value):,}" for value in row] for row in rows]
+
+
+def render_table(row_names: _RowNames, headers: Sequence[str], rows: List[List[str]]) -> str:
+    """
+    Render a table in org-mode format in one pass over the formatted values.
+
+    :param row_names: First column of the table
+    :param headers: Headers of the value columns
+    :param rows: Formatted values of each row, without the row name
+    """
+    name_width, name_header, names = row_names.padded(len(rows))
+    columns = list(zip(*rows))
+    if not columns:
+        widths = [len(header) + MIN_PADDING for header in headers]
+        header_cells = [header.ljust(width) for header, width in zip(headers, widths)]
+        lines = [name_header + "".join(f" {cell} |" for cell in header_cells)]
+        lines.append("|" + "+".join("-" * (width + 2) for width in [name_width] + widths) + "|")
+        return "\n".join(lines)
+
+    widths = []
+    justify = []
+    for header, column in zip(headers, columns):
+        widths.append(max(len(header) + MIN_PADDING, max(map(len, column))))
+        numeric = not any("," in value for value in column)
+        justify.append(str.rjust if numeric else str.ljust)
+
+    header_cells = "".join(f" {just(header, width)} |" for header, width, just in zip(headers, widths, justify))
+    lines = [name_header + header_cells,
+             "|" + "+".join("-" * (width + 2) for width in [name_width] + widths) + "|"]
+    for name, row in zip(names, rows):
+        lines.append(name + "".join(f" {just(value, width)} |" for value, width, just in zip(row, widths, justify)))
+    return "\n".join(lines)
+
+
+def make_scoretable(highscores_data: list, username: str, combat_level: int, gains: bool = False,
+                    old_savedate: str = None, new_savedate: str = None, account_type: str = "normal") -> str:
+    """
+    Takes a list of lists that has users' highscore data and makes it into table format. Lists and sublists need to
+    be in the same order as in Osrs official highscores and api ([[Rank, Level, Xp], ...]). Sublist elements can be
+    either str or int, as long as they consist of 2 or 3 elements (2 for mini games and 3 for skills).
+
+    :param highscores_data: Data returned by Osrs highscores api splitted into list of lists
+    :param username: Username of the account whose highscores are being handled
+    :param combat_level: Combat level of the user whose score table will be made
+    :param gains: Boolean parameter to determine the table header and if positive values should have plus sign
+    :param old_savedate: A date when user stats were last saved into database. Only needed when gains = True
+    :param new_savedate: A date when user new stats are compared to old ones. Only needed when gains = True
+    :param account_type: Account type which is shown in a table that the bot sends to Discord
+    :return: Skill and clue highscores combined inside of discord code block quotes
+    """
+    skilltable = render_table(_SKILL_ROW_NAMES, SKILL_COLUMNS[1:], format_values(highscores_data[:24], gains))
+    cluetable = render_table(_CLUE_ROW_NAMES, CLUE_COLUMNS[1:], format_values(highscores_data[27:34], gains))
+
+    if gains:
+        table_header = "{:^50}\n{:^50}\n{}".format(f"Gains for {username}",
+                                                   f"Account type: {account_type.capitalize()}",
+                                                   f"Between {old_savedate} - {new_savedate} UTC\n\n"
+                                                   f"Combat level: {combat_level:+}")
+    else:
+        # Show stats prefix only if account type is something else than normal
+        if account_type == "normal":
+            account_type = ""
+        table_header = "{:^65}".format(f"{account_type.capitalize()} Stats of {username}\n\n"
+                                       f"Combat level: {combat_level}")
+
+    return f"```{table_header}\n\n{skilltable}\n\n{cluetable}```"
+
+
+def _get_levels(highscores_data: list, combat_level: int) -> List[int]:
+    return [int(row[1]) for row in highscores_data[:len(SKILL_NAMES)]] + [combat_level]
+
+
+def _stats_title(account_type: str, title: str) -> str:
+    return title if account_type == "normal" else f"{account_type.capitalize()} {title.lower()}"
+
+
+def make_levels_tables(usernames: Sequence[str], highscores_list: Sequence[list], combat_levels: Sequence[int],
+                       account_type: str = "normal", max_length: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Make a table of the skill and combat levels of many accounts side by side, one column per account. The accounts
+    are split into as few tables as possible so that every table fits in one message.
+
+    :param usernames: Usernames of the accounts in the order of the columns
+    :param highscores_list: Highscores data of every account, in the same format as for make_scoretable()
+    :param combat_levels: Combat level of every account
+    :param account_type: Account type which is shown in the title of the tables
+    :param max_length: Maximum length of one table inside of discord code block quotes
+    :return: Tables inside of discord code block quotes
+    """
+    title = _stats_title(account_type, "Levels")
+    levels = [_get_levels(highscores_data, combat_level)
+              for highscores_data, combat_level in zip(highscores_list, combat_levels)]
+
+    def render(columns: List[int]) -> str:
+        rows = [[str(levels[column][row]) for column in columns] for row in range(len(COMPARISON_ROWS))]
+        table = render_table(_COMPARISON_ROW_NAMES, [usernames[column] for column in columns], rows)
+        return f"```{title:^40}\n\n{table}```"
+
+    tables = []
+    page = []
+    rendered = ""
+    for column in range(len(usernames)):
+        candidate = render(page + [column])
+        if page and len(candidate) > max_length:
+            tables.append(rendered)
+            page = [column]
+            rendered = render(page)
+        else:
+            page.append(column)
+            rendered = candidate
+    if page:
+        tables.append(rendered)
+    return tables
+
+
+def make_comparison_table(usernames: Sequence[str], highscores_list: Sequence[list], combat_levels: Sequence[int],
+                          account_type: str = "normal") -> str:
+    """
+    Make a table that compares the levels of two accounts side by side with the experience difference of every skill.
+
+    :param usernames: Usernames of the two accounts
+    :param highscores_list: Highscores data of both accounts, in the same format as for make_scoretable()
+    :param combat_levels: Combat levels of both accounts
+    :param account_type: Account type which is shown in the table header
+    :return: Comparison table inside of discord code block quotes
+    """
+    first, second = [_get_levels(highscores_data, combat_level)
+                     for highscores_data, combat_level in zip(highscores_list, combat_levels)]
+    xp_differences = [int(first_row[2]) - int(second_row[2]) for first_row, second_row in
+                      zip(highscores_list[0][:len(SKILL_NAMES)], highscores_list[1][:len(SKILL_NAMES)])]
+    rows = [[str(first_level), str(second_level), difference] for first_level, second_level, difference in
+            zip(first, second, format_values([xp_differences], gains=True)[0] + [""])]
+    table = render_table(_COMPARISON_ROW_NAMES, [usernames[0], usernames[1], "Xp difference"], rows)
+    title = _stats_title(account_type, "Stats")
+    table_header = "{:^50}".format(f"{title} of {usernames[0]} compared to {usernames[1]}")
+    return f"```{table_header}\n\n{table}```"
@@ -0,0 +1,214 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import struct
+import time
+from typing import Optional, Tuple
+
+DEFAULT_PATH = "/tmp/osrshelper-cache.sock"
+
+# Requests are an operation byte and a length prefixed key. SET requests continue with the TTL and a length prefixed
+# value and get no response. GET responses are a found byte, and if found the remaining TTL and a length prefixed value.
+_GET = b"G"
+_SET = b"S"
+_LENGTH = struct.Struct("!I")
+_TTL = struct.Struct("!d")
+
+
+class SharedCacheServer:
+    """
+    Key-value store with TTLs served over a Unix socket, shared by the bot processes of a sharded deployment so that
+    each of them doesn't fetch the same responses. Entries are evicted in LRU order when the total size of the values
+    exceeds max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = 128 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stored_bytes = 0
+        self.counters = collections.Counter()
+        self._entries = collections.OrderedDict()
+
+    def get(self, key: bytes) -> Optional[Tuple[float, bytes]]:
+        """
+        :return: Remaining TTL and value, or None if the key is missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        expires_at, value = entry
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            self._remove(key)
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return remaining, value
+
+    def set(self, key: bytes, value: bytes, ttl: float):
+        self._remove(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = time.monotonic() + ttl, value
+        self.stored_bytes += len(value)
+        self.counters["sets"] += 1
+        while self.stored_bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.stored_bytes -= len(evicted)
+            self.counters["evictions"] += 1
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.stored_bytes -= len(entry[1])
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                operation = await reader.readexactly(1)
+                key = await reader.readexactly(_LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0])
+                if operation == _SET:
+                    ttl = _TTL.unpack(await reader.readexactly(_TTL.size))[0]
+                    value = await reader.readexactly(_LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0])
+                    self.set(key, value, ttl)
+                elif operation == _GET:
+                    result = self.get(key)
+                    if result is None:
+                        writer.write(b"\x00")
+                    else:
+                        writer.write(b"\x01" + _TTL.pack(result[0]) + _LENGTH.pack(len(result[1])) + result[1])
+                    await writer.drain()
+                else:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        return await asyncio.start_unix_server(self._handle, path=self.path)
+
+
+def run_server(path: str = DEFAULT_PATH, max_bytes: int = 128 * 1024 * 1024):
+    """
+    Run a shared cache server forever in the current process. Target of the cache process of the shard launcher.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(SharedCacheServer(path, max_bytes).start())
+    loop.run_forever()
+
+
+class SharedCache:
+    """
+    Client of a SharedCacheServer. Requests are pipelined over one connection and the responses are matched to them
+    in order. The cache is an optimization only, so connection errors and slow responses are treated as misses, and
+    the connection is opened again on the next request.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, timeout: float = 0.5):
+        """
+        :param path: Path of the Unix socket of the server
+        :param timeout: Seconds to wait for a response before treating it as a miss
+        """
+        self.path = path
+        self.timeout = timeout
+        self.counters = collections.Counter()
+        # Writer and the futures of the requests waiting for a response
+        self._connection = None
+        self._connect_lock = asyncio.Lock()
+
+    async def _connect(self) -> Tuple[asyncio.StreamWriter, collections.deque]:
+        if self._connection is None:
+            async with self._connect_lock:
+                if self._connection is None:
+                    reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(self.path), self.timeout)
+                    self._connection = writer, collections.deque()
+                    asyncio.ensure_future(self._read_responses(reader, *self._connection))
+        return self._connection
+
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                              pending: collections.deque):
+        try:
+            while True:
+                result = None
+                if await reader.readexactly(1) == b"\x01":
+                    remaining = _TTL.unpack(await reader.readexactly(_TTL.size))[0]
+                    value = await reader.readexactly(_LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0])
+                    result = remaining, value
+                future = pending.popleft()
+                # Requests that timed out are cancelled
+                if not future.done():
+                    future.set_result(result)
+        except (asyncio.IncompleteReadError, OSError):
+            pass
+        finally:
+            if self._connection is not None and self._connection[0] is writer:
+                self._connection = None
+            writer.close()
+            for future in pending:
+                if not future.done():
+                    future.set_result(None)
+
+    async def get(self, key: str) -> Optional[Tuple[float, str]]:
+        """
+        :return: Remaining TTL and value, or None if the key is missing, expired or the server can't be reached
+        """
+        key_bytes = key.encode("utf-8")
+        try:
+            writer, pending = await self._connect()
+            future = asyncio.get_event_loop().create_future()
+            pending.append(future)
+            writer.write(_GET + _LENGTH.pack(len(key_bytes)) + key_bytes)
+            result = await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            self.counters["errors"] += 1
+            return None
+        if result is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return result[0], result[1].decode("utf-8")
+
+    async def set(self, key: str, value: str, ttl: float):
+        key_bytes = key.encode("utf-8")
+        value_bytes = value.encode("utf-8")
+        try:
+            writer, _ = await self._connect()
+            writer.write(_SET + _LENGTH.pack(len(key_bytes)) + key_bytes + _TTL.pack(ttl)
+                         + _LENGTH.pack(len(value_bytes)) + value_bytes)
+            await asyncio.wait_for(writer.drain(), self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            self.counters["errors"] += 1
+            return
+        self.counters["sets"] += 1
+
+    def close(self):
+        if self._connection is not None:
+            self._connection[0].close()
+            self._connection = None
@@ -0,0 +1,269 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import array
+import json
+import datetime
+import struct
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from OsrsHelper.database import ConnectionPool
+from OsrsHelper.highscores import Highscores
+
+# STATS is the highscores packed by encode_snapshot(). The primary key doubles as the (player, timestamp) index used
+# by the range queries.
+SNAPSHOTS_TABLE = """CREATE TABLE IF NOT EXISTS tracked_snapshots (
+                         USERNAME VARCHAR(12) NOT NULL,
+                         SAVEDATE DATETIME NOT NULL,
+                         COMBAT_LEVEL SMALLINT NOT NULL,
+                         STATS BLOB NOT NULL,
+                         PRIMARY KEY (USERNAME, SAVEDATE));"""
+# The first version of the table stored the highscores as json text, in this column order
+JSON_SNAPSHOT_COLUMNS = ["USERNAME", "SAVEDATE", "STATS", "COMBAT_LEVEL"]
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+PERIODS = {"day": datetime.timedelta(days=1), "week": datetime.timedelta(weeks=1),
+           "month": datetime.timedelta(days=30)}
+
+# Snapshots younger than this are all kept, then one per day until DAILY_RETENTION, then one per week until
+# MAX_RETENTION. Older snapshots are deleted.
+FULL_RETENTION = datetime.timedelta(days=2)
+DAILY_RETENTION = datetime.timedelta(days=60)
+MAX_RETENTION = datetime.timedelta(days=365)
+
+_HEADER = struct.Struct("<HH")
+
+
+def encode_snapshot(highscores_data: List[list]) -> bytes:
+    """
+    Pack highscores data into little-endian int64 values. The header has the amount of 3 value rows (skills) and 2
+    value rows (everything else) so snapshots with different amount of rows can be decoded.
+
+    :param highscores_data: Highscores in format [[Rank, Level, Xp], ..., [Rank, Amount], ...]. Values may be str.
+    :return: Packed snapshot
+    """
+    skill_rows = 0
+    for row in highscores_data:
+        if len(row) != 3:
+            break
+        skill_rows += 1
+
+    values = array.array("q", (int(value) for row in highscores_data for value in row))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return _HEADER.pack(skill_rows, len(highscores_data) - skill_rows) + values.tobytes()
+
+
+def decode_snapshot(packed: bytes) -> List[List[int]]:
+    """
+    :param packed: Snapshot packed with encode_snapshot()
+    :return: Highscores data as a list of lists of int
+    """
+    skill_rows, other_rows = _HEADER.unpack_from(packed)
+    values = array.array("q")
+    values.frombytes(packed[_HEADER.size:])
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    skills_end = skill_rows * 3
+    rows = [values[i:i + 3].tolist() for i in range(0, skills_end, 3)]
+    rows += [values[i:i + 2].tolist() for i in range(skills_end, skills_end + other_rows * 2, 2)]
+    return rows
+
+
+def decode_highscores(packed: bytes) -> Highscores:
+    """
+    Decode a snapshot straight into arrays without going through lists.
+
+    :param packed: Snapshot packed with encode_snapshot()
+    """
+    skill_rows, other_rows = _HEADER.unpack_from(packed)
+    values = np.frombuffer(packed, dtype="<i8", offset=_HEADER.size).astype(np.int64)
+    skill_values = skill_rows * 3
+    return Highscores(values[:skill_values].reshape(-1, 3), values[skill_values:].reshape(-1, 2))
+
+
+def _to_datetime(value: Union[str, datetime.datetime]) -> datetime.datetime:
+    # MySQLdb returns DATETIME columns as datetime objects, SQLite as strings
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.strptime(value, DATE_FORMAT)
+
+
+async def setup(db: ConnectionPool):
+    await db.execute(SNAPSHOTS_TABLE)
+    await migrate_json_snapshots(db)
+
+
+async def migrate_json_snapshots(db: ConnectionPool) -> int:
+    """
+    Convert the table of the first tracker version, where STATS was json text, into packed snapshots. The old table is
+    renamed first and dropped only after all of its snapshots have been written to the new one.
+
+    :return: Amount of snapshots converted, 0 if the table already has the current schema
+    """
+    columns = [column.upper() for column in await db.get_columns("tracked_snapshots")]
+    if columns != JSON_SNAPSHOT_COLUMNS:
+        return 0
+    await db.execute("ALTER TABLE tracked_snapshots RENAME TO tracked_snapshots_json;")
+    await db.execute(SNAPSHOTS_TABLE)
+    rows = await db.fetchall("SELECT USERNAME, SAVEDATE, COMBAT_LEVEL, STATS FROM tracked_snapshots_json;")
+    await add_snapshots(db, [(username, _to_datetime(savedate), combat_level, json.loads(stats))
+                             for username, savedate, combat_level, stats in rows])
+    await db.execute("DROP TABLE tracked_snapshots_json;")
+    return len(rows)
+
+
+async def add_snapshots(db: ConnectionPool, snapshots: Iterable[Tuple[str, datetime.datetime, int, list]]):
+    """
+    :param db: Connection pool to the bot database
+    :param snapshots: (username, save date, combat level, highscores data) tuples. A snapshot replaces the one saved
+    for the same player in the same second, e.g. by a command and the background refresh at the same time.
+    """
+    rows = [(username.lower(), savedate.strftime(DATE_FORMAT), combat_level, encode_snapshot(highscores_data))
+            for username, savedate, combat_level, highscores_data in snapshots]
+    if rows:
+        await db.executemany("""REPLACE INTO tracked_snapshots (USERNAME, SAVEDATE, COMBAT_LEVEL, STATS) 
+                                VALUES (%s, %s, %s, %s);""", rows)
+
+
+async def get_snapshot_since(db: ConnectionPool, username: str, since: datetime.datetime) \
+        -> Optional[Tuple[datetime.datetime, int, List[List[int]]]]:
+    """
+    Get the oldest snapshot saved at or after given date.
+
+    :return: Save date, combat level and highscores data or None if there are no snapshots in the period
+    """
+    row = await db.fetchone("""SELECT SAVEDATE, COMBAT_LEVEL, STATS FROM tracked_snapshots 
+                               WHERE USERNAME = %s AND SAVEDATE >= %s ORDER BY SAVEDATE LIMIT 1;""",
+                            [username.lower(), since.strftime(DATE_FORMAT)])
+    if row is None:
+        return None
+    return _to_datetime(row[0]), row[1], decode_snapshot(bytes(row[2]))
+
+
+async def _get_boundary_snapshots(db: ConnectionPool, aggregate: str, since: Optional[datetime.datetime]) \
+        -> Dict[str, Tuple[datetime.datetime, int, Highscores]]:
+    where = "WHERE SAVEDATE >= %s" if since is not None else ""
+    args = [since.strftime(DATE_FORMAT)] if since is not None else []
+    rows = await db.fetchall(f"""SELECT s.USERNAME, s.SAVEDATE, s.COMBAT_LEVEL, s.STATS FROM tracked_snapshots AS s 
+                                 JOIN (SELECT USERNAME, {aggregate}(SAVEDATE) AS SAVEDATE FROM tracked_snapshots 
+                                       {where} GROUP BY USERNAME) AS b 
+                                 ON s.USERNAME = b.USERNAME AND s.SAVEDATE = b.SAVEDATE;""", args)
+    return {username: (_to_datetime(savedate), combat_level, decode_highscores(bytes(stats)))
+            for username, savedate, combat_level, stats in rows}
+
+
+async def get_latest_snapshots(db: ConnectionPool) -> Dict[str, Tuple[datetime.datetime, int, Highscores]]:
+    """
+    :return: The latest snapshot of every player as {username: (save date, combat level, highscores)}
+    """
+    return await _get_boundary_snapshots(db, "MAX", None)
+
+
+async def get_latest_snapshots_of(db: ConnectionPool, usernames: Sequence[str], account_type: str) \
+        -> Dict[str, Tuple[datetime.datetime, int, List[List[int]]]]:
+    """
+    Snapshots have no account type of their own, so only players tracked with given account type are included. Their
+    snapshots are from the highscores of that account type.
+
+    :return: The latest snapshot of given players that have one, as {username: (save date, combat level, highscores
+    data)} with lowercase usernames
+    """
+    if not usernames:
+        return {}
+    placeholders = ", ".join(["%s"] * len(usernames))
+    rows = await db.fetchall(f"""SELECT s.USERNAME, s.SAVEDATE, s.COMBAT_LEVEL, s.STATS FROM tracked_snapshots AS s 
+                                 JOIN (SELECT USERNAME, MAX(SAVEDATE) AS SAVEDATE FROM tracked_snapshots 
+                                       WHERE USERNAME IN ({placeholders}) GROUP BY USERNAME) AS b 
+                                 ON s.USERNAME = b.USERNAME AND s.SAVEDATE = b.SAVEDATE 
+                                 JOIN tracked_players AS p ON LOWER(p.USERNAME) = s.USERNAME 
+                                 WHERE p.ACC_TYPE = %s;""",
+                             [username.lower() for username in usernames] + [account_type])
+    return {username: (_to_datetime(savedate), combat_level, decode_snapshot(bytes(stats)))
+            for username, savedate, combat_level, stats in rows}
+
+
+async def get_first_snapshots_since(db: ConnectionPool, since: datetime.datetime) \
+        -> Dict[str, Tuple[datetime.datetime, int, Highscores]]:
+    """
+    :return: The oldest snapshot saved at or after given date of every player that has one, as
+    {username: (save date, combat level, highscores)}
+    """
+    return await _get_boundary_snapshots(db, "MIN", since)
+
+
+def select_expired(savedates: List[datetime.datetime], now: datetime.datetime) -> List[datetime.datetime]:
+    """
+    Select the snapshots of one player that the retention policy doesn't keep. The oldest snapshot of each day or week
+    is kept so that period gains stay accurate.
+
+    :param savedates: Save dates of the player's snapshots
+    :param now: Current time
+    :return: Save dates of the snapshots to delete
+    """
+    expired = []
+    kept_buckets = set()
+    for savedate in sorted(savedates):
+        age = now - savedate
+        if age < FULL_RETENTION:
+            continue
+        if age >= MAX_RETENTION:
+            expired.append(savedate)
+            continue
+        if age < DAILY_RETENTION:
+            bucket = savedate.date()
+        else:
+            bucket = savedate.isocalendar()[:2]
+        if bucket in kept_buckets:
+            expired.append(savedate)
+        else:
+            kept_buckets.add(bucket)
+    return expired
+
+
+async def apply_retention(db: ConnectionPool, now: datetime.datetime = None) -> int:
+    """
+    Downsample old snapshots of every player according to the retention policy.
+
+    :return: Amount of deleted snapshots
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    rows = await db.fetchall("""SELECT USERNAME, SAVEDATE FROM tracked_snapshots WHERE SAVEDATE < %s 
+                                ORDER BY USERNAME;""", [(now - FULL_RETENTION).strftime(DATE_FORMAT)])
+
+    savedates_by_player = {}
+    for username, savedate in rows:
+        savedates_by_player.setdefault(username, []).append(_to_datetime(savedate))
+
+    expired = [(username, savedate.strftime(DATE_FORMAT))
+               for username, savedates in savedates_by_player.items()
+               for savedate in select_expired(savedates, now)]
+    if expired:
+        await db.executemany("DELETE FROM tracked_snapshots WHERE USERNAME = %s AND SAVEDATE = %s;", expired)
+    return len(expired)
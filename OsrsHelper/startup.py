@@ -0,0 +1,110 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import importlib
+import time
+from typing import Awaitable, Dict, Iterable, List
+
+
+class StartupTimer:
+    """
+    Durations of the consecutive phases of the startup.
+    """
+
+    def __init__(self, started: float = None):
+        """
+        :param started: time.perf_counter() when the first phase started. Defaults to now.
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.phases = collections.OrderedDict()
+        self._phase_started = self.started
+
+    def mark(self, phase: str) -> float:
+        """
+        End a phase that started when the previous one ended.
+
+        :return: Duration of the phase in seconds
+        """
+        now = time.perf_counter()
+        self.phases[phase] = now - self._phase_started
+        self._phase_started = now
+        return self.phases[phase]
+
+    @property
+    def total(self) -> float:
+        return self._phase_started - self.started
+
+    def format(self) -> str:
+        phases = ", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in self.phases.items())
+        return f"{phases}, total {self.total:.2f} s"
+
+
+def import_modules(module_names: Iterable[str]) -> List[str]:
+    """
+    Import given modules so that importing them again later is instant. Meant to be run in a thread while the event
+    loop waits for the network, so module level code must not use the event loop.
+
+    :return: Names of the modules that failed to import. They fail again when they are imported normally.
+    """
+    failed = []
+    for module_name in module_names:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            failed.append(module_name)
+    return failed
+
+
+async def overlap_imports(module_names: Iterable[str], coroutine: Awaitable):
+    """
+    Import modules in a thread while awaiting a coroutine, e.g. the login request.
+
+    :return: Result of the coroutine
+    """
+    imports = asyncio.get_event_loop().run_in_executor(None, import_modules, list(module_names))
+    result, _ = await asyncio.gather(coroutine, imports)
+    return result
+
+
+async def warm_up(warm_ups: Dict[str, Awaitable]) -> Dict[str, float]:
+    """
+    Run warm up coroutines concurrently. Failures are printed and don't stop the others.
+
+    :param warm_ups: Coroutines by name
+    :return: Seconds until each coroutine finished by name
+    """
+    started = time.perf_counter()
+    durations = {}
+
+    async def run(name, coroutine):
+        try:
+            await coroutine
+        except Exception as e:
+            print(f"Warming up {name} failed: {e}")
+        durations[name] = time.perf_counter() - started
+
+    await asyncio.gather(*[run(name, coroutine) for name, coroutine in warm_ups.items()])
+    return durations
@@ -0,0 +1,172 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import datetime
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from OsrsHelper import snapshots
+from OsrsHelper.database import ConnectionPool
+
+
+class RateLimiter:
+    """
+    Spaces out requests to one host so that on average at most `rate` requests are started per second. Every interval
+    is randomly stretched or shortened by `jitter` to avoid sending requests in a fixed rhythm.
+    """
+
+    def __init__(self, rate: float, jitter: float = 0.2):
+        self.interval = 1 / rate
+        self.jitter = jitter
+        self._next_slot = 0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class TrackingScheduler:
+    """
+    Background task that refreshes the highscores of all tracked players in rate limited, concurrent batches and
+    stores them as snapshots (see snapshots.py). Old snapshots are downsampled after every round. Players whose
+    latest snapshot is older than the refresh interval are selected from the database on every round, so the refresh
+    continues from where it was left after a restart.
+    """
+
+    def __init__(self, db: ConnectionPool,
+                 fetch_highscores: Callable[[str, str], Awaitable[Tuple[Optional[list], Optional[int]]]],
+                 interval: float = 6 * 60 * 60, batch_size: int = 50, concurrency: int = 5,
+                 requests_per_second: float = 2, jitter: float = 0.2, idle_time: float = 5 * 60):
+        """
+        :param db: Connection pool to the bot database
+        :param fetch_highscores: Coroutine function taking username and account type and returning the highscores and
+        combat level in the same format as highscores.get_highscores_data
+        :param interval: Seconds between two refreshes of the same player
+        :param batch_size: Amount of players that are fetched before their snapshots are written to the database
+        :param concurrency: Maximum amount of simultaneous highscores requests
+        :param requests_per_second: Rate limit for the highscores host
+        :param jitter: Relative random variation of the spacing between requests
+        :param idle_time: Seconds to wait before checking again when no players need a refresh
+        """
+        self.db = db
+        self.fetch_highscores = fetch_highscores
+        self.interval = interval
+        self.batch_size = batch_size
+        self.idle_time = idle_time
+        self.rate_limiter = RateLimiter(requests_per_second, jitter)
+        self._semaphore = asyncio.BoundedSemaphore(concurrency)
+        self._task = None
+        # Players not found from the highscores (e.g. renamed) are skipped until the next interval
+        self._failed_at = {}
+        self.metrics = {"rounds": 0, "round_total": 0, "round_done": 0, "round_failed": 0, "refreshed": 0,
+                        "failed": 0, "last_round_seconds": 0.0, "deleted_by_retention": 0}
+
+    async def setup(self):
+        await snapshots.setup(self.db)
+
+    async def get_due_players(self) -> List[Tuple[str, str]]:
+        """
+        :return: (username, account type) of every tracked player without a snapshot newer than the refresh interval
+        """
+        threshold = datetime.datetime.now() - datetime.timedelta(seconds=self.interval)
+        return await self.db.fetchall("""SELECT USERNAME, ACC_TYPE FROM tracked_players AS p WHERE NOT EXISTS 
+                                         (SELECT 1 FROM tracked_snapshots AS s 
+                                          WHERE s.USERNAME = p.USERNAME AND s.SAVEDATE > %s) 
+                                         ORDER BY USERNAME;""", [threshold.strftime(snapshots.DATE_FORMAT)])
+
+    async def _fetch(self, username: str, account_type: str) -> Optional[tuple]:
+        async with self._semaphore:
+            await self.rate_limiter.wait()
+            try:
+                highscores_data, combat_level = await self.fetch_highscores(username, account_type)
+            except Exception:
+                # Timeouts, connection errors and pages that are not highscores (HighscoresUnavailableError). The
+                # player is tried again on the next round.
+                highscores_data = None
+        if not highscores_data:
+            self._failed_at[username] = time.monotonic()
+            self.metrics["round_failed"] += 1
+            self.metrics["failed"] += 1
+            return None
+        self.metrics["round_done"] += 1
+        return username, datetime.datetime.now(), combat_level, highscores_data
+
+    async def refresh_batch(self, players: List[Tuple[str, str]]) -> int:
+        """
+        Fetch the highscores for given players concurrently and write all successful ones with one query.
+
+        :return: Amount of snapshots written
+        """
+        results = await asyncio.gather(*[self._fetch(username, account_type) for username, account_type in players])
+        new_snapshots = [result for result in results if result is not None]
+        await snapshots.add_snapshots(self.db, new_snapshots)
+        self.metrics["refreshed"] += len(new_snapshots)
+        return len(new_snapshots)
+
+    async def refresh_due(self) -> int:
+        """
+        Run one round: refresh every player that is due in batches.
+
+        :return: Amount of players that were due
+        """
+        started = time.monotonic()
+        self._failed_at = {username: failed_at for username, failed_at in self._failed_at.items()
+                           if started - failed_at < self.interval}
+        players = [player for player in await self.get_due_players() if player[0] not in self._failed_at]
+        self.metrics.update(round_total=len(players), round_done=0, round_failed=0)
+        for start in range(0, len(players), self.batch_size):
+            await self.refresh_batch(players[start:start + self.batch_size])
+        if players:
+            self.metrics["rounds"] += 1
+            self.metrics["last_round_seconds"] = time.monotonic() - started
+            self.metrics["deleted_by_retention"] = await snapshots.apply_retention(self.db)
+        return len(players)
+
+    async def run(self):
+        await self.setup()
+        while True:
+            try:
+                await self.refresh_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Tracking refresh failed: {e}")
+            await asyncio.sleep(self.idle_time)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def progress(self) -> Dict[str, float]:
+        return dict(self.metrics, running=self._task is not None and not self._task.done())
@@ -0,0 +1,154 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import asyncio
+import collections
+import datetime
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List
+
+from OsrsHelper import metrics
+
+BlockReport = collections.namedtuple("BlockReport", ["started_at", "duration", "blamed", "stack"])
+
+_PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoopWatchdog:
+    """
+    Detects callbacks that block the event loop. A task on the event loop beats every `interval` seconds, and a
+    sampling thread captures the stack of the event loop thread when the beat is late by more than `threshold`
+    seconds. The block is blamed on the innermost command in the stack, or on the innermost frame of this package,
+    and reported when the event loop runs again.
+
+    The overhead is one short callback on the event loop and one thread wakeup per interval, so the watchdog can be
+    left running and be started and stopped at any time.
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.1, registry: metrics.MetricsRegistry = None,
+                 get_command_names: Callable[[], Dict[object, str]] = None, max_reports: int = 20):
+        """
+        :param threshold: Seconds the event loop may be blocked before it is reported
+        :param interval: Seconds between two beats and two samples
+        :param registry: Registry for the block counters and durations. Defaults to the bot-wide registry.
+        :param get_command_names: Function returning command names by the code objects of their callbacks. Called only
+        when the event loop is blocked.
+        :param max_reports: Amount of latest reports that are kept
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.registry = metrics.REGISTRY if registry is None else registry
+        self.get_command_names = get_command_names
+        self.reports = collections.deque(maxlen=max_reports)
+        self.max_lag = 0.0
+        self._last_beat = time.monotonic()
+        self._beats = 0
+        self._sampled_beat = -1
+        self._pending = None
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stopped = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        # Every sampling thread gets its own event, so a thread that is still sleeping after a stop is not revived by
+        # the next start
+        self._stopped = threading.Event()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.ensure_future(self._beat())
+        self._thread = threading.Thread(target=self._sample, args=(self._stopped,), name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stopped is not None:
+            self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._thread = None
+
+    async def _beat(self):
+        self._loop_thread_id = threading.get_ident()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - expected)
+            self._last_beat = now
+            self._beats += 1
+            pending, self._pending = self._pending, None
+            if pending is not None:
+                self._report(pending._replace(duration=now - expected))
+
+    def _sample(self, stopped: threading.Event):
+        while not stopped.wait(self.interval):
+            beat = self._beats
+            late = time.monotonic() - self._last_beat - self.interval
+            if late > self.threshold and beat != self._sampled_beat and self._loop_thread_id is not None:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._sampled_beat = beat
+                    self._pending = BlockReport(datetime.datetime.now() - datetime.timedelta(seconds=late), late,
+                                                self.blame(frame), "".join(traceback.format_stack(frame, limit=12)))
+
+    def blame(self, frame) -> str:
+        """
+        :param frame: Innermost frame of the event loop thread
+        :return: Name of the command or location of the code that is running in the frame
+        """
+        command_names = self.get_command_names() if self.get_command_names is not None else {}
+        innermost = None
+        while frame is not None:
+            name = command_names.get(frame.f_code)
+            if name is not None:
+                return f"command {name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+            filename = os.path.abspath(frame.f_code.co_filename)
+            if innermost is None and filename.startswith(_PACKAGE_DIRECTORY):
+                innermost = f"{frame.f_code.co_name} ({os.path.relpath(filename, _PACKAGE_DIRECTORY)}:{frame.f_lineno})"
+            frame = frame.f_back
+        return innermost or "unknown"
+
+    def _report(self, report: BlockReport):
+        self.reports.append(report)
+        self.registry.increment("event_loop_blocks_total", (("blamed", report.blamed.split(" (")[0]),))
+        self.registry.observe("event_loop_block_seconds", report.duration)
+        print(f"Event loop was blocked for {report.duration * 1000:.0f} ms by {report.blamed}:\n{report.stack}",
+              file=sys.stderr)
+
+    def status(self) -> Dict[str, object]:
+        return {"running": self.running, "threshold_ms": self.threshold * 1000, "interval_ms": self.interval * 1000,
+                "max_lag_ms": round(self.max_lag * 1000, 1), "blocks": len(self.reports)}
+
+    def latest_reports(self, amount: int = 3) -> List[BlockReport]:
+        return list(self.reports)[-amount:]
@@ -0,0 +1,112 @@
+"""
+MIT License
+
+Copyright (c) 2019-2020 Visperi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import gzip
+import os
+from typing import Iterable, List, Mapping, Optional
+
+from OsrsHelper.clueindex import normalize
+from OsrsHelper.itemindex import ItemIndex
+
+WIKI_URL = "https://oldschool.runescape.wiki"
+# Dump of the wiki page titles in the resources directory. The first existing file is loaded.
+WIKI_TITLES_FILES = ("wiki_titles.tsv.gz", "wiki_titles.tsv")
+
+
+def page_href(title: str) -> str:
+    """
+    :return: Path of a wiki page relative to WIKI_URL
+    """
+    return "/w/" + "_".join(title.split())
+
+
+def find_titles_file(directory: str) -> Optional[str]:
+    """
+    :return: Path of the first existing wiki titles dump in given directory or None
+    """
+    for filename in WIKI_TITLES_FILES:
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class WikiIndex:
+    """
+    In-memory index of Osrs wiki page titles and redirects. Titles are looked up by their normalized form, and searches
+    that are not titles or redirects are ranked by the same similarity as item names.
+    """
+
+    def __init__(self, titles: Iterable[str] = (), redirects: Mapping[str, str] = None):
+        """
+        :param titles: Titles of all content pages
+        :param redirects: Target page titles by redirect title
+        """
+        # Redirects are the item keys of the pages, so they are resolved only to existing pages
+        self._pages = ItemIndex(((title, index) for index, title in enumerate(titles)), redirects)
+
+    @classmethod
+    def load(cls, path: str) -> "WikiIndex":
+        """
+        Load a dump of wiki titles. Every line is either a page title, or a redirect title and the target page title
+        separated by a tab. Underscores are read as spaces, so the all-titles-in-ns0 dumps of MediaWiki can be used as
+        such. Files ending in .gz are decompressed.
+
+        :param path: Path to the dump file
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        titles = []
+        redirects = {}
+        with opener(path, "rt", encoding="utf-8") as dump_file:
+            for line in dump_file:
+                fields = line.rstrip("\r\n").replace("_", " ").split("\t")
+                title = fields[0].strip()
+                if not title or title == "page title":
+                    continue
+                if len(fields) > 1:
+                    # Links to page sections are resolved to the whole page
+                    redirects[title] = fields[1].split("#")[0].strip()
+                else:
+                    titles.append(title)
+        return cls(titles, redirects)
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def find_page(self, search: str) -> Optional[str]:
+        """
+        :return: Title of the page with given title or redirect title (case insensitive) or None
+        """
+        key = normalize(search)
+        page = self._pages.get_item(key)
+        if page is not None:
+            return page.name
+        index = self._pages.item_keys.get(key)
+        return None if index is None else self._pages.names[index]
+
+    def suggest(self, search: str, limit: int = 5) -> List[str]:
+        """
+        :return: Titles of the pages most similar to given search
+        """
+        return [match.name for match in self._pages.suggest(search, limit=limit)]
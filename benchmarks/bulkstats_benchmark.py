@@ -0,0 +1,88 @@
+"""
+Compare looking up the stats of many accounts with one command 'stats' per account, each fetching and rendering one
+score table after another, with one bulk command that fetches the highscores concurrently and renders the levels of
+all accounts side by side. The aiohttp session is replaced with a fake one that answers after a fixed delay.
+
+Run from the repository root:
+    python -m benchmarks.bulkstats_benchmark [accounts] [latency_ms]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from OsrsHelper import fetcher, highscores, scoretable
+from benchmarks.highscores_benchmark import make_response
+
+BULK_CONCURRENCY = 5
+
+
+class FakeResponse:
+
+    def __init__(self, text: str, latency: float):
+        self._text = text
+        self.latency = latency
+        self.status = 200
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.latency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def text(self, encoding="utf-8"):
+        return self._text
+
+
+class FakeSession:
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+
+    def get(self, link, timeout=None):
+        self.requests += 1
+        random.seed(link)
+        return FakeResponse(make_response(34), self.latency)
+
+
+async def one_by_one(usernames: list, latency: float) -> int:
+    html_fetcher = fetcher.Fetcher(FakeSession(latency))
+    messages = 0
+    for username in usernames:
+        highscores_data, combat_level = await highscores.get_highscores_data(html_fetcher, username)
+        scoretable.make_scoretable(highscores_data, username, combat_level)
+        messages += 1
+    return messages
+
+
+async def bulk(usernames: list, latency: float) -> int:
+    html_fetcher = fetcher.Fetcher(FakeSession(latency))
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def fetch(username):
+        async with semaphore:
+            return await highscores.get_highscores_data(html_fetcher, username)
+
+    results = await asyncio.gather(*[fetch(username) for username in usernames])
+    tables = scoretable.make_levels_tables(usernames, [result[0] for result in results],
+                                           [result[1] for result in results])
+    assert all(len(table) <= scoretable.MAX_MESSAGE_LENGTH for table in tables)
+    return len(tables)
+
+
+async def main(accounts: int, latency: float):
+    usernames = [f"Clanmate {i}" for i in range(accounts)]
+    for name, lookup in (("one command per account", one_by_one), ("bulk command", bulk)):
+        started = time.perf_counter()
+        messages = await lookup(usernames, latency)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<24} {accounts} accounts in {elapsed * 1000:>6.0f} ms, {messages} messages")
+
+
+if __name__ == '__main__':
+    account_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 150
+    asyncio.get_event_loop().run_until_complete(main(account_amount, latency_ms / 1000))
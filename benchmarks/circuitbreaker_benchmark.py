@@ -0,0 +1,100 @@
+"""
+Simulate an upstream that stops answering and compare how long bursts of commands wait with and without the circuit
+breakers of Fetcher, and how many of them are answered from cache. The aiohttp session is replaced with a fake one
+whose latency can be changed.
+
+Run from the repository root:
+    python -m benchmarks.circuitbreaker_benchmark [bursts] [burst size]
+"""
+
+import asyncio
+import sys
+import time
+
+from OsrsHelper import circuitbreaker, fetcher
+
+HOST = "services.runescape.com"
+# Short TTL so that the responses of the healthy phase are expired when the upstream goes down
+POLICIES = {f"https://{HOST}/": fetcher.CachePolicy(ttl=0.1)}
+TIMEOUT = 2
+
+
+class FakeResponse:
+
+    def __init__(self, session, timeout: float):
+        self.session = session
+        self.timeout = timeout
+        self.status = 200
+
+    async def __aenter__(self):
+        await asyncio.wait_for(asyncio.sleep(self.session.latency), self.timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def text(self, encoding="utf-8"):
+        return "1,2277,30414\n" * 80
+
+
+class FakeSession:
+
+    def __init__(self):
+        self.latency = 0.03
+        self.requests = 0
+
+    def get(self, link, timeout=None):
+        self.requests += 1
+        return FakeResponse(self, timeout)
+
+
+async def command(shared_fetcher: fetcher.Fetcher, link: str) -> bool:
+    try:
+        await shared_fetcher.visit_website(link, timeout=TIMEOUT)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+async def run(breaker: circuitbreaker.CircuitBreaker, bursts: int, burst_size: int):
+    session = FakeSession()
+    shared_fetcher = fetcher.Fetcher(session, policies=POLICIES)
+    shared_fetcher.breakers[HOST] = breaker
+    links = [f"https://{HOST}/m=hiscore_oldschool/index_lite.ws?player=player{i}" for i in range(burst_size * 2)]
+
+    # Healthy upstream. Half of the players are cached.
+    for link in links[:burst_size] * 2:
+        await command(shared_fetcher, link)
+    timeout = breaker.get_timeout(TIMEOUT)
+    await asyncio.sleep(0.2)
+
+    session.latency = 60
+    answered = 0
+    started = time.perf_counter()
+    for burst in range(bursts):
+        # Every burst shifts one player further, so later bursts ask for more players that were never cached
+        results = await asyncio.gather(*[command(shared_fetcher, links[(burst + i) % len(links)])
+                                         for i in range(burst_size)])
+        answered += sum(results)
+    elapsed = time.perf_counter() - started
+
+    session.latency = 0.03
+    await asyncio.sleep(breaker.retry_after())
+    recovered = await command(shared_fetcher, links[-1])
+    stats = shared_fetcher.stats()
+    print(f"timeout {timeout:.1f} s, {bursts} bursts of {burst_size} commands waited {elapsed:.2f} s, "
+          f"{answered} answered ({stats['fallback_hits']} from expired cache), {stats['rejected']} rejected, "
+          f"circuit {breaker.state} after recovery: {recovered}")
+
+
+def main(bursts: int, burst_size: int):
+    loop = asyncio.get_event_loop()
+    print("Without circuit breaker:")
+    loop.run_until_complete(run(circuitbreaker.CircuitBreaker(HOST, failure_threshold=10 ** 9, min_samples=10 ** 9),
+                                bursts, burst_size))
+    print("With circuit breaker:")
+    loop.run_until_complete(run(circuitbreaker.CircuitBreaker(HOST, reset_timeout=0.5), bursts, burst_size))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5, int(sys.argv[2]) if len(sys.argv) > 2 else 10)
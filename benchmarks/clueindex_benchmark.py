@@ -0,0 +1,94 @@
+"""
+Measure clue search latency of the in-memory ClueIndex against the old exact and LIKE queries. The clue tables are
+generated into an in-memory SQLite database of the same shape as the MySQL tables, so the old queries are measured
+without any network round-trip. Prefix search results are checked to match the LIKE query results.
+
+Run from the repository root:
+    python -m benchmarks.clueindex_benchmark [clues per table] [searches]
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+
+from OsrsHelper import clueindex, database
+
+SYLLABLES = ["ar", "ba", "dor", "el", "fa", "gon", "ho", "is", "ka", "lum", "mo", "nor", "ock", "pe", "ra", "sol",
+             "ta", "un", "var", "wy", "xe", "za", "bri", "dge", "tch"]
+
+
+def make_words(rng: random.Random, amount: int) -> list:
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(amount)]
+
+
+def make_clue(rng: random.Random, words: list) -> str:
+    return " ".join(rng.choice(words) for _ in range(rng.randint(2, 8))).capitalize()
+
+
+def make_typo(rng: random.Random, text: str) -> str:
+    position = rng.randrange(len(text))
+    return text[:position] + rng.choice("aeiourst") + text[position + 1:]
+
+
+async def timed(func, queries: list) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        result = func(query)
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.perf_counter() - started) / len(queries)
+
+
+async def main(clues: int, searches: int):
+    rng = random.Random(1)
+    words = make_words(rng, 2000)
+    pool = database.ConnectionPool(
+        lambda: sqlite3.connect("file:clues?mode=memory&cache=shared", uri=True, check_same_thread=False),
+        size=4, paramstyle="qmark")
+    async with pool.connection() as connection:
+        for table, column in [("anagrams", "ANAGRAM"), ("ciphers", "CIPHER")]:
+            await connection.execute(f"CREATE TABLE {table} ({column} TEXT, SOLUTION TEXT, LOCATION TEXT, "
+                                     f"CHALLENGE_ANS TEXT, PUZZLE TEXT);")
+            rows = [(make_clue(rng, words), "Solution", "Location", "0", "") for _ in range(clues)]
+            await connection.executemany(f"INSERT INTO {table} VALUES (%s, %s, %s, %s, %s);", rows)
+        await connection.execute("CREATE TABLE cryptics (CRYPTIC TEXT, SOLUTION TEXT, IMAGE TEXT);")
+        await connection.executemany("INSERT INTO cryptics VALUES (%s, %s, %s);",
+                                     [(make_clue(rng, words), "Solution", "") for _ in range(clues)])
+
+    solver = clueindex.ClueSolver()
+    started = time.perf_counter()
+    counts = await solver.refresh(pool)
+    print(f"Loaded {sum(counts.values())} clues into indexes in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    index = solver.indexes["anagrams"]
+    keys = [row[0] for row in index.rows]
+    query_sets = {"exact": [rng.choice(keys) for _ in range(searches)],
+                  "prefix": [rng.choice(keys)[:rng.randint(3, 10)].strip() for _ in range(searches)],
+                  "substring": [" ".join(rng.choice(keys).split()[1:3]) for _ in range(searches)],
+                  "typo": [make_typo(rng, rng.choice(keys)) for _ in range(searches)]}
+
+    for query in query_sets["prefix"][:200]:
+        rows = await pool.fetchall("SELECT * FROM anagrams WHERE ANAGRAM LIKE %s;", [query + "%"])
+        assert sorted(rows) == sorted(index.rows[clue_id] for clue_id in index.prefix(query))
+
+    async def old_search(query):
+        results = await pool.fetchall("SELECT * FROM anagrams WHERE ANAGRAM = %s;", [query])
+        if not results:
+            results = await pool.fetchall("SELECT * FROM anagrams WHERE ANAGRAM LIKE %s;", [query + "%"])
+        return results
+
+    print(f"{'search':<12}{'per search (sqlite)':>22}{'per search (index)':>21}{'found (index)':>16}")
+    for name, queries in query_sets.items():
+        old_time = await timed(old_search, queries)
+        new_time = await timed(index.search, queries)
+        found = sum(1 for query in queries if index.search(query))
+        print(f"{name:<12}{old_time * 1e6:>19.1f} us{new_time * 1e6:>18.1f} us{found:>10}/{len(queries)}")
+    pool.close()
+
+
+if __name__ == '__main__':
+    clues_per_table = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    search_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    asyncio.get_event_loop().run_until_complete(main(clues_per_table, search_count))
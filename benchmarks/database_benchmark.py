@@ -0,0 +1,118 @@
+"""
+Compare event loop latency when N commands query the database in parallel using the old shared blocking cursor and the
+ConnectionPool. A fake connection that sleeps for every query is used to simulate a network round-trip to MySQL, and
+the same queries are run once against an in-memory SQLite database to check the pool works with a real driver.
+
+Run from the repository root:
+    python -m benchmarks.database_benchmark [parallel commands] [query latency in ms]
+"""
+
+import asyncio
+import sqlite3
+import sys
+import time
+
+from OsrsHelper import database
+
+
+class FakeCursor:
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.rowcount = 0
+
+    def execute(self, query, args=()):
+        time.sleep(self.latency)
+        self.rowcount = 1
+
+    def executemany(self, query, args_list):
+        time.sleep(self.latency)
+        self.rowcount = len(args_list)
+
+    def fetchone(self):
+        return "normal",
+
+    def fetchall(self):
+        return [("normal",)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def cursor(self):
+        return FakeCursor(self.latency)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.001) -> list:
+    loop = asyncio.get_event_loop()
+    lags = []
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - started - interval)
+    return lags
+
+
+async def run_commands(query_func, commands: int) -> tuple:
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(measure_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*[query_func() for _ in range(commands)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await lag_task
+    return elapsed, max(lags) if lags else elapsed
+
+
+async def main(commands: int, latency_ms: float):
+    latency = latency_ms / 1000
+    shared_cursor = FakeConnection(latency).cursor()
+
+    async def blocking_query():
+        # The old way: every cog used the same cursor directly inside the coroutine
+        shared_cursor.execute("SELECT ACC_TYPE FROM tracked_players WHERE USERNAME = %s;", ["zezima"])
+        return shared_cursor.fetchone()
+
+    pool = database.ConnectionPool(lambda: FakeConnection(latency), size=8)
+
+    async def pooled_query():
+        return await pool.fetchone("SELECT ACC_TYPE FROM tracked_players WHERE USERNAME = %s;", ["zezima"])
+
+    print(f"{commands} parallel commands, {latency_ms} ms per query")
+    for name, query_func in [("shared cursor", blocking_query), ("pool (8)", pooled_query)]:
+        elapsed, max_lag = await run_commands(query_func, commands)
+        print(f"{name:<15} total {elapsed * 1000:>8.1f} ms   max loop lag {max_lag * 1000:>8.1f} ms")
+    pool.close()
+
+    sqlite_pool = database.ConnectionPool(
+        lambda: sqlite3.connect("file:benchmark?mode=memory&cache=shared", uri=True, check_same_thread=False),
+        size=4, paramstyle="qmark")
+    async with sqlite_pool.connection() as connection:
+        await connection.execute("CREATE TABLE tracked_players (USERNAME TEXT PRIMARY KEY, ACC_TYPE TEXT);")
+        await connection.executemany("INSERT INTO tracked_players VALUES (%s, %s);",
+                                     [(f"player{i}", "normal") for i in range(1000)])
+        results = await asyncio.gather(*[sqlite_pool.fetchone(
+            "SELECT ACC_TYPE FROM tracked_players WHERE USERNAME = %s;", [f"player{i}"]) for i in range(commands)])
+    assert all(result == ("normal",) for result in results)
+    print(f"sqlite stand-in answered {len(results)} parallel queries")
+    sqlite_pool.close()
+
+
+if __name__ == '__main__':
+    parallel_commands = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    query_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.get_event_loop().run_until_complete(main(parallel_commands, query_latency))
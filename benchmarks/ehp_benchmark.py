@@ -0,0 +1,68 @@
+"""
+Calculate time to max and time to 200M for random players with EhpCalculator and compare it with integrating the ehp
+rates section by section in pure Python. Both one player at a time (command 'ttm') and many players at once are
+measured.
+
+Run from the repository root:
+    python -m benchmarks.ehp_benchmark [players]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from OsrsHelper import ehp, experience, highscores, registry
+
+
+def python_hours_to(ehp_table, skills_experience: list, target: int) -> float:
+    hours = 0.0
+    for skill, current in zip(highscores.SKILLS[1:], skills_experience[1:]):
+        skill_ehp = ehp_table.get(skill)
+        if not skill_ehp or current >= target:
+            continue
+        for index, (threshold, rate) in enumerate(zip(skill_ehp.thresholds, skill_ehp.rates)):
+            end = skill_ehp.thresholds[index + 1] if index + 1 < len(skill_ehp.thresholds) else target
+            end = min(end, target)
+            start = max(threshold, current) if index else current
+            if end > start:
+                hours += (end - start) / rate
+    return hours
+
+
+def main(players: int):
+    resources = registry.ResourceRegistry(os.path.join("OsrsHelper", "resources"))
+    resources.load()
+    rng = np.random.RandomState(0)
+    skills_experience = rng.randint(0, experience.MAX_EXPERIENCE, size=(players, highscores.SKILL_ROWS))
+    skills_experience[rng.rand(players, highscores.SKILL_ROWS) < 0.7] //= 20
+    experience_lists = skills_experience.tolist()
+
+    for table in registry.EHP_TABLES:
+        ehp_table = resources.ehp[table]
+        started = time.perf_counter()
+        calculator = ehp.get_calculator(resources, table)
+        setup_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        python_ttm = [python_hours_to(ehp_table, player, ehp.MAX_SKILL_EXPERIENCE) for player in experience_lists]
+        python_time = (time.perf_counter() - started) / players
+
+        started = time.perf_counter()
+        single_ttm = [calculator.time_to_max(player)[0] for player in experience_lists[:1000]]
+        single_time = (time.perf_counter() - started) / min(players, 1000)
+
+        started = time.perf_counter()
+        ttm = calculator.time_to_max(skills_experience)[:, 0]
+        tt200m = calculator.time_to_200m(skills_experience)[:, 0]
+        batch_time = (time.perf_counter() - started) / players
+
+        assert np.allclose(ttm, python_ttm) and np.allclose(single_ttm, ttm[:1000])
+        print(f"{table:<14} setup {setup_time * 1000:>6.2f} ms   pure Python {python_time * 1e6:>7.1f} us   "
+              f"one player {single_time * 1e6:>7.1f} us   batch {batch_time * 1e6:>6.2f} us per player   "
+              f"mean ttm {ttm.mean():>8.1f} h, tt200m {tt200m.mean():>8.1f} h")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
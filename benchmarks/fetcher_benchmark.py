@@ -0,0 +1,65 @@
+"""
+Simulate bursts of users running the same commands at the same time and count how many upstream requests the shared
+Fetcher saves. The aiohttp session is replaced with a fake one that answers after a fixed delay.
+
+Run from the repository root:
+    python -m benchmarks.fetcher_benchmark [requests] [distinct urls]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from OsrsHelper import fetcher
+
+
+class FakeResponse:
+
+    def __init__(self, text: str):
+        self._text = text
+        self.status = 200
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.05)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    async def text(self, encoding="utf-8"):
+        return self._text
+
+
+class FakeSession:
+
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, link, timeout=None):
+        self.requests += 1
+        return FakeResponse("1,2277,30414\n" * 80)
+
+
+async def main(requests: int, distinct_urls: int):
+    session = FakeSession()
+    shared_fetcher = fetcher.Fetcher(session)
+    links = [f"https://services.runescape.com/m=hiscore_oldschool/index_lite.ws?player=player{i}"
+             for i in range(distinct_urls)]
+    random.seed(0)
+
+    started = time.perf_counter()
+    for _ in range(requests // 50):
+        # 50 commands arrive at the same time
+        await asyncio.gather(*[shared_fetcher.visit_website(random.choice(links)) for _ in range(50)])
+    elapsed = time.perf_counter() - started
+
+    print(f"{requests} requests over {distinct_urls} urls in {elapsed:.2f} s, {session.requests} upstream requests")
+    for key, value in shared_fetcher.stats().items():
+        print(f"{key:<18} {value}")
+
+
+if __name__ == '__main__':
+    request_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    url_amount = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.get_event_loop().run_until_complete(main(request_amount, url_amount))
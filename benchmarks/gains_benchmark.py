@@ -0,0 +1,75 @@
+"""
+Calculate gains for many players with compute_gains() and compare it to calculating them one player at a time like
+command 'gains' does. A part of the old snapshots have fewer activity rows to test padding of ragged schemas.
+
+Run from the repository root:
+    python -m benchmarks.gains_benchmark [players]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from OsrsHelper import ehp, highscores, registry
+from OsrsHelper.gains import compute_gains
+
+
+def make_scores(rng, players: int, activity_rows: int, base: np.ndarray = None):
+    scores = []
+    for i in range(players):
+        if base is None:
+            skills = rng.integers(0, 13034431, size=(24, 3))
+            activities = rng.integers(0, 5000, size=(activity_rows, 2))
+        else:
+            skills = base[i].skills + rng.integers(0, 50000, size=(24, 3))
+            activities = np.concatenate((base[i].activities, rng.integers(0, 10, size=(activity_rows, 2))))[
+                :activity_rows]
+        scores.append(highscores.Highscores(skills, activities))
+    return scores
+
+
+def per_player(old_scores, new_scores):
+    results = []
+    for old, new in zip(old_scores, new_scores):
+        old, new = highscores.align(old, new)
+        skills_difference = new.skills - old.skills
+        activities_difference = new.activities - old.activities
+        skills_difference[:, 0] *= -1
+        activities_difference[:, 0] *= -1
+        results.append(skills_difference.tolist() + activities_difference.tolist())
+    return sorted(results, key=lambda gains: gains[0][2], reverse=True)[:10]
+
+
+def main(players: int):
+    rng = np.random.default_rng(0)
+    old_scores = make_scores(rng, players // 2, 56) + make_scores(rng, players - players // 2, 55)
+    new_scores = make_scores(rng, players, 56, base=old_scores)
+    usernames = [f"player{i}" for i in range(players)]
+    account_types = ["normal" if i % 3 else "ironman" for i in range(players)]
+
+    resources = registry.ResourceRegistry(os.path.join("OsrsHelper", "resources"))
+    resources.load()
+    calculators = {account_type: ehp.EhpCalculator(resources.ehp[table])
+                   for account_type, table in ehp.ACCOUNT_TYPE_TABLES.items()}
+
+    started = time.perf_counter()
+    per_player(old_scores, new_scores)
+    old_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = compute_gains(usernames, old_scores, new_scores, account_types, calculators)
+    top_xp = result.top(result.xp[:, 0])
+    top_ehp = result.top(result.ehp[:, 0])
+    new_time = time.perf_counter() - started
+
+    print(f"{players} players")
+    print(f"one player at a time (no ehp)  {old_time * 1000:>8.1f} ms")
+    print(f"compute_gains with ehp, top 10 {new_time * 1000:>8.1f} ms")
+    print(f"Top xp: {top_xp[:3]}")
+    print(f"Top ehp: {[(username, round(hours, 2)) for username, hours in top_ehp[:3]]}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
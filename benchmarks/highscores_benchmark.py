@@ -0,0 +1,67 @@
+"""
+Compare the old string based highscores parsing (followed by the int conversion that gains used to do) with
+parse_highscores() on a corpus of generated index_lite.ws responses in the layouts used over time.
+
+Run from the repository root:
+    python -m benchmarks.highscores_benchmark [responses]
+"""
+
+import random
+import sys
+import timeit
+
+import numpy as np
+
+from OsrsHelper import highscores
+
+
+def make_response(activity_rows: int) -> str:
+    rows = []
+    for _ in range(highscores.SKILL_ROWS):
+        if random.random() < 0.1:
+            rows.append("-1,1,-1")
+        else:
+            rows.append(f"{random.randint(1, 2000000)},{random.randint(1, 99)},{random.randint(0, 200000000)}")
+    for _ in range(activity_rows):
+        if random.random() < 0.5:
+            rows.append("-1,-1")
+        else:
+            rows.append(f"{random.randint(1, 500000)},{random.randint(1, 5000)}")
+    return "\n".join(rows) + "\n"
+
+
+def old_parse(raw_highscore_data: str):
+    highscore_data = []
+    for datarow in raw_highscore_data.split("\n")[:-1]:
+        datarow = datarow.split(",")
+        for index, value in enumerate(datarow):
+            if value == "-1":
+                datarow[index] = "0"
+        highscore_data.append(datarow)
+    return np.array(highscore_data[:24], dtype=int), np.array(highscore_data[24:], dtype=int)
+
+
+def new_parse(raw_highscore_data: str):
+    parsed = highscores.parse_highscores(raw_highscore_data)
+    return parsed.skills, parsed.activities
+
+
+def main(responses: int):
+    random.seed(0)
+    # Layouts before and after boss highscores were added
+    corpus = [make_response(random.choice([11, 55, 56])) for _ in range(responses)]
+
+    for raw in corpus[:100]:
+        old_skills, old_activities = old_parse(raw)
+        new_skills, new_activities = new_parse(raw)
+        assert (old_skills == new_skills).all() and (old_activities == new_activities).all()
+
+    old_time = timeit.timeit(lambda: [old_parse(raw) for raw in corpus], number=1)
+    new_time = timeit.timeit(lambda: [new_parse(raw) for raw in corpus], number=1)
+    print(f"{responses} responses")
+    print(f"old parser        {old_time / responses * 1e6:>8.2f} us per response")
+    print(f"parse_highscores  {new_time / responses * 1e6:>8.2f} us per response ({old_time / new_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,113 @@
+"""
+Measure the event loop lag while wiki search pages and the Old School Runescape homepage are parsed: building the whole
+tree on the event loop as the commands used to do, targeted extraction on the event loop, and targeted extraction in
+ParsingExecutor worker threads and processes. The pages are generated with the same structure and roughly the same size
+as the saved real pages.
+
+Run from the repository root:
+    python -m benchmarks.htmlparse_benchmark [pages]
+"""
+
+import asyncio
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from OsrsHelper import htmlparse
+from benchmarks.database_benchmark import measure_lag
+
+
+def make_filler(blocks: int, seed: int) -> str:
+    # Navigation, sidebars and scripts make up most of the real pages
+    return "".join(f'<div class="nav-block-{i}"><ul>'
+                   + "".join(f'<li><a href="/w/Page_{seed}_{i}_{j}" title="Page {j}">Page {j}</a></li>'
+                             for j in range(12))
+                   + f'</ul><p>Text {i} with <b>bold</b> and <i>italic</i> words.</p></div>'
+                   f'<script>var config{i} = {{"key": "{seed}-{i}"}};</script>' for i in range(blocks))
+
+
+def make_search_page(seed: int) -> str:
+    results = "".join(f'<li><div class="mw-search-result-heading"><a href="/w/Result_{seed}_{i}_(item)" '
+                      f'title="Result {seed} {i} (item)">Result {seed} {i}</a></div>'
+                      f'<div class="searchresult">Snippet of <span class="searchmatch">result</span> {i}</div>'
+                      f'<div class="mw-search-result-data">{i} KB ({i * 100} words)</div></li>' for i in range(20))
+    return f"<html><head><title>Search</title></head><body>{make_filler(60, seed)}" \
+           f'<ul class="mw-search-results">{results}</ul>{make_filler(40, seed + 1)}</body></html>'
+
+
+def make_homepage(seed: int) -> str:
+    articles = "".join(f'<article class="news-article"><div class="news-article__details">'
+                       f'<span class="news-article__sub">Game Updates </span>'
+                       f'<p class="news-article__title">'
+                       f'<a href="https://secure.runescape.com/m=news/article-{seed}-{i}" '
+                       f'id="news-article-link-{i}">Article {i}</a></p><p>Summary of article {i}.</p></div>'
+                       f'</article>' for i in range(1, 6))
+    return f"<html><body>{make_filler(50, seed)}<section>{articles}</section>{make_filler(50, seed + 1)}</body></html>"
+
+
+def parse_whole_tree(search_page: str, homepage: str) -> tuple:
+    # The old way in commands 'wiki' and 'news'
+    search_html = BeautifulSoup(search_page, "html.parser")
+    headings = search_html.find_all("div", class_="mw-search-result-heading")[:htmlparse.WIKI_SEARCH_RESULTS]
+    results = [(heading.find("a")["title"], heading.find("a")["href"]) for heading in headings]
+    home_html = BeautifulSoup(homepage, "html.parser")
+    articles = [div_tag.p.a["href"] for div_tag in home_html.find_all("div", attrs={"class": "news-article__details"})]
+    return results, articles
+
+
+async def parse_pages(parse, pages: list) -> tuple:
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(measure_lag(stop))
+    started = time.perf_counter()
+    outputs = []
+    for search_page, homepage in pages:
+        outputs.append(await parse(search_page, homepage))
+        # Let the lag measurement run between the commands
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await lag_task
+    return outputs, elapsed / len(pages), max(lags) if lags else elapsed
+
+
+async def main(pages: int):
+    pages = [(make_search_page(seed), make_homepage(seed)) for seed in range(pages)]
+    print(f"{len(pages)} search pages of {len(pages[0][0]) / 1024:.0f} KB and homepages of "
+          f"{len(pages[0][1]) / 1024:.0f} KB, parser backend {htmlparse.DEFAULT_PARSER}")
+
+    async def whole_tree_on_loop(search_page, homepage):
+        return parse_whole_tree(search_page, homepage)
+
+    async def targeted_on_loop(search_page, homepage):
+        return htmlparse.extract_search_results(search_page), \
+            [article.link for article in htmlparse.extract_news_articles(homepage)]
+
+    executors = [("worker threads", htmlparse.ParsingExecutor(processes=False)),
+                 ("worker processes", htmlparse.ParsingExecutor())]
+    runs = [("whole tree on loop", whole_tree_on_loop), ("targeted on loop", targeted_on_loop)]
+    for name, executor in executors:
+        # Start the workers before measuring
+        await executor.news_articles(pages[0][1])
+
+        async def targeted_in_executor(search_page, homepage, executor=executor):
+            results, articles = await asyncio.gather(executor.search_results(search_page),
+                                                     executor.news_articles(homepage))
+            return results, [article.link for article in articles]
+
+        runs.append((name, targeted_in_executor))
+
+    expected = None
+    for name, parse in runs:
+        outputs, per_page, max_lag = await parse_pages(parse, pages)
+        if expected is None:
+            expected = outputs
+        assert outputs == expected
+        print(f"{name:<22}{per_page * 1000:>8.2f} ms per page pair   max loop lag {max_lag * 1000:>8.1f} ms")
+
+    for _, executor in executors:
+        executor.close()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
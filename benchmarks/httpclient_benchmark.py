@@ -0,0 +1,90 @@
+"""
+Measure the throughput of the bot-wide HTTP session against a local stand-in of the highscores API at high
+concurrency, and compare it with a session that opens a new connection for every request. Also reports how many
+connections each session opened and how many bytes the compressed and uncompressed responses took.
+
+Run from the repository root:
+    python -m benchmarks.httpclient_benchmark [requests] [concurrency]
+"""
+
+import asyncio
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+from OsrsHelper import httpclient
+
+HOST = "127.0.0.1"
+PORT = 8768
+URL = f"http://{HOST}:{PORT}/m=hiscore_oldschool/index_lite.ws?player=player"
+# Roughly the size and shape of a highscores response
+RESPONSE = "\n".join(f"{rank},{level},{xp}" for rank, level, xp in zip(range(1000, 1084), range(1, 85),
+                                                                       range(30000, 3000000, 35000)))
+
+
+class FakeHighscores:
+
+    def __init__(self):
+        self.connections = set()
+        self.bytes_sent = 0
+
+    async def handle(self, request):
+        self.connections.add(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(0.005)
+        response = web.Response(text=RESPONSE)
+        response.enable_compression()
+        await response.prepare(request)
+        # Length of the body after compression
+        self.bytes_sent += response.content_length
+        return response
+
+    def reset(self):
+        self.connections.clear()
+        self.bytes_sent = 0
+
+
+async def fetch(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, player: int):
+    async with semaphore:
+        async with session.get(f"{URL}{player}", timeout=30) as r:
+            text = await r.text()
+    assert text == RESPONSE
+
+
+async def measure(name: str, session: aiohttp.ClientSession, server: FakeHighscores, requests: int,
+                  concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    server.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*[fetch(session, semaphore, player) for player in range(requests)])
+    elapsed = time.perf_counter() - started
+    await httpclient.close_session(session)
+    print(f"{name:<28} {requests / elapsed:>7.0f} requests/s, {len(server.connections):>4} connections, "
+          f"{server.bytes_sent / requests:>5.0f} bytes per response")
+
+
+async def main(requests: int, concurrency: int):
+    server = FakeHighscores()
+    app = web.Application()
+    app.router.add_get("/m=hiscore_oldschool/index_lite.ws", server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+
+    # Warm up the server
+    await measure("warm up", httpclient.create_session(), server, requests // 10, concurrency)
+    print()
+    await measure("new connection per request", aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(force_close=True, limit=0),
+        headers={"Accept-Encoding": "identity"}), server, requests, concurrency)
+    await measure("pooled, uncompressed", httpclient.create_session(httpclient.ClientSettings(compress=False)),
+                  server, requests, concurrency)
+    await measure("pooled, compressed", httpclient.create_session(), server, requests, concurrency)
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    request_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.get_event_loop().run_until_complete(main(request_amount, concurrency_limit))
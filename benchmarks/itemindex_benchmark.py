@@ -0,0 +1,90 @@
+"""
+Measure item name resolving latency of ItemIndex over a generated tradeables list of the same size as the real one,
+compared with the old exact name query against SQLite. Searches are exact names, item keys, abbreviated names and
+misspelled names.
+
+Run from the repository root:
+    python -m benchmarks.itemindex_benchmark [searches]
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+
+from OsrsHelper import database, itemindex
+
+MATERIALS = ["Bronze", "Iron", "Steel", "Black", "White", "Mithril", "Adamant", "Rune", "Dragon", "Granite", "Crystal",
+             "Obsidian", "Bandos", "Armadyl", "Saradomin", "Zamorak", "Guthix", "Ancient", "Blessed", "Gilded"]
+EQUIPMENT = ["dagger", "sword", "longsword", "scimitar", "mace", "warhammer", "battleaxe", "2h sword", "halberd",
+             "spear", "axe", "pickaxe", "claws", "full helm", "med helm", "platebody", "chainbody", "platelegs",
+             "plateskirt", "kiteshield", "sq shield", "boots", "gloves", "bolts", "arrow", "dart", "knife", "javelin",
+             "crossbow", "limbs", "nails", "bar", "ore", "bracelet", "amulet", "ring", "hasta", "godsword"]
+POTIONS = ["Attack potion", "Strength potion", "Defence potion", "Prayer potion", "Super attack", "Super strength",
+           "Super defence", "Super restore", "Saradomin brew", "Ranging potion", "Magic potion", "Stamina potion",
+           "Antifire potion", "Super combat potion", "Divine super combat potion", "Anti-venom+", "Zamorak brew"]
+SUFFIXES = ["", "(p)", "(p+)", "(p++)", "(g)", "(t)", "(or)"]
+
+
+def make_names() -> list:
+    names = [f"{material} {item}{suffix}" for material in MATERIALS for item in EQUIPMENT for suffix in SUFFIXES[:5]]
+    names += [f"{potion}({dose})" for potion in POTIONS for dose in range(1, 5)]
+    return names
+
+
+def make_typo(rng: random.Random, text: str) -> str:
+    position = rng.randrange(len(text))
+    return text[:position] + text[position + 1:]
+
+
+def abbreviate(rng: random.Random, text: str) -> str:
+    return " ".join(word[:rng.randint(3, 5)] for word in text.lower().replace("(", " ").replace(")", "").split())
+
+
+async def main(searches: int):
+    rng = random.Random(0)
+    names = make_names()
+    items = [(name, item_id) for item_id, name in enumerate(names)]
+    item_keys = {f"key{i}": rng.choice(names) for i in range(200)}
+
+    started = time.perf_counter()
+    index = itemindex.ItemIndex(items, item_keys)
+    print(f"Indexed {len(index)} items and {len(item_keys)} keys in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    pool = database.ConnectionPool(
+        lambda: sqlite3.connect("file:items?mode=memory&cache=shared", uri=True, check_same_thread=False),
+        size=2, paramstyle="qmark")
+    async with pool.connection() as connection:
+        await connection.execute("CREATE TABLE tradeables (NAME TEXT PRIMARY KEY COLLATE NOCASE, ID INTEGER);")
+        await connection.executemany("INSERT INTO tradeables VALUES (%s, %s);", items)
+
+    search_sets = {"exact": [rng.choice(names).lower() for _ in range(searches)],
+                   "key": [rng.choice(list(item_keys)) for _ in range(searches)],
+                   "abbreviated": [abbreviate(rng, rng.choice(names)) for _ in range(searches)],
+                   "misspelled": [make_typo(rng, rng.choice(names)) for _ in range(searches)]}
+
+    print(f"{'search':<14}{'sql (old)':>14}{'resolve':>14}{'suggest':>14}{'found (old)':>14}{'resolved':>12}")
+    for name, search_set in search_sets.items():
+        started = time.perf_counter()
+        found_old = 0
+        for search in search_set:
+            found_old += await pool.fetchone("SELECT * FROM tradeables WHERE NAME = %s;", [search]) is not None
+        old_time = (time.perf_counter() - started) / searches
+
+        started = time.perf_counter()
+        resolved = sum(index.resolve(search) is not None for search in search_set)
+        resolve_time = (time.perf_counter() - started) / searches
+
+        started = time.perf_counter()
+        for search in search_set:
+            index.suggest(search)
+        suggest_time = (time.perf_counter() - started) / searches
+
+        print(f"{name:<14}{old_time * 1e6:>11.1f} us{resolve_time * 1e6:>11.1f} us{suggest_time * 1e6:>11.1f} us"
+              f"{found_old:>14}{resolved:>12}")
+    pool.close()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,85 @@
+"""
+Measure the Monte Carlo path of the loot engine with millions of simulated kills, compare it with a pure Python kill
+by kill simulation, and check the simulated results against the closed form results.
+
+Run from the repository root:
+    python -m benchmarks.loot_benchmark [kills per trial] [trials]
+"""
+
+import os
+import random
+import sys
+import time
+
+from OsrsHelper import loot, registry
+
+RESOURCES = os.path.join(os.path.dirname(__file__), os.pardir, "OsrsHelper", "resources")
+
+
+def python_simulate(boss_loot: loot.BossLoot, kills: int, trials: int) -> float:
+    """
+    :return: Chance to get every item, simulated one kill and one item at a time
+    """
+    completed = 0
+    for _ in range(trials):
+        got = set()
+        for _ in range(kills):
+            for table in boss_loot.tables:
+                if table.exclusive:
+                    roll = random.random()
+                    for index, rate in enumerate(table.rates):
+                        roll -= rate
+                        if roll < 0:
+                            got.add(table.names[index])
+                            break
+                else:
+                    for name, rate in zip(table.names, table.rates):
+                        if random.random() < rate:
+                            got.add(name)
+        completed += len(got) == len(boss_loot.names)
+    return completed / trials
+
+
+def main(kills: int, trials: int):
+    resources = registry.ResourceRegistry(RESOURCES)
+    resources.load()
+    bosses = {"zulrah": loot.BossLoot.from_rates(resources.drop_rates["zulrah"]),
+              "chambers of xeric": loot.BossLoot.chambers_of_xeric(resources.drop_rates["chambers of xeric"])}
+
+    for boss_name, boss_loot in bosses.items():
+        print(f"{boss_name.capitalize()}, {len(boss_loot.names)} items, {kills:,} kills x {trials:,} trials")
+
+        started = time.perf_counter()
+        simulation = boss_loot.simulate(kills, trials, seed=0)
+        elapsed = time.perf_counter() - started
+        print(f"  simulate()              {elapsed * 1000:>9.1f} ms  {kills * trials / elapsed / 1e6:>10.1f} M kills/s")
+
+        python_trials = max(trials // 1000, 1)
+        started = time.perf_counter()
+        python_simulate(boss_loot, kills, python_trials)
+        elapsed = time.perf_counter() - started
+        print(f"  pure Python             {elapsed * 1000:>9.1f} ms  {kills * python_trials / elapsed / 1e6:>10.3f} M "
+              f"kills/s ({python_trials} trials)")
+
+        started = time.perf_counter()
+        simulated_kills = boss_loot.simulate_kills_for_all(trials=trials, seed=0)
+        elapsed = time.perf_counter() - started
+        print(f"  simulate_kills_for_all  {elapsed * 1000:>9.1f} ms")
+
+        started = time.perf_counter()
+        exact_kills = [boss_loot.kills_for_all(confidence) for confidence in loot.CONFIDENCES]
+        chance_of_all = boss_loot.chance_of_all(kills)
+        chance_of_any = boss_loot.chance_of_any(kills)
+        elapsed = time.perf_counter() - started
+        print(f"  closed form             {elapsed * 1000:>9.1f} ms")
+
+        max_error = abs(simulation.chance_of_any - chance_of_any).max()
+        print(f"  chance of any, max difference        {max_error:.4f}")
+        print(f"  chance of all, closed form/simulated {chance_of_all:.4f} / {simulation.chance_of_all:.4f}")
+        print(f"  kills for all, closed form/simulated {exact_kills} / {simulated_kills}\n")
+
+
+if __name__ == '__main__':
+    kills_per_trial = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    trial_amount = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    main(kills_per_trial, trial_amount)
@@ -0,0 +1,79 @@
+"""
+Measure the overhead the metrics add to every instrumented call: a span around an awaited coroutine compared with the
+bare coroutine, and recording one command duration. Also renders a registry with many commands and spans in the
+Prometheus format and reads it from the metrics endpoint.
+
+Run from the repository root:
+    python -m benchmarks.metrics_benchmark [calls]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+import aiohttp
+
+from OsrsHelper import metrics
+
+PORT = 9109
+
+
+async def noop():
+    pass
+
+
+async def main(calls: int):
+    registry = metrics.MetricsRegistry()
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        await noop()
+    bare = (time.perf_counter() - started) / calls
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        with registry.span("http", "services.runescape.com"):
+            await noop()
+    spanned = (time.perf_counter() - started) / calls
+
+    labels = (("command", "stats"),)
+    started = time.perf_counter()
+    for _ in range(calls):
+        registry.observe("command_duration_seconds", 0.2, labels)
+    observe = (time.perf_counter() - started) / calls
+
+    print(f"{'bare await':<24}{bare * 1e6:>8.2f} us")
+    print(f"{'await in span':<24}{spanned * 1e6:>8.2f} us   overhead {(spanned - bare) * 1e6:.2f} us")
+    print(f"{'observe':<24}{observe * 1e6:>8.2f} us\n")
+
+    rng = random.Random(0)
+    for command in range(60):
+        for _ in range(200):
+            registry.observe("command_duration_seconds", rng.expovariate(5), (("command", f"command{command}"),))
+    for target in range(20):
+        for _ in range(200):
+            registry.observe("span_duration_seconds", rng.expovariate(20), (("span", "sql"), ("target", f"t{target}")))
+    started = time.perf_counter()
+    text = registry.render_prometheus()
+    render_time = time.perf_counter() - started
+
+    server = asyncio.ensure_future(metrics.serve(registry, port=PORT))
+    await asyncio.sleep(0.2)
+    async with aiohttp.ClientSession() as session:
+        started = time.perf_counter()
+        async with session.get(f"http://127.0.0.1:{PORT}/metrics") as r:
+            served = await r.text()
+        request_time = time.perf_counter() - started
+    server.cancel()
+    await asyncio.gather(server, return_exceptions=True)
+    assert served.splitlines()[:-1] == text.splitlines()[:-1]
+
+    print(f"Rendered {len(text.splitlines())} lines in {render_time * 1000:.2f} ms, "
+          f"endpoint answered in {request_time * 1000:.2f} ms")
+    for row in registry.summary("command_duration_seconds", "command")[:3]:
+        print(row)
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
@@ -0,0 +1,114 @@
+"""
+Poll a local fake Old School Runescape homepage with NewsPoller and compare answering command 'update' from the poller
+with the old way of fetching and parsing the homepage on every command. Also reports how many polls were answered
+with 304 Not Modified, and checks that an article added to the homepage is sent once to every subscribed channel.
+
+Run from the repository root:
+    python -m benchmarks.news_benchmark [commands] [subscribed channels]
+"""
+
+import asyncio
+import sqlite3
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+from OsrsHelper import database, fetcher, htmlparse, news
+from benchmarks.htmlparse_benchmark import make_homepage
+
+HOST = "127.0.0.1"
+PORT = 8767
+HOMEPAGE_URL = f"http://{HOST}:{PORT}/"
+
+
+class FakeHomepage:
+
+    def __init__(self):
+        self.version = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+
+    def publish_article(self):
+        self.version += 1
+
+    async def handle(self, request):
+        self.requests += 1
+        etag = f'"{self.version}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        # Every version replaces the link of the latest article
+        page = make_homepage(0).replace("article-0-", f"article-v{self.version}-", 1)
+        self.bytes_sent += len(page)
+        return web.Response(text=page, headers={"ETag": etag})
+
+
+def old_latest_news(html: str) -> str:
+    news_articles = {}
+    for div_tag in BeautifulSoup(html, "html.parser").find_all("div", attrs={"class": "news-article__details"}):
+        news_articles[div_tag.p.a["id"][-1]] = div_tag.p.a["href"]
+    return news_articles[min(news_articles.keys())]
+
+
+async def main(commands: int, channels: int):
+    homepage = FakeHomepage()
+    app = web.Application()
+    app.router.add_get("/", homepage.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+
+    pool = database.ConnectionPool(
+        lambda: sqlite3.connect("file:news?mode=memory&cache=shared", uri=True, check_same_thread=False),
+        size=2, paramstyle="qmark")
+    sent = []
+
+    async def publish(channel_id, article):
+        sent.append((channel_id, article.link))
+
+    async with aiohttp.ClientSession() as session:
+        html_fetcher = fetcher.Fetcher(session, policies={HOMEPAGE_URL: fetcher.CachePolicy(ttl=5 * 60)})
+        html_parser = htmlparse.ParsingExecutor()
+        poller = news.NewsPoller(pool, html_fetcher, html_parser.news_articles, publish, url=HOMEPAGE_URL,
+                                 interval=0.05)
+        for guild_id in range(channels):
+            await poller.subscribe(guild_id, 1000 + guild_id)
+        poller.start()
+        while poller.latest_article() is None:
+            await asyncio.sleep(0.01)
+
+        # The old way parsed the cached homepage on every command
+        old_commands = min(commands, 20)
+        started = time.perf_counter()
+        for _ in range(old_commands):
+            old_latest_news(await html_fetcher.visit_website(HOMEPAGE_URL))
+        old_latency = (time.perf_counter() - started) / old_commands
+
+        started = time.perf_counter()
+        for _ in range(commands):
+            poller.latest_article()
+        new_latency = (time.perf_counter() - started) / commands
+
+        homepage.publish_article()
+        await asyncio.sleep(0.5)
+        poller.stop()
+        html_parser.close()
+    await runner.cleanup()
+    pool.close()
+
+    new_links = {link for _, link in sent}
+    assert len(new_links) == 1 and len(sent) == channels, sent
+    print(f"{'old update':<20}{old_latency * 1000:>10.2f} ms per command")
+    print(f"{'from poller':<20}{new_latency * 1e6:>10.2f} us per command")
+    print(f"{homepage.requests} polls, {homepage.not_modified} not modified, "
+          f"{homepage.bytes_sent / 1024:.0f} KB of pages sent")
+    print(f"New article sent to {len(sent)} channels, poller metrics {poller.progress()}")
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+                                                     int(sys.argv[2]) if len(sys.argv) > 2 else 50))
@@ -0,0 +1,99 @@
+"""
+Measure price analytics over generated 180 day price histories: the vectorized analyze() against the same statistics
+calculated in pure Python, the latency of cached analytics, and the event loop lag while price charts are rendered in a
+worker process compared with rendering them on the event loop.
+
+Run from the repository root:
+    python -m benchmarks.priceanalytics_benchmark [items]
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import statistics
+import sys
+import time
+
+from OsrsHelper import priceanalytics, prices
+from benchmarks.database_benchmark import measure_lag
+from benchmarks.prices_benchmark import FakeGrandExchange
+
+
+def python_analyze(daily: list) -> tuple:
+    recent = daily[-priceanalytics.RECENT_DAYS:]
+    moving_averages = [sum(daily[i - window:i]) / window for window in priceanalytics.MOVING_AVERAGE_WINDOWS
+                       for i in range(window, len(daily) + 1)]
+    returns = [(new - old) / old for old, new in zip(recent, recent[1:])]
+    changes = [daily[-1] - daily[max(len(daily) - 1 - days, 0)] for days in priceanalytics.CHANGE_PERIODS.values()]
+    return moving_averages[-1], min(recent), max(recent), min(daily), max(daily), statistics.stdev(returns), changes
+
+
+def render(history: prices.PriceHistory) -> bytes:
+    return priceanalytics.render_chart(f"Item {history.item_id}", history.days, history.daily, history.average)
+
+
+async def render_charts(render, histories: list) -> tuple:
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(measure_lag(stop))
+    started = time.perf_counter()
+    for history in histories:
+        await render(history)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await lag_task
+    return elapsed / len(histories), max(lags) if lags else elapsed
+
+
+async def main(items: int):
+    histories = [prices.PriceHistory.from_graph(item_id, json.loads(FakeGrandExchange.make_graph(item_id)))
+                 for item_id in range(items)]
+    daily_lists = [history.daily.tolist() for history in histories]
+
+    started = time.perf_counter()
+    for daily in daily_lists:
+        python_analyze(daily)
+    python_time = (time.perf_counter() - started) / items
+
+    started = time.perf_counter()
+    analytics = [priceanalytics.analyze(history) for history in histories]
+    numpy_time = (time.perf_counter() - started) / items
+    assert all(result.all_time_max == max(daily) for result, daily in zip(analytics, daily_lists))
+
+    cache = priceanalytics.DailyCache(max_size=items)
+    for history in histories:
+        cache.get_analytics(history)
+    started = time.perf_counter()
+    for history in histories:
+        cache.get_analytics(history)
+    cached_time = (time.perf_counter() - started) / items
+
+    print(f"Analytics of {items} items")
+    print(f"{'pure Python':<22}{python_time * 1e6:>10.1f} us per item")
+    print(f"{'analyze()':<22}{numpy_time * 1e6:>10.1f} us per item")
+    print(f"{'cached':<22}{cached_time * 1e6:>10.1f} us per item\n")
+
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        print("matplotlib is not installed, skipping charts")
+        return
+
+    async def render_on_loop(history):
+        return render(history)
+
+    loop = asyncio.get_event_loop()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        # Start the worker and import matplotlib in it before measuring
+        await loop.run_in_executor(executor, render, histories[0])
+
+        async def render_in_worker(history):
+            return await loop.run_in_executor(executor, render, history)
+
+        chart_histories = histories[:10]
+        for name, render_func in [("on event loop", render_on_loop), ("worker process", render_in_worker)]:
+            per_chart, max_lag = await render_charts(render_func, chart_histories)
+            print(f"Charts {name:<16}{per_chart * 1000:>8.1f} ms per chart   max loop lag {max_lag * 1000:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
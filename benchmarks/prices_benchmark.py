@@ -0,0 +1,140 @@
+"""
+Ingest the prices of thousands of items with PriceStore from a local fake GE graph API and an SQLite tradeables table,
+and compare the latency of answering price queries from the mirror with the old way of querying the database and the
+GE API on every command.
+
+Run from the repository root:
+    python -m benchmarks.prices_benchmark [items] [concurrency] [requests per second]
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+from OsrsHelper import database, fetcher, prices
+
+HOST = "127.0.0.1"
+PORT = 8766
+GRAPH_URL = f"http://{HOST}:{PORT}/api/graph/{{id}}.json"
+FIRST_DAY_MS = 1577836800000
+
+
+class FakeGrandExchange:
+
+    def __init__(self):
+        self.active = 0
+        self.peak_active = 0
+        self.requests = 0
+
+    @staticmethod
+    def make_graph(item_id: int) -> str:
+        rng = random.Random(item_id)
+        price = rng.randint(1, 100000000)
+        daily = {}
+        average = {}
+        for day in range(180):
+            price = max(1, int(price * rng.uniform(0.97, 1.03)))
+            timestamp = str(FIRST_DAY_MS + day * prices.DAY_MS)
+            daily[timestamp] = price
+            average[timestamp] = price
+        return json.dumps({"daily": daily, "average": average})
+
+    async def handle(self, request):
+        self.requests += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await asyncio.sleep(random.uniform(0.005, 0.02))
+            return web.Response(text=self.make_graph(int(request.match_info["id"])))
+        finally:
+            self.active -= 1
+
+
+async def old_price(pool, visit_website, item_name: str) -> int:
+    result = await pool.fetchone("SELECT * FROM tradeables WHERE NAME = %s;", [item_name])
+    price_data = json.loads(await visit_website(GRAPH_URL.format(id=result[1]), use_cache=False))
+    daily_data = price_data["daily"]
+    timestamps = list(daily_data.keys())
+    return daily_data[timestamps[-1]] - daily_data[timestamps[-31]]
+
+
+async def new_price(price_store, item_name: str) -> int:
+    _, item_id = await price_store.find_item(item_name)
+    price_history = await price_store.get_history(item_id)
+    return price_history.price_change(30)
+
+
+async def mean_latency(coroutine_func, arguments: list) -> float:
+    started = time.perf_counter()
+    for argument in arguments:
+        await coroutine_func(argument)
+    return (time.perf_counter() - started) / len(arguments)
+
+
+async def main(items: int, concurrency: int, requests_per_second: float):
+    random.seed(0)
+    fake_ge = FakeGrandExchange()
+    app = web.Application()
+    app.router.add_get("/api/graph/{id}.json", fake_ge.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+
+    pool = database.ConnectionPool(
+        lambda: sqlite3.connect("file:prices?mode=memory&cache=shared", uri=True, check_same_thread=False),
+        size=4, paramstyle="qmark")
+    async with pool.connection() as connection:
+        await connection.execute("CREATE TABLE tradeables (NAME TEXT PRIMARY KEY COLLATE NOCASE, ID INTEGER);")
+        await connection.executemany("INSERT INTO tradeables VALUES (%s, %s);",
+                                     [(f"Item {i}", i) for i in range(items)])
+
+        async with aiohttp.ClientSession() as session:
+            shared_fetcher = fetcher.Fetcher(session)
+            price_store = prices.PriceStore(pool, shared_fetcher, graph_url=GRAPH_URL, concurrency=concurrency,
+                                            requests_per_second=requests_per_second)
+
+            started = time.perf_counter()
+            await price_store.refresh_due()
+            elapsed = time.perf_counter() - started
+            print(f"Ingested {items} items in {elapsed:.2f} s ({items / elapsed:.1f} items/s)")
+            print(f"Peak simultaneous requests: {fake_ge.peak_active}")
+            print(f"Progress: {price_store.progress()}")
+            print(f"Fetcher cache after ingest: {shared_fetcher.cached_bytes} bytes\n")
+
+            names = [f"item {random.randrange(items)}" for _ in range(200)]
+            for name in names[:20]:
+                assert await old_price(pool, shared_fetcher.visit_website, name) == await new_price(price_store, name)
+
+            old_time = await mean_latency(lambda name: old_price(pool, shared_fetcher.visit_website, name), names)
+            new_time = await mean_latency(lambda name: new_price(price_store, name), names)
+            print(f"{'query':<28}{'old':>12}{'mirror':>14}")
+            print(f"{'price (1 item)':<28}{old_time * 1e3:>9.3f} ms{new_time * 1e6:>11.1f} us")
+
+            loadouts = [[f"item {random.randrange(items)}" for _ in range(28)] for _ in range(20)]
+
+            async def old_loadout(loadout):
+                return await asyncio.gather(*[old_price(pool, shared_fetcher.visit_website, name) for name in loadout])
+
+            async def new_loadout(loadout):
+                found = [await price_store.find_item(name) for name in loadout]
+                return await price_store.get_histories(item_id for _, item_id in found)
+
+            old_time = await mean_latency(old_loadout, loadouts)
+            new_time = await mean_latency(new_loadout, loadouts)
+            print(f"{'prices (28 items)':<28}{old_time * 1e3:>9.3f} ms{new_time * 1e6:>11.1f} us")
+
+    pool.close()
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    item_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 3500
+    concurrency_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    asyncio.get_event_loop().run_until_complete(main(item_amount, concurrency_limit, rate))
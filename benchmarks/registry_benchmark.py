@@ -0,0 +1,62 @@
+"""
+Compare the resource handling of commands 'ehp', 'loot', 'puzzle' and 'seasons' when the json files are read on every
+invocation (the old way) and when they are looked up from a preloaded ResourceRegistry.
+
+Run from the repository root:
+    python -m benchmarks.registry_benchmark [iterations]
+"""
+
+import fractions
+import json
+import os
+import sys
+import timeit
+
+from OsrsHelper import registry
+
+RESOURCES = os.path.join("OsrsHelper", "resources")
+
+
+def old_ehp():
+    with open(os.path.join(RESOURCES, "ehp_ironman.json")) as ehp_file:
+        ehp_data = json.load(ehp_file)
+    return [(int(xp), xph) for xp, xph in ehp_data["attack"].items()]
+
+
+def old_loot():
+    with open(os.path.join(RESOURCES, "drop_rates.json")) as rates_file:
+        drop_rates_dict = json.load(rates_file)
+    return [float(fractions.Fraction(rate)) for rate in drop_rates_dict["chambers of xeric"].values()]
+
+
+def old_puzzle():
+    with open(os.path.join(RESOURCES, "solved_puzzles.json")) as puzzle_file:
+        puzzle_links = json.load(puzzle_file)
+    return puzzle_links["zulrah"]
+
+
+def old_seasons():
+    with open(os.path.join(RESOURCES, "harvest_seasons_fi.json"), encoding="utf-8-sig") as data_file:
+        data = json.load(data_file)
+    return data["6"]["domestic"]
+
+
+def main(iterations: int):
+    resources = registry.ResourceRegistry(RESOURCES)
+    load_time = timeit.timeit(resources.load, number=1)
+    print(f"Registry loaded in {load_time * 1000:.2f} ms\n")
+
+    benchmarks = [("ehp", old_ehp, lambda: resources.ehp["ehp_ironman"]["attack"]),
+                  ("loot", old_loot, lambda: list(resources.drop_rates["chambers of xeric"].values())),
+                  ("puzzle", old_puzzle, lambda: resources.solved_puzzles["zulrah"]),
+                  ("seasons", old_seasons, lambda: resources.harvest_seasons["6"]["domestic"])]
+
+    print(f"{'command':<10}{'per call (old)':>18}{'per call (registry)':>22}")
+    for name, old_func, new_func in benchmarks:
+        old_time = timeit.timeit(old_func, number=iterations) / iterations
+        new_time = timeit.timeit(new_func, number=iterations) / iterations
+        print(f"{name:<10}{old_time * 1e6:>15.2f} us{new_time * 1e6:>19.3f} us")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
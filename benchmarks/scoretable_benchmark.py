@@ -0,0 +1,98 @@
+"""
+Check that scoretable.make_scoretable() renders exactly the same tables as the old tabulate based implementation and
+compare their speed. Requires tabulate.
+
+Run from the repository root:
+    python -m benchmarks.scoretable_benchmark [tables]
+"""
+
+import copy
+import cProfile
+import pstats
+import random
+import sys
+import timeit
+
+from tabulate import tabulate
+
+from OsrsHelper import scoretable
+
+
+def old_format_scoretable(scorelist: list, gains: bool) -> list:
+    for index, list_ in enumerate(scorelist):
+        for index2, value in enumerate(list_):
+            if gains and value > 0:
+                separated = f"{value:+,}"
+            else:
+                value = int(value)
+                separated = f"{value:,}"
+            scorelist[index][index2] = separated
+    return scorelist
+
+
+def old_make_scoretable(highscores_data: list, username: str, combat_level: int, gains: bool = False,
+                        old_savedate: str = None, new_savedate: str = None, account_type: str = "normal") -> str:
+    skill_headers = list(scoretable.SKILL_NAMES)
+    clue_headers = list(scoretable.CLUE_NAMES)
+    skills = highscores_data[:24]
+    clues = highscores_data[27:34]
+    old_format_scoretable(skills, gains=gains)
+    old_format_scoretable(clues, gains=gains)
+    for index, skill in enumerate(skills):
+        skill.insert(0, skill_headers[index])
+    for index, clue in enumerate(clues):
+        clue.insert(0, clue_headers[index])
+
+    skilltable = tabulate(skills, tablefmt="orgtbl", headers=["Skill", "Rank", "Level", "Xp"])
+    cluetable = tabulate(clues, tablefmt="orgtbl", headers=["Clue", "Rank", "Amount"])
+    if gains:
+        table_header = "{:^50}\n{:^50}\n{}".format(f"Gains for {username}",
+                                                   f"Account type: {account_type.capitalize()}",
+                                                   f"Between {old_savedate} - {new_savedate} UTC\n\n"
+                                                   f"Combat level: {combat_level:+}")
+    else:
+        if account_type == "normal":
+            account_type = ""
+        table_header = "{:^65}".format(f"{account_type.capitalize()} Stats of {username}\n\n"
+                                       f"Combat level: {combat_level}")
+    return f"```{table_header}\n\n{skilltable}\n\n{cluetable}```"
+
+
+def random_value(gains: bool) -> int:
+    magnitude = random.choice([10, 1000, 100000, 200000000])
+    if gains:
+        return random.randint(-magnitude, magnitude) if random.random() < 0.7 else 0
+    return random.randint(0, magnitude)
+
+
+def random_highscores(gains: bool) -> list:
+    rows = random.choice([24, 30, 34, 80])
+    return [[random_value(gains) for _ in range(3 if index < 24 else 2)] for index in range(rows)]
+
+
+def main(tables: int):
+    random.seed(0)
+    cases = []
+    for _ in range(tables):
+        gains = random.random() < 0.5
+        cases.append((random_highscores(gains), "Zezima", random.randint(3, 126), gains, "2020-01-01 00:00:00",
+                      "2020-02-01 00:00:00", random.choice(["normal", "ironman", "uim"])))
+
+    for case in cases:
+        assert old_make_scoretable(copy.deepcopy(case[0]), *case[1:]) == scoretable.make_scoretable(*case), case
+    print(f"{tables} tables rendered identically")
+
+    copies = [copy.deepcopy(case[0]) for case in cases]
+    old_time = timeit.timeit(lambda: [old_make_scoretable(data, *case[1:]) for data, case in zip(copies, cases)],
+                             number=1)
+    new_time = timeit.timeit(lambda: [scoretable.make_scoretable(*case) for case in cases], number=1)
+    print(f"tabulate          {old_time / tables * 1e6:>8.1f} us per table")
+    print(f"make_scoretable   {new_time / tables * 1e6:>8.1f} us per table ({old_time / new_time:.1f}x)")
+
+    profiler = cProfile.Profile()
+    profiler.runcall(lambda: [scoretable.make_scoretable(*case) for case in cases])
+    pstats.Stats(profiler).sort_stats("tottime").print_stats(5)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
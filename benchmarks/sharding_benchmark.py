@@ -0,0 +1,163 @@
+"""
+Load test of a sharded deployment: a fake gateway routes 'stats' commands of many guilds to shard worker processes by
+the Discord shard formula, and the workers fetch the highscores from a local fake hiscores server. Clan members look
+up the same players, so the run is repeated with and without the shared cache process to compare how many requests
+reach the hiscores and how fast the commands are answered.
+
+Run from the repository root:
+    python -m benchmarks.sharding_benchmark [commands] [guilds] [shards] [workers]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+from OsrsHelper import fetcher, highscores, launcher, sharedcache
+from benchmarks.tracker_benchmark import FakeHiscores, HOST, PORT
+
+LOCAL_PREFIX = f"http://{HOST}:{PORT}/"
+TICK = 0.01
+STARTUP_TIME = 1
+
+
+class LocalFetcher:
+    """
+    Sends the requests meant for the official highscores to the fake server instead.
+    """
+
+    def __init__(self, local_fetcher: fetcher.Fetcher):
+        self.fetcher = local_fetcher
+
+    async def visit_website(self, link, **kwargs):
+        return await self.fetcher.visit_website(link.replace("https://services.runescape.com/", LOCAL_PREFIX), **kwargs)
+
+
+async def handle_command(local_fetcher: LocalFetcher, username: str, latencies: list):
+    started = time.perf_counter()
+    await highscores.get_highscores_data(local_fetcher, username)
+    latencies.append(time.perf_counter() - started)
+
+
+async def worker_main(events, results, worker: int, shared_cache_path: str):
+    loop = asyncio.get_event_loop()
+    shared_cache = sharedcache.SharedCache(shared_cache_path) if shared_cache_path else None
+    latencies = []
+    commands = []
+    async with aiohttp.ClientSession() as session:
+        worker_fetcher = fetcher.Fetcher(session, policies={LOCAL_PREFIX: fetcher.CachePolicy(ttl=60)},
+                                         shared_cache=shared_cache)
+        local_fetcher = LocalFetcher(worker_fetcher)
+        while True:
+            batch = await loop.run_in_executor(None, events.get)
+            if batch is None:
+                break
+            commands += [asyncio.ensure_future(handle_command(local_fetcher, username, latencies))
+                         for username in batch]
+        await asyncio.gather(*commands)
+    results.put((worker, latencies, worker_fetcher.stats()))
+
+
+def run_worker(events, results, worker: int, shared_cache_path: str):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(worker_main(events, results, worker, shared_cache_path))
+
+
+def make_events(commands: int, guilds: int, players: int, seed: int = 0) -> list:
+    """
+    :return: (guild id, username) of every command. Popular players are looked up much more often.
+    """
+    rng = random.Random(seed)
+    guild_ids = [rng.randrange(1 << 40, 1 << 60) for _ in range(guilds)]
+    weights = [1 / (rank + 1) for rank in range(players)]
+    usernames = rng.choices([f"player{i}" for i in range(players)], weights=weights, k=commands)
+    return [(rng.choice(guild_ids), username) for username in usernames]
+
+
+async def run_deployment(events: list, shard_count: int, workers: int, shared: bool, fake_hiscores: FakeHiscores,
+                         commands_per_tick: int) -> tuple:
+    loop = asyncio.get_event_loop()
+    with tempfile.TemporaryDirectory() as directory:
+        shared_cache_path = os.path.join(directory, "cache.sock") if shared else None
+        cache_process = None
+        if shared:
+            cache_process = multiprocessing.Process(target=sharedcache.run_server, args=(shared_cache_path,),
+                                                    daemon=True)
+            cache_process.start()
+            while not os.path.exists(shared_cache_path):
+                await asyncio.sleep(0.01)
+
+        shards = launcher.split_shards(shard_count, workers)
+        worker_of_shard = {shard_id: worker for worker, shard_ids in enumerate(shards) for shard_id in shard_ids}
+        queues = [multiprocessing.Queue() for _ in shards]
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=run_worker, args=(queues[worker], results, worker,
+                                                                      shared_cache_path))
+                     for worker in range(len(shards))]
+        for process in processes:
+            process.start()
+        # Starting the processes competes for the CPU with the first commands, which would be measured instead
+        await asyncio.sleep(STARTUP_TIME)
+
+        requests_before = fake_hiscores.requests
+        started = time.perf_counter()
+        for start in range(0, len(events), commands_per_tick):
+            batches = [[] for _ in shards]
+            for guild_id, username in events[start:start + commands_per_tick]:
+                # The shard of a guild as Discord calculates it
+                batches[worker_of_shard[(guild_id >> 22) % shard_count]].append(username)
+            for queue, batch in zip(queues, batches):
+                queue.put(batch)
+            await asyncio.sleep(TICK)
+        for queue in queues:
+            queue.put(None)
+        worker_results = [await loop.run_in_executor(None, results.get) for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            await loop.run_in_executor(None, process.join)
+        if cache_process is not None:
+            cache_process.terminate()
+
+    latencies = sorted(latency for _, worker_latencies, _ in worker_results for latency in worker_latencies)
+    shared_hits = sum(stats["shared_hits"] for _, _, stats in worker_results)
+    return elapsed, latencies, fake_hiscores.requests - requests_before, shared_hits
+
+
+async def main(commands: int, guilds: int, shard_count: int, workers: int):
+    random.seed(0)
+    fake_hiscores = FakeHiscores(commands)
+    app = web.Application()
+    app.router.add_get("/{header}/index_lite.ws", fake_hiscores.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    # The default backlog of 128 overflows when all workers open connections at once, and the dropped SYNs are
+    # retried only after a second, which would dominate the latencies instead of the caches
+    await web.TCPSite(runner, HOST, PORT, backlog=1024).start()
+
+    events = make_events(commands, guilds, players=max(commands // 5, 1))
+    commands_per_tick = max(commands // 200, 1)
+    print(f"{commands} commands from {guilds} guilds, {shard_count} shards in {workers} workers, "
+          f"{len({username for _, username in events})} different players")
+    for shared in (False, True):
+        elapsed, latencies, requests, shared_hits = await run_deployment(events, shard_count, workers, shared,
+                                                                         fake_hiscores, commands_per_tick)
+        name = "shared cache" if shared else "worker caches only"
+        print(f"{name:<20}{elapsed:>7.2f} s   {requests:>6} hiscores requests   {shared_hits:>6} shared hits   "
+              f"p50 {statistics.median(latencies) * 1000:>6.1f} ms   "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:>6.1f} ms")
+
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    arguments = [int(arg) for arg in sys.argv[1:5]]
+    defaults = [5000, 1000, 4, 4]
+    asyncio.get_event_loop().run_until_complete(main(*(arguments + defaults[len(arguments):])))
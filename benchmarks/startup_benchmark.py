@@ -0,0 +1,73 @@
+"""
+Measure the import time of the library modules the cogs use, with the heavy third party modules imported eagerly as
+they were before and lazily as they are now, and the time saved by importing modules in a thread while waiting for a
+simulated login request instead of before it.
+
+Run from the repository root:
+    python -m benchmarks.startup_benchmark [login_latency_ms]
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+
+from OsrsHelper import startup
+
+LIBRARY_MODULES = ["OsrsHelper.ehp", "OsrsHelper.fetcher", "OsrsHelper.htmlparse", "OsrsHelper.metrics",
+                   "OsrsHelper.prices", "OsrsHelper.registry", "OsrsHelper.wikiindex", "OsrsHelper.watchdog"]
+# Imported at module level by the library and cogs before the imports were deferred
+EAGER_MODULES = ["bs4", "tabulate", "aiohttp.web"]
+REPEATS = 5
+
+
+def time_imports(module_names: list) -> float:
+    """
+    Import modules in a fresh interpreter so that nothing is cached in sys.modules.
+
+    :return: Seconds the imports took, the best of REPEATS
+    """
+    code = ("import time; started = time.perf_counter(); import importlib\n"
+            f"for name in {module_names!r}: importlib.import_module(name)\n"
+            "print(time.perf_counter() - started)")
+    results = [float(subprocess.check_output([sys.executable, "-c", code])) for _ in range(REPEATS)]
+    return min(results)
+
+
+async def login(latency: float):
+    await asyncio.sleep(latency)
+
+
+async def serial(module_names: list, latency: float) -> float:
+    started = time.perf_counter()
+    startup.import_modules(module_names)
+    await login(latency)
+    return time.perf_counter() - started
+
+
+async def overlapped(module_names: list, latency: float) -> float:
+    started = time.perf_counter()
+    await startup.overlap_imports(module_names, login(latency))
+    return time.perf_counter() - started
+
+
+def main(latency: float):
+    lazy = time_imports(LIBRARY_MODULES)
+    eager = time_imports(LIBRARY_MODULES + EAGER_MODULES)
+    print(f"Library imports eager {eager * 1000:.0f} ms, lazy {lazy * 1000:.0f} ms "
+          f"({(lazy / eager - 1) * 100:+.1f} %)")
+
+    # Both runs need a fresh interpreter as well, the first one would make the imports of the second one free
+    code = ("import asyncio, sys; from benchmarks import startup_benchmark as b\n"
+            "print(asyncio.get_event_loop().run_until_complete(getattr(b, sys.argv[1])(b.LIBRARY_MODULES, "
+            "float(sys.argv[2]))))")
+    durations = {}
+    for mode in ("serial", "overlapped"):
+        durations[mode] = min(float(subprocess.check_output([sys.executable, "-c", code, mode, str(latency)]))
+                              for _ in range(REPEATS))
+    print(f"Imports and a login of {latency * 1000:.0f} ms serially {durations['serial'] * 1000:.0f} ms, "
+          f"overlapped {durations['overlapped'] * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.3)
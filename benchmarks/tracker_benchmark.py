@@ -0,0 +1,113 @@
+"""
+Refresh thousands of tracked players with TrackingScheduler against a local fake hiscores server and an SQLite
+database, and report the throughput and the highest amount of simultaneous requests the server saw.
+
+Run from the repository root:
+    python -m benchmarks.tracker_benchmark [players] [concurrency] [requests per second]
+"""
+
+import asyncio
+import functools
+import random
+import sqlite3
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+from OsrsHelper import database, fetcher, highscores, tracker
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class FakeHiscores:
+
+    def __init__(self, players: int):
+        self.players = players
+        self.active = 0
+        self.peak_active = 0
+        self.requests = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await asyncio.sleep(random.uniform(0.005, 0.02))
+            player_number = int(request.query["player"][6:])
+            # Every 100th player doesn't exist on the highscores anymore
+            if player_number % 100 == 99:
+                return web.Response(text="<title>404 - Page not found</title>", status=404)
+            rows = [f"{random.randint(1, 2000000)},{random.randint(1, 99)},{random.randint(0, 13034431)}"
+                    for _ in range(24)]
+            rows += [f"{random.randint(-1, 100000)},{random.randint(-1, 500)}" for _ in range(60)]
+            return web.Response(text="\n".join(rows) + "\n")
+        finally:
+            self.active -= 1
+
+
+class LocalFetcher:
+    """
+    Sends the requests meant for the official highscores to the fake server instead.
+    """
+
+    def __init__(self, session):
+        self.fetcher = fetcher.Fetcher(session, policies={})
+
+    async def visit_website(self, link, **kwargs):
+        return await self.fetcher.visit_website(link.replace("https://services.runescape.com", f"http://{HOST}:{PORT}"),
+                                                **kwargs)
+
+
+async def main(players: int, concurrency: int, requests_per_second: float):
+    random.seed(0)
+    fake_hiscores = FakeHiscores(players)
+    app = web.Application()
+    app.router.add_get("/{header}/index_lite.ws", fake_hiscores.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+
+    pool = database.ConnectionPool(
+        lambda: sqlite3.connect("file:tracker?mode=memory&cache=shared", uri=True, check_same_thread=False),
+        size=4, paramstyle="qmark")
+    async with pool.connection() as connection:
+        await connection.execute("CREATE TABLE tracked_players (USERNAME TEXT PRIMARY KEY, ACC_TYPE TEXT);")
+        await connection.executemany("INSERT INTO tracked_players VALUES (%s, %s);",
+                                     [(f"player{i}", "normal") for i in range(players)])
+
+        async with aiohttp.ClientSession() as session:
+            scheduler = tracker.TrackingScheduler(
+                pool, functools.partial(highscores.get_highscores_data, LocalFetcher(session), use_cache=False),
+                concurrency=concurrency, requests_per_second=requests_per_second, batch_size=200)
+            await scheduler.setup()
+
+            started = time.perf_counter()
+            await scheduler.refresh_due()
+            elapsed = time.perf_counter() - started
+
+            print(f"Refreshed {players} players in {elapsed:.2f} s ({players / elapsed:.1f} players/s)")
+            print(f"Peak simultaneous requests: {fake_hiscores.peak_active}")
+            print(f"Progress: {scheduler.progress()}")
+
+            # Simulate a restart: a new scheduler must not fetch anyone again
+            restarted = tracker.TrackingScheduler(pool, scheduler.fetch_highscores)
+            requests_before = fake_hiscores.requests
+            due = await restarted.refresh_due()
+            print(f"After restart {due} players were due and {fake_hiscores.requests - requests_before} requests were "
+                  f"sent (only players missing from the highscores are retried)")
+
+        snapshots = await connection.fetchone("SELECT COUNT(*) FROM tracked_snapshots;")
+        print(f"Snapshots stored: {snapshots[0]}")
+
+    pool.close()
+    await runner.cleanup()
+
+
+if __name__ == '__main__':
+    player_amount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency_limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    asyncio.get_event_loop().run_until_complete(main(player_amount, concurrency_limit, rate))
@@ -0,0 +1,50 @@
+"""
+Measure the overhead of LoopWatchdog on an event loop busy with short callbacks, and check that a command blocking the
+event loop with a synchronous call is detected and blamed on the command.
+
+Run from the repository root:
+    python -m benchmarks.watchdog_benchmark [callbacks]
+"""
+
+import asyncio
+import sys
+import time
+
+from OsrsHelper import metrics, watchdog
+
+
+async def busy_loop(callbacks: int) -> float:
+    started = time.perf_counter()
+    for _ in range(callbacks):
+        await asyncio.sleep(0)
+    return time.perf_counter() - started
+
+
+async def blocking_command():
+    # A synchronous call like the blocking MySQLdb cursor calls the commands used to make
+    time.sleep(0.4)
+
+
+async def main(callbacks: int):
+    registry = metrics.MetricsRegistry()
+    loop_watchdog = watchdog.LoopWatchdog(registry=registry,
+                                          get_command_names=lambda: {blocking_command.__code__: "stats"})
+
+    await busy_loop(callbacks // 10)
+    without = await busy_loop(callbacks)
+    loop_watchdog.start()
+    await asyncio.sleep(0.3)
+    with_watchdog = await busy_loop(callbacks)
+    print(f"{callbacks} callbacks without watchdog {without * 1000:.0f} ms, "
+          f"with watchdog {with_watchdog * 1000:.0f} ms ({(with_watchdog / without - 1) * 100:+.1f} %)")
+
+    await blocking_command()
+    await asyncio.sleep(0.3)
+    loop_watchdog.stop()
+    reports = loop_watchdog.latest_reports()
+    assert len(reports) == 1 and reports[0].blamed.startswith("command stats"), reports
+    print(f"Detected a block of {reports[0].duration * 1000:.0f} ms blamed on {reports[0].blamed}")
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 300000))
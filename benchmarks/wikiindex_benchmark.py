@@ -0,0 +1,88 @@
+"""
+Load a generated dump of wiki titles and redirects into WikiIndex and measure how fast command 'wiki' searches are
+answered from it: exact titles, redirects, misspelled titles and searches with no similar pages, which are the only
+ones that still visit the wiki.
+
+Run from the repository root:
+    python -m benchmarks.wikiindex_benchmark [pages]
+"""
+
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+
+from OsrsHelper import wikiindex
+
+SYLLABLES = ["ab", "ys", "sal", "dra", "gon", "rune", "scim", "itar", "bar", "rows", "ver", "ac", "zul", "rah", "vor",
+             "kath", "ele", "mental", "ham", "mer", "ori", "kal", "phite", "cer", "ber", "us", "gen", "eral", "sol"]
+KINDS = ["(item)", "(monster)", "(NPC)", "(quest)", "(location)", ""]
+
+
+def make_dump(path: str, pages: int, seed: int = 0) -> tuple:
+    rng = random.Random(seed)
+    titles = set()
+    while len(titles) < pages:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))) for _ in range(rng.randint(1, 4))]
+        words[0] = words[0].capitalize()
+        titles.add(" ".join(words + [rng.choice(KINDS)]).strip())
+    titles = sorted(titles)
+    redirects = {}
+    for title in rng.sample(titles, pages // 2):
+        redirects[title.upper().replace(" (", " - (")] = title
+    with gzip.open(path, "wt", encoding="utf-8") as dump_file:
+        dump_file.write("page_title\n")
+        for title in titles:
+            dump_file.write(title.replace(" ", "_") + "\n")
+        for redirect, title in redirects.items():
+            dump_file.write(f"{redirect.replace(' ', '_')}\t{title.replace(' ', '_')}#Drops\n")
+    return titles, redirects
+
+
+def misspell(rng: random.Random, title: str) -> str:
+    position = rng.randrange(len(title))
+    return title[:position] + title[position + 1:]
+
+
+def mean_latency(func, searches: list) -> tuple:
+    started = time.perf_counter()
+    results = [func(search) for search in searches]
+    return results, (time.perf_counter() - started) / len(searches)
+
+
+def main(pages: int):
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, wikiindex.WIKI_TITLES_FILES[0])
+        titles, redirects = make_dump(path, pages)
+        started = time.perf_counter()
+        index = wikiindex.WikiIndex.load(wikiindex.find_titles_file(directory))
+        load_time = time.perf_counter() - started
+    print(f"Loaded {len(index)} pages and {len(redirects)} redirects in {load_time * 1000:.0f} ms\n")
+
+    searches = 2000
+    exact = [title.lower() for title in rng.sample(titles, searches)]
+    redirect_searches = rng.sample(list(redirects), searches)
+    misspelled = [misspell(rng, title) for title in rng.sample(titles, searches)]
+    unknown = [f"qwx{i} zzv" for i in range(searches)]
+
+    results, latency = mean_latency(index.find_page, exact)
+    assert all(result.lower() == search for result, search in zip(results, exact))
+    print(f"{'exact titles':<22}{latency * 1e6:>10.1f} us per search")
+    results, latency = mean_latency(index.find_page, redirect_searches)
+    assert results == [redirects[search] for search in redirect_searches]
+    print(f"{'redirects':<22}{latency * 1e6:>10.1f} us per search")
+
+    def find_or_suggest(search):
+        return index.find_page(search) or index.suggest(search)
+
+    for name, kind_searches in [("misspelled titles", misspelled), ("no similar pages", unknown)]:
+        results, latency = mean_latency(find_or_suggest, kind_searches)
+        offline = sum(1 for result in results if result) / len(results)
+        print(f"{name:<22}{latency * 1e6:>10.1f} us per search   {offline:>6.1%} answered without visiting the wiki")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30000)